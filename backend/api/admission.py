@@ -0,0 +1,174 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""
+Control de admisión de los endpoints de cálculo.
+
+Cada endpoint pesado tiene una compuerta (ADMISSION_LIMITS): como mucho
+`limit` cálculos a la vez y `queue` peticiones esperando turno. Con la cola
+llena, o tras esperar ADMISSION_QUEUE_TIMEOUT segundos, la petición se
+rechaza con `Overloaded` y api.middleware.AdmissionMiddleware responde 503
+con Retry-After, en vez de dejarla en cola hasta el timeout del servidor.
+
+La compuerta se pide justo antes de mandar el cálculo al executor
+(`await admitted("horoscope", fn, ...)`): una respuesta que sale de la caché
+no ocupa plaza ni hace cola, así que se sigue sirviendo durante un pico. La
+plaza se devuelve cuando el cálculo termina en el executor, aunque la
+petición se haya cancelado antes.
+
+Las esperas son futures de asyncio despertados con call_soon_threadsafe: con
+WSGI, cada petición corre su propio bucle (async_to_sync) en su hilo y todas
+comparten las mismas compuertas del proceso.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+from .offload import get_executor
+
+
+class Overloaded(Exception):
+    """Petición rechazada por una compuerta llena."""
+
+    def __init__(self, gate: str, reason: str, retry_after: int):
+        super().__init__(f"{gate}: {reason}")
+        self.gate = gate
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    """Semáforo con cola acotada; una plaza liberada pasa directamente al primero de la cola."""
+
+    def __init__(self, name: str, limit: int, queue: int, timeout: float = 10.0, retry_after: int = 5):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._waiters = deque()  # funciones que despiertan a cada petición en cola
+        self.running = 0
+        self.admitted = 0
+        self.queued = 0
+        self.peak_waiting = 0
+        self.shed_full = 0
+        self.shed_timeout = 0
+        self.wait_seconds = 0.0
+
+    async def acquire(self):
+        """Espera una plaza; Overloaded si la cola está llena o la espera pasa de `timeout`."""
+        with self._lock:
+            if self.running < self.limit:
+                self.running += 1
+                self.admitted += 1
+                return
+            if len(self._waiters) >= self.queue:
+                self.shed_full += 1
+                raise Overloaded(self.name, "queue full", self.retry_after)
+            loop = asyncio.get_running_loop()
+            turn = loop.create_future()
+
+            def wake():
+                loop.call_soon_threadsafe(lambda: turn.done() or turn.set_result(None))
+
+            self._waiters.append(wake)
+            self.queued += 1
+            self.peak_waiting = max(self.peak_waiting, len(self._waiters))
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(turn), self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self._lock:
+                still_queued = wake in self._waiters
+                if still_queued:
+                    self._waiters.remove(wake)
+                    self.wait_seconds += time.perf_counter() - started
+            if isinstance(e, asyncio.CancelledError):
+                if not still_queued:
+                    self.release()  # la plaza ya era nuestra: pasa a la siguiente
+                raise
+            if still_queued:
+                with self._lock:
+                    self.shed_timeout += 1
+                raise Overloaded(self.name, "queue timeout", self.retry_after)
+            # release() nos pasó la plaza justo al vencer la espera: es nuestra
+        with self._lock:
+            self.admitted += 1
+            self.wait_seconds += time.perf_counter() - started
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                self._waiters.popleft()()  # la plaza pasa a la siguiente sin liberarse
+            else:
+                self.running -= 1
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+    def info(self) -> dict:
+        with self._lock:
+            waited = self.queued - len(self._waiters)
+            return {
+                "limit": self.limit,
+                "queue": self.queue,
+                "running": self.running,
+                "waiting": len(self._waiters),
+                "peak_waiting": self.peak_waiting,
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "shed_full": self.shed_full,
+                "shed_timeout": self.shed_timeout,
+                "avg_wait_ms": round(self.wait_seconds / waited * 1000, 2) if waited else 0.0,
+            }
+
+
+_gates = {}
+_gates_lock = threading.Lock()
+
+
+def get_gate(name: str) -> AdmissionGate:
+    """Compuerta del proceso para `name` (una de ADMISSION_LIMITS)."""
+    gate = _gates.get(name)
+    if gate is None:
+        with _gates_lock:
+            gate = _gates.get(name)
+            if gate is None:
+                limit, queue = settings.ADMISSION_LIMITS[name]
+                gate = AdmissionGate(name, limit, queue, settings.ADMISSION_QUEUE_TIMEOUT,
+                                     settings.ADMISSION_RETRY_AFTER)
+                _gates[name] = gate
+    return gate
+
+
+def gates_info() -> dict:
+    return {name: get_gate(name).info() for name in settings.ADMISSION_LIMITS}
+
+
+async def admitted(name: str, fn, *args, **kwargs):
+    """`await offload(fn, ...)` con una plaza de la compuerta `name` (Overloaded si no la hay)."""
+    gate = get_gate(name)
+    await gate.acquire()
+    try:
+        future = get_executor().submit(fn, *args, **kwargs)
+    except BaseException:
+        gate.release()
+        raise
+    # La plaza se libera al terminar el cálculo (o al cancelarse antes de empezar), no al
+    # cancelarse la petición: con el cliente desconectado el hilo sigue calculando
+    future.add_done_callback(lambda _: gate.release())
+    return await asyncio.wrap_future(future)
@@ -13,9 +13,34 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with astroapi.  If not, see <https://www.gnu.org/licenses/>.
 
+import os
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
+
+
+SERVER_MODULES = ("gunicorn", "uwsgi", "uvicorn", "daphne", "hypercorn")
+
+
+def _serves_requests() -> bool:
+    """
+    True en un servidor (gunicorn, uwsgi…) y en el proceso hijo de runserver;
+    False en tests, scripts y otros comandos de manage.py.
+    """
+    if any(name in sys.modules for name in SERVER_MODULES):
+        return True
+    # runserver con autoreload: solo el hijo (RUN_MAIN) atiende peticiones
+    return sys.argv[1:2] == ["runserver"] and (
+        os.environ.get("RUN_MAIN") == "true" or "--noreload" in sys.argv
+    )
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'api'
\ No newline at end of file
+    name = 'api'
+
+    def ready(self):
+        if settings.CACHE_WARMER_ENABLED and _serves_requests():
+            from .warmer import start_warmer
+            start_warmer()
\ No newline at end of file
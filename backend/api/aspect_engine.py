@@ -0,0 +1,74 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""
+Motor de aspectos vectorizado.
+
+En lugar de recorrer pares de cuerpos × aspectos en Python, se calcula la
+matriz de separaciones angulares de una vez y se compara contra una tabla de
+aspectos compilada (ángulos y orbes por clase de cuerpo) con numpy. Solo las
+coincidencias vuelven a Python para construir los dicts de salida.
+
+Las coincidencias salen en el mismo orden que los bucles anidados
+(fila, columna, aspecto), y las separaciones se calculan con las mismas
+operaciones, así que los resultados son idénticos bit a bit.
+"""
+
+import numpy as np
+
+
+def separation_matrix(lons_a, lons_b, normalize: bool = True) -> np.ndarray:
+    """
+    Separación angular (0–180°) entre cada longitud de `lons_a` y de `lons_b`.
+
+    Con `normalize` las longitudes se llevan antes a [0, 360) (como
+    `services.angular_sep`); sin él se comparan tal cual (como
+    `horoscope_service.angular_distance`).
+    """
+    a = np.asarray(lons_a, dtype=float)
+    b = np.asarray(lons_b, dtype=float)
+    if normalize:
+        a = a % 360.0
+        b = b % 360.0
+    d = np.abs(a[:, None] - b[None, :])
+    return np.where(d > 180, 360.0 - d, d)
+
+
+class AspectTable:
+    """
+    Tabla de aspectos compilada: nombres, ángulos y orbes[clase, aspecto].
+
+    `orb_keys` indica de qué clave del config sale el orbe de cada clase de
+    cuerpo; p. ej. ("orb_fast", "orb_slow") para los tránsitos del horóscopo.
+    """
+
+    def __init__(self, aspects: list, orb_keys=("orb",)):
+        self.names = [asp["name"] for asp in aspects]
+        self.angles = np.array([asp["angle"] for asp in aspects], dtype=float)
+        self.orbs = np.array([[asp[key] for asp in aspects] for key in orb_keys], dtype=float)
+
+    def match(self, separations: np.ndarray, classes=None, upper: bool = False):
+        """
+        Coincidencias de `separations` (M×N) con la tabla.
+
+        Args:
+            classes: clase de cada fila (índice en `orb_keys`); por defecto 0
+            upper: solo pares j > i (aspectos de una carta consigo misma)
+
+        Returns:
+            (rows, cols, aspect_idx, orbs) en orden (fila, columna, aspecto)
+        """
+        m, n = separations.shape
+        if upper:
+            rows, cols = np.triu_indices(m, k=1, m=n)
+        else:
+            rows, cols = np.divmod(np.arange(m * n), n)
+        classes = np.zeros(m, dtype=int) if classes is None else np.asarray(classes)
+        # Una fila por par (en orden fila, columna) × una columna por aspecto
+        diff = np.abs(separations[rows, cols][:, None] - self.angles[None, :])
+        pair, idx = np.nonzero(diff <= self.orbs[classes[rows]])
+        return rows[pair], cols[pair], idx, diff[pair, idx]
@@ -10,18 +10,26 @@ Sistema de caché para optimizar respuestas de API.
 Reduce tiempo de respuesta de ~200ms a ~20ms en requests repetidas.
 """
 
+from django.conf import settings
 from django.core.cache import cache
 from functools import wraps
 import hashlib
 import json
+import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
+from .services import canonical_birth_data
+
 
 class CacheManager:
     """Gestor centralizado de caché para la API"""
     
     # TTL (Time To Live) en segundos
     TTL_TRANSITS = 3600  # 1 hora (tránsitos cambian lento excepto Luna)
+    TTL_TRANSIT_SNAPSHOT = 86400 * 7  # 7 días (instantáneas horarias: deterministas)
     TTL_NATAL_CHART = 86400 * 30  # 30 días (carta natal no cambia)
     TTL_DAILY_HOROSCOPE = 3600 * 6  # 6 horas (horóscopo del día)
     TTL_ASPECTS = 1800  # 30 minutos (aspectos entre tránsitos)
@@ -37,71 +45,342 @@ class CacheManager:
         return f"{prefix}:{hash_md5}"
     
     @staticmethod
-    def get_transits_key(date_str: str, timezone: str) -> str:
-        """Clave para tránsitos de un día específico"""
-        return f"transits:{date_str}:{timezone}"
+    def get_transits_key(hour: datetime) -> str:
+        """Clave para la instantánea de tránsitos de una hora UTC exacta"""
+        return f"transits:{hour:%Y-%m-%d-%H}"
     
     @staticmethod
     def get_natal_chart_key(birth_data: dict) -> str:
-        """Clave para carta natal"""
-        return CacheManager.generate_key("natal", birth_data)
+        """
+        Clave para carta natal a partir de las entradas normalizadas
+        (ver services.canonical_birth_data): UTC, lat/lon redondeadas,
+        casas, Luna topocéntrica, selección y versión del algoritmo.
+        """
+        return CacheManager.generate_key("natal", canonical_birth_data(birth_data))
     
     @staticmethod
-    def get_horoscope_key(birth_data: dict, date_str: str, timezone: str) -> str:
-        """Clave para horóscopo diario"""
-        birth_hash = hashlib.md5(
-            json.dumps(birth_data, sort_keys=True).encode()
-        ).hexdigest()[:8]
-        return f"horoscope:{birth_hash}:{date_str}:{timezone}"
+    def get_horoscope_key(birth_data: dict, date_str: str, timezone: str, chart_id: str = None) -> str:
+        """
+        Clave para horóscopo diario: el chart_id de la carta registrada o,
+        si la carta llega completa, el sha256 de su JSON.
+        """
+        if chart_id is None:
+            chart_id = hashlib.sha256(json.dumps(birth_data, sort_keys=True).encode()).hexdigest()
+        return f"horoscope:{chart_id}:{date_str}:{timezone}"
+
 
+class _Flight:
+    """Cálculo en curso de una clave dentro del proceso."""
 
-def cache_transits(ttl=CacheManager.TTL_TRANSITS):
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
     """
-    Decorator para cachear tránsitos planetarios.
-    Los tránsitos son iguales para todos los usuarios en la misma fecha/hora.
+    Agrupa los fallos de caché concurrentes de una misma clave en un solo cálculo.
+
+    Dentro del proceso, el primer hilo que falla calcula y el resto espera su
+    resultado. Entre workers (SINGLE_FLIGHT_CROSS_WORKER, con una caché
+    compartida como SQLiteCache) el hilo que calcula toma antes un lock con
+    cache.add; los demás workers sondean la caché hasta que aparece el valor,
+    y si el lock caduca o se libera sin valor calculan ellos.
+
+    Contadores:
+        computations: cálculos realmente ejecutados
+        coalesced: esperas resueltas con el cálculo de otro hilo del proceso
+        remote_hits: esperas resueltas con el cálculo de otro worker
+        lock_timeouts: esperas que se rindieron y calcularon por su cuenta
+    """
+
+    def __init__(self, name: str, lock_ttl: int = 30, wait_timeout: float = 30.0, poll_interval: float = 0.01):
+        self.name = name
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.computations = 0
+        self.coalesced = 0
+        self.remote_hits = 0
+        self.lock_timeouts = 0
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def do(self, key: str, compute, lookup, shared=None):
+        """
+        Valor de `key`: `compute()` (que debe guardarlo en caché) se ejecuta
+        una sola vez por clave entre las peticiones concurrentes; `lookup()`
+        lee la caché compartida (None si falta). Si se da `shared(valor)`, se
+        aplica a lo que este llamador no calculó (espera agrupada o valor de
+        otro worker) y devuelve el valor a entregar.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value if shared is None else shared(flight.value)
+
+        try:
+            flight.value, computed = self._run(key, compute, lookup)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.value if computed or shared is None else shared(flight.value)
+
+    def _run(self, key: str, compute, lookup):
+        """(valor, True si lo calculó este hilo)."""
+        if not getattr(settings, "SINGLE_FLIGHT_CROSS_WORKER", False):
+            self._count("computations")
+            return compute(), True
+
+        lock_key = f"singleflight:{key}"
+        deadline = time.monotonic() + self.wait_timeout
+        waited = False
+        while True:
+            if cache.add(lock_key, os.getpid(), self.lock_ttl):
+                try:
+                    # Tras esperar, el worker que tenía el lock pudo dejar el valor
+                    value = lookup() if waited else None
+                    if value is not None:
+                        self._count("remote_hits")
+                        return value, False
+                    self._count("computations")
+                    return compute(), True
+                finally:
+                    cache.delete(lock_key)
+
+            waited = True
+            time.sleep(self.poll_interval)
+            value = lookup()
+            if value is not None:
+                self._count("remote_hits")
+                return value, False
+            if time.monotonic() > deadline:
+                self._count("lock_timeouts")
+                self._count("computations")
+                return compute(), True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "computations": self.computations,
+                "coalesced": self.coalesced,
+                "remote_hits": self.remote_hits,
+                "lock_timeouts": self.lock_timeouts,
+                "in_flight": len(self._flights),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.computations = self.coalesced = self.remote_hits = self.lock_timeouts = 0
+
+
+# Una instancia (y sus contadores) por familia de claves
+transits_flight = SingleFlight("transits")
+natal_flight = SingleFlight("natal_chart")
+horoscope_flight = SingleFlight("daily_horoscope")
+SINGLE_FLIGHTS = [transits_flight, natal_flight, horoscope_flight]
+
+
+def cache_transits(ttl=CacheManager.TTL_TRANSIT_SNAPSHOT):
+    """
+    Decorator para cachear instantáneas horarias de tránsitos.
+    Los tránsitos son iguales para todos los usuarios: se guardan en cada
+    hora UTC exacta (la función recibe esa hora) y cualquier instante se
+    interpola entre dos instantáneas (horoscope_service.calculate_transits).
+    Van en `transits_cache` (L1 en proceso + caché de Django).
+    Al cambiar la hora, las peticiones concurrentes esperan un único cálculo.
     """
     def decorator(func):
         @wraps(func)
-        def wrapper(dt, timezone="UTC"):
+        def wrapper(hour):
             # Generar clave de caché
-            date_str = dt.strftime("%Y-%m-%d-%H")
-            cache_key = CacheManager.get_transits_key(date_str, timezone)
+            cache_key = CacheManager.get_transits_key(hour)
             
             # Intentar obtener de caché
-            cached = cache.get(cache_key)
+            cached = transits_cache.get(cache_key)
             if cached is not None:
                 return cached
-            
-            # Calcular y guardar en caché
-            result = func(dt, timezone)
-            cache.set(cache_key, result, ttl)
-            return result
+            return fill(hour)
+
+        def fill(hour):
+            """Calcula (una sola vez por clave) y guarda en caché, sin consultarla antes."""
+            cache_key = CacheManager.get_transits_key(hour)
+
+            def compute():
+                result = func(hour)
+                transits_cache.set(cache_key, result, ttl)
+                return result
+
+            return transits_flight.do(cache_key, compute, lambda: cache.get(cache_key))
         
+        # Las vistas async miran solo L1 en el bucle (peek); L2 y el cálculo van a un hilo
+        wrapper.peek = lambda hour: transits_cache.get_l1(CacheManager.get_transits_key(hour))
+        wrapper.fill = fill
         return wrapper
     return decorator
 
 
+class TwoTierCache:
+    """
+    Caché de dos niveles: un LRU en memoria del proceso (L1) delante de la
+    caché compartida de Django (L2). Un acierto en L2 se copia a L1.
+    Cuenta aciertos por nivel y fallos para calcular ratios.
+
+    L1 devuelve el mismo objeto en cada acierto: los llamadores no deben mutarlo.
+    """
+
+    def __init__(self, name: str, max_entries: int = 2048, l1_ttl: int = 3600):
+        self.name = name
+        self.max_entries = max_entries
+        self.l1_ttl = l1_ttl  # L1 no conoce el TTL restante de L2: caduca antes
+        self._entries = OrderedDict()  # key -> (expira, valor)
+        self._lock = threading.Lock()
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+
+    def get_l1(self, key: str):
+        """
+        Valor de L1 o None, sin tocar L2: es lo único que se consulta en el
+        bucle de eventos. Un fallo no se cuenta (lo contará get()).
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.l1_hits += 1
+                    return entry[1]
+                del self._entries[key]
+        return None
+
+    def get(self, key: str):
+        """Valor cacheado o None."""
+        value = self.get_l1(key)
+        if value is not None:
+            return value
+
+        value = cache.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.l2_hits += 1
+        if value is not None:
+            self._set_l1(key, value, self.l1_ttl)
+        return value
+
+    def set(self, key: str, value, ttl: int):
+        cache.set(key, value, ttl)
+        self._set_l1(key, value, min(ttl, self.l1_ttl))
+
+    def _set_l1(self, key: str, value, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.l1_hits = self.l2_hits = self.misses = 0
+
+    def purge_expired(self) -> int:
+        """Quita de L1 las entradas caducadas; devuelve cuántas."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (expires, _) in self._entries.items() if expires <= now]
+            for key in expired:
+                del self._entries[key]
+        return len(expired)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.l1_hits + self.l2_hits + self.misses
+            return {
+                "requests": total,
+                "l1_hits": self.l1_hits,
+                "l2_hits": self.l2_hits,
+                "misses": self.misses,
+                "l1_hit_ratio": round(self.l1_hits / total, 4) if total else 0.0,
+                "l2_hit_ratio": round(self.l2_hits / total, 4) if total else 0.0,
+                "hit_ratio": round((self.l1_hits + self.l2_hits) / total, 4) if total else 0.0,
+                "l1_entries": len(self._entries),
+                "l1_max_entries": self.max_entries,
+            }
+
+
+# Cartas natales: deterministas y muy repetidas (mismos usuarios cada día)
+natal_cache = TwoTierCache("natal_chart")
+
+# Respuestas ya serializadas y comprimidas (ver prerendered.py)
+response_cache = TwoTierCache("response", max_entries=1024)
+
+# Instantáneas horarias de tránsitos: pocas y las mismas para todos los usuarios
+transits_cache = TwoTierCache("transits", max_entries=512)
+TIERS = [natal_cache, response_cache, transits_cache]
+
+
 def cache_natal_chart(ttl=CacheManager.TTL_NATAL_CHART):
     """
     Decorator para cachear cartas natales.
-    Las cartas natales nunca cambian para los mismos datos de nacimiento.
+    Las cartas natales nunca cambian para los mismos datos de nacimiento:
+    se cachean en `natal_cache` (L1 en proceso + caché de Django) bajo la clave
+    normalizada, y se calculan con lat/lon redondeadas a la misma precisión
+    que la clave, de modo que la respuesta no depende de quién la calculó primero.
     """
     def decorator(func):
         @wraps(func)
         def wrapper(birth_data, ephe_path=None):
-            # Generar clave de caché
-            cache_key = CacheManager.get_natal_chart_key(birth_data)
-            
+            canonical = canonical_birth_data(birth_data)
+            cache_key = CacheManager.generate_key("natal", canonical)
+
             # Intentar obtener de caché
-            cached = cache.get(cache_key)
+            cached = natal_cache.get(cache_key)
             if cached is not None:
                 return cached
-            
-            # Calcular y guardar en caché
-            result = func(birth_data, ephe_path)
-            cache.set(cache_key, result, ttl)
-            return result
-        
+            return fill(birth_data, ephe_path)
+
+        def fill(birth_data, ephe_path=None):
+            """Calcula (una sola vez por clave) y guarda en caché, sin consultarla antes."""
+            canonical = canonical_birth_data(birth_data)
+            cache_key = CacheManager.generate_key("natal", canonical)
+
+            def compute():
+                rounded = dict(birth_data, latitude=canonical["latitude"], longitude=canonical["longitude"])
+                result = func(rounded, ephe_path)
+                natal_cache.set(cache_key, result, ttl)
+                return result
+
+            # El sondeo va directo a L2 para no contar cada intento como fallo de natal_cache
+            return natal_flight.do(cache_key, compute, lambda: cache.get(cache_key))
+
+        def peek(birth_data):
+            """Carta en L1 o None, sin calcular ni leer L2 (para el bucle de eventos)."""
+            return natal_cache.get_l1(CacheManager.generate_key("natal", canonical_birth_data(birth_data)))
+
+        wrapper.peek = peek
+        wrapper.fill = fill
         return wrapper
     return decorator
 
@@ -113,26 +392,50 @@ def cache_daily_horoscope(ttl=CacheManager.TTL_DAILY_HOROSCOPE):
     """
     def decorator(func):
         @wraps(func)
-        def wrapper(birth_data, target_date=None, timezone="UTC"):
+        def wrapper(birth_data, target_date=None, timezone="UTC", chart_id=None):
             # Generar clave de caché
             if target_date is None:
                 target_date = datetime.now()
             
             date_str = target_date.strftime("%Y-%m-%d")
-            cache_key = CacheManager.get_horoscope_key(birth_data, date_str, timezone)
+            cache_key = CacheManager.get_horoscope_key(birth_data, date_str, timezone, chart_id)
             
             # Intentar obtener de caché
             cached = cache.get(cache_key)
             if cached is not None:
                 cached['_from_cache'] = True
                 return cached
-            
-            # Calcular y guardar en caché
-            result = func(birth_data, target_date, timezone)
-            result['_from_cache'] = False
-            cache.set(cache_key, result, ttl)
-            return result
+            return fill(birth_data, target_date, timezone, chart_id)
+
+        def fill(birth_data, target_date=None, timezone="UTC", chart_id=None):
+            """Calcula (una sola vez por clave) y guarda en caché, sin consultarla antes."""
+            if target_date is None:
+                target_date = datetime.now()
+            cache_key = CacheManager.get_horoscope_key(birth_data, target_date.strftime("%Y-%m-%d"),
+                                                       timezone, chart_id)
+
+            def compute():
+                result = func(birth_data, target_date, timezone)
+                result['_from_cache'] = False
+                cache.set(cache_key, result, ttl)
+                return result
+
+            # Quien recibe el cálculo de otro (hilo o worker) no calculó: `_from_cache` en una copia
+            return horoscope_flight.do(cache_key, compute, lambda: cache.get(cache_key),
+                                       shared=lambda value: dict(value, _from_cache=True))
         
+        def peek(birth_data, target_date=None, timezone="UTC", chart_id=None):
+            """Horóscopo cacheado (con `_from_cache`) o None, sin calcular; lee L2, así que va en un hilo."""
+            if target_date is None:
+                target_date = datetime.now()
+            cached = cache.get(CacheManager.get_horoscope_key(
+                birth_data, target_date.strftime("%Y-%m-%d"), timezone, chart_id))
+            if cached is not None:
+                cached['_from_cache'] = True
+            return cached
+        
+        wrapper.peek = peek
+        wrapper.fill = fill
         return wrapper
     return decorator
 
@@ -143,14 +446,15 @@ class SmartCache:
     """
     
     @staticmethod
-    def invalidate_old_transits():
+    def invalidate_old_transits() -> dict:
         """
-        Invalida tránsitos de más de 24 horas.
-        Ejecutar periódicamente (ej: cron diario).
+        Expulsa las entradas caducadas de todas las familias: la caché
+        compartida (si el backend lo permite, como SQLiteCache) y el L1 de
+        las cachés de dos niveles. Lo ejecuta el warmer en cada ciclo.
         """
-        # Django cache no soporta pattern delete directamente
-        # Usar Redis si necesitas esto en producción
-        pass
+        # LocMemCache y Redis ya expulsan solos lo caducado
+        shared = cache.delete_expired() if hasattr(cache, "delete_expired") else 0
+        return {"shared": shared, **{tier.name: tier.purge_expired() for tier in TIERS}}
     
     @staticmethod
     def warm_up_cache(dates_ahead=7):
@@ -159,29 +463,31 @@ class SmartCache:
         Útil para reducir latencia en horóscopos futuros.
         """
         from .horoscope_service import calculate_transits
+        from .warmer import traffic
         
+        timezones = traffic.top(5)["timezones"] or ["UTC"]
         for days in range(dates_ahead):
             target = datetime.now() + timedelta(days=days)
-            # Calcular para zona horaria común
-            calculate_transits(target, "UTC")
+            # Zonas horarias más pedidas por el tráfico real
+            for timezone in timezones:
+                calculate_transits(target, timezone)
     
     @staticmethod
     def get_cache_stats() -> dict:
-        """Obtiene estadísticas de uso de caché"""
-        try:
-            # Requiere Redis con django-redis
-            from django_redis import get_redis_connection
-            redis_conn = get_redis_connection("default")
-            
-            info = redis_conn.info('stats')
-            return {
-                'hits': info.get('keyspace_hits', 0),
-                'misses': info.get('keyspace_misses', 0),
-                'hit_rate': info.get('keyspace_hits', 0) / 
-                           max(info.get('keyspace_hits', 0) + info.get('keyspace_misses', 0), 1)
-            }
-        except Exception:
-            return {'error': 'Redis not available'}
+        """
+        Estadísticas por familia (transits, horoscope, natal, monthly):
+        aciertos, fallos, escrituras, expulsiones, entradas y bytes aproximados,
+        sumadas entre todos los workers (ver cache_stats).
+        """
+        from .cache_stats import family_report
+        from .monthly_store import get_store
+
+        usage = cache.usage() if hasattr(cache, "usage") else {}
+        usage["monthly"] = get_store().usage()
+        stats = {"backend": type(cache).__name__, "families": family_report(usage)}
+        if hasattr(cache, "info"):  # SQLiteCache: ocupación compartida por los workers
+            stats["shared"] = cache.info()
+        return stats
 
 
 class ResponseCompression:
@@ -204,6 +510,41 @@ class ResponseCompression:
             }
         return compressed
     
+    @staticmethod
+    def compress_transits(transits: dict) -> dict:
+        """Tránsitos ({longitude, speed, sign, …}) con las mismas claves cortas que compress_planets."""
+        compressed = {}
+        for name, data in transits.items():
+            compressed[name] = {
+                'v': round(data['longitude'], 4),  # longitude
+                's': round(data['speed'], 4),  # speed
+            }
+            if 'phase' in data:
+                compressed[name]['f'] = data['phase']  # fase lunar
+        return compressed
+    
+    @staticmethod
+    def compress_houses(houses: dict) -> dict:
+        """Ascendente, MC y cúspides 1–12 como longitudes (sin alias ni cadenas)."""
+        return {
+            'asc': round(houses['asc']['value'], 4),
+            'mc': round(houses['mc']['value'], 4),
+            'c': [round(cusp['value'], 4) for cusp in houses['cusps']],
+        }
+    
+    @staticmethod
+    def compress_chart_aspects(aspects: list) -> list:
+        """Aspectos de una carta natal (planet_a/planet_b)"""
+        return [
+            {
+                'a': aspect['planet_a'][:3],
+                'b': aspect['planet_b'][:3],
+                'x': aspect['aspect'][:3],  # Con, Opp, Tri, etc.
+                'o': round(aspect['orb'], 2),
+            }
+            for aspect in aspects
+        ]
+    
     @staticmethod
     def compress_aspects(aspects: list) -> list:
         """Comprime lista de aspectos"""
@@ -220,7 +561,6 @@ class ResponseCompression:
 
 
 # Funciones de utilidad para benchmarking
-import time
 
 class PerformanceMonitor:
     """Monitor de performance para endpoints"""
@@ -0,0 +1,145 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""
+Estadísticas de caché por familia de claves, agregadas entre workers.
+
+La caché (SQLiteCache) y el almacén mensual anotan aquí aciertos, fallos,
+escrituras, expulsiones LRU y caducadas. Cada proceso acumula los contadores en
+memoria y, como mucho una vez por CACHE_STATS_FLUSH_INTERVAL, suma los
+deltas en una tabla SQLite compartida (CACHE_STATS_PATH). Leer las
+estadísticas desde cualquier worker devuelve el total de todos.
+
+La familia es el prefijo de la clave antes de ":" (transits:…, horoscope:…,
+natal:…, response:…); las claves del registro de cartas (chart:…) cuentan
+como natal.
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+CACHE_STATS_PATH = os.environ.get(
+    "CACHE_STATS_PATH",
+    str(Path(os.environ.get("ASTROAPI_DATA_DIR", BASE_DIR / "data")) / "cache_stats.sqlite3"),
+)
+CACHE_STATS_FLUSH_INTERVAL = float(os.environ.get("CACHE_STATS_FLUSH_INTERVAL", "1.0"))
+
+FAMILIES = {
+    "transits": "transits",
+    "horoscope": "horoscope",
+    "natal": "natal",
+    "chart": "natal",
+    "monthly": "monthly",
+    "response": "response",
+}
+EVENTS = ("hits", "misses", "sets", "evictions", "expirations")
+
+
+def family_of(key: str) -> str:
+    """Familia de una clave (sin el prefijo de versión de Django)."""
+    return FAMILIES.get(key.split(":", 1)[0], "other")
+
+
+class CacheStatsRecorder:
+    """Contadores (familia, evento) por proceso, volcados a una tabla compartida."""
+
+    def __init__(self, path: str = None, flush_interval: float = None):
+        self.path = path or CACHE_STATS_PATH
+        self.flush_interval = CACHE_STATS_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_flush = time.monotonic()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_stats ("
+                " family TEXT NOT NULL, event TEXT NOT NULL, count INTEGER NOT NULL,"
+                " PRIMARY KEY (family, event))"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def record(self, family: str, event: str, n: int = 1):
+        if n <= 0:
+            return
+        with self._lock:
+            self._pending[(family, event)] += n
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Suma los contadores pendientes en la tabla compartida."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO cache_stats (family, event, count) VALUES (?, ?, ?)"
+                " ON CONFLICT (family, event) DO UPDATE SET count = count + excluded.count",
+                [(family, event, n) for (family, event), n in pending.items()],
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            with self._lock:  # se reintenta en el siguiente volcado
+                self._pending.update(pending)
+
+    def totals(self) -> dict:
+        """{familia: {evento: total de todos los workers}}."""
+        self.flush()
+        out = {}
+        for family, event, count in self._conn().execute("SELECT family, event, count FROM cache_stats"):
+            out.setdefault(family, dict.fromkeys(EVENTS, 0))[event] = count
+        return out
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+        self._conn().execute("DELETE FROM cache_stats")
+
+
+recorder = CacheStatsRecorder()
+atexit.register(recorder.flush)
+
+
+def family_report(usage: dict = None) -> dict:
+    """
+    Contadores agregados + ocupación (`usage`: {familia: {"entries", "bytes"}})
+    con el ratio de aciertos de cada familia.
+    """
+    totals = recorder.totals()
+    usage = usage or {}
+    report = {}
+    for family in sorted(set(totals) | set(usage)):
+        counters = totals.get(family, dict.fromkeys(EVENTS, 0))
+        lookups = counters["hits"] + counters["misses"]
+        report[family] = {
+            **counters,
+            "hit_ratio": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+            **usage.get(family, {}),
+        }
+    return report
@@ -0,0 +1,91 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""
+Registro de cartas natales: la carta se guarda una vez (modelo NatalChart) y
+los endpoints de horóscopo la reciben como `chart_id` en lugar de la salida
+completa de /api/compute/.
+
+El id es determinista: sha256 de las entradas normalizadas
+(services.canonical_birth_data), así que registrar dos veces la misma carta,
+aunque sea con otra zona horaria, devuelve el mismo id.
+"""
+
+import hashlib
+import json
+import re
+
+from .cache_manager import CacheManager, natal_cache
+from .models import NatalChart
+from .services import canonical_birth_data
+
+CHART_ID_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def full_chart_payload(payload: dict) -> dict:
+    """El payload sin `bodies`/`fields`: se registra siempre la carta completa."""
+    return {k: v for k, v in payload.items() if k not in ("bodies", "fields")}
+
+
+def chart_id_for(payload: dict) -> str:
+    """sha256 (64 hex) de las entradas normalizadas de la carta completa."""
+    canonical = canonical_birth_data(full_chart_payload(payload))
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+
+
+def _cache_key(chart_id: str) -> str:
+    return f"chart:{chart_id}"
+
+
+def register_chart(payload: dict, chart: dict) -> str:
+    """Guarda `chart` (calculada de `payload`) si no existía y devuelve su chart_id."""
+    chart_id = chart_id_for(payload)
+    NatalChart.objects.get_or_create(
+        chart_id=chart_id,
+        defaults={"birth_data": canonical_birth_data(full_chart_payload(payload)), "chart": chart},
+    )
+    natal_cache.set(_cache_key(chart_id), chart, CacheManager.TTL_NATAL_CHART)
+    return chart_id
+
+
+def cached_chart(chart_id: str):
+    """Carta registrada si está en el L1 de natal_cache (None si no); sin tocar L2 ni la base de datos."""
+    if not isinstance(chart_id, str) or not CHART_ID_RE.match(chart_id):
+        return None
+    return natal_cache.get_l1(_cache_key(chart_id))
+
+
+def load_chart(chart_id: str):
+    """Carta registrada con `chart_id` (None si no existe). Pasa por natal_cache."""
+    if not isinstance(chart_id, str) or not CHART_ID_RE.match(chart_id):
+        return None
+    key = _cache_key(chart_id)
+    chart = natal_cache.get(key)
+    if chart is None:
+        chart = NatalChart.objects.filter(chart_id=chart_id).values_list("chart", flat=True).first()
+        if chart is not None:
+            natal_cache.set(key, chart, CacheManager.TTL_NATAL_CHART)
+    return chart
+
+
+def load_charts(chart_ids: list) -> dict:
+    """{chart_id: carta} de los ids registrados: natal_cache y, para los que falten, una sola consulta."""
+    charts = {}
+    missing = []
+    # Solo cadenas: un id de JSON puede ser una lista u objeto, que no se puede deduplicar
+    for chart_id in dict.fromkeys(chart_id for chart_id in chart_ids if isinstance(chart_id, str)):
+        if not CHART_ID_RE.match(chart_id):
+            continue
+        chart = natal_cache.get(_cache_key(chart_id))
+        if chart is None:
+            missing.append(chart_id)
+        else:
+            charts[chart_id] = chart
+    for chart_id, chart in NatalChart.objects.filter(chart_id__in=missing).values_list("chart_id", "chart"):
+        natal_cache.set(_cache_key(chart_id), chart, CacheManager.TTL_NATAL_CHART)
+        charts[chart_id] = chart
+    return charts
@@ -0,0 +1,168 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""
+Catálogo de eclipses basado en las búsquedas globales de Swiss Ephemeris
+(`sol_eclipse_when_glob` / `lun_eclipse_when`).
+
+Los eclipses de un año se calculan una sola vez y se guardan en un índice
+persistente (un JSON por año en ECLIPSE_INDEX_DIR), de modo que la vista
+mensual y la anual solo hacen una consulta. No depende de Django: puede
+ejecutarse en el motor de efemérides.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+import swisseph as swe
+
+from .ephemeris_engine import ensure_ephe_path
+from .event_search import jd_to_datetime
+
+# Cambiar si cambia el cálculo para invalidar los índices guardados
+INDEX_VERSION = 1
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+ECLIPSE_INDEX_DIR = Path(os.environ.get(
+    "ECLIPSE_INDEX_DIR",
+    Path(os.environ.get("ASTROAPI_DATA_DIR", BASE_DIR / "data")) / "eclipses",
+))
+
+FLAGS = swe.FLG_SWIEPH
+
+_years = {}
+_years_lock = threading.Lock()
+
+
+def _solar_type(flags: int) -> str:
+    if flags & swe.ECL_ANNULAR_TOTAL:
+        return "hybrid"
+    if flags & swe.ECL_TOTAL:
+        return "total"
+    if flags & swe.ECL_ANNULAR:
+        return "annular"
+    return "partial"
+
+
+def _lunar_type(flags: int) -> str:
+    if flags & swe.ECL_TOTAL:
+        return "total"
+    if flags & swe.ECL_PARTIAL:
+        return "partial"
+    return "penumbral"
+
+
+def _eclipse(kind: str, eclipse_type: str, jd_max: float, magnitude: float, **extra) -> dict:
+    return {
+        "kind": kind,
+        "type": eclipse_type,
+        "jd_ut": jd_max,
+        "maximum_utc": jd_to_datetime(jd_max).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "magnitude": round(magnitude, 4),
+        **extra,
+    }
+
+
+def compute_year(year: int) -> list:
+    """Eclipses solares y lunares cuyo máximo cae en `year`, ordenados por tiempo."""
+    ensure_ephe_path()
+    jd_start = swe.julday(year, 1, 1, 0.0)
+    jd_end = swe.julday(year + 1, 1, 1, 0.0)
+    eclipses = []
+
+    jd = jd_start
+    while True:
+        flags, tret = swe.sol_eclipse_when_glob(jd, FLAGS)
+        if tret[0] >= jd_end:
+            break
+        attr = swe.sol_eclipse_where(tret[0], FLAGS)[2]
+        eclipses.append(_eclipse(
+            "solar", _solar_type(flags), tret[0], attr[8],
+            central=bool(flags & swe.ECL_CENTRAL),
+        ))
+        jd = tret[0] + 1
+
+    jd = jd_start
+    while True:
+        flags, tret = swe.lun_eclipse_when(jd, FLAGS)
+        if tret[0] >= jd_end:
+            break
+        attr = swe.lun_eclipse_how(tret[0], (0.0, 0.0, 0.0), FLAGS)[1]
+        eclipse_type = _lunar_type(flags)
+        magnitude = attr[1] if eclipse_type == "penumbral" else attr[0]
+        eclipses.append(_eclipse(
+            "lunar", eclipse_type, tret[0], magnitude,
+            umbral_magnitude=round(attr[0], 4), penumbral_magnitude=round(attr[1], 4),
+        ))
+        jd = tret[0] + 1
+
+    eclipses.sort(key=lambda e: e["jd_ut"])
+    return eclipses
+
+
+def _index_path(year: int) -> Path:
+    return ECLIPSE_INDEX_DIR / f"eclipses_{year}.json"
+
+
+def _read_index(year: int):
+    try:
+        with open(_index_path(year), encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != INDEX_VERSION or data.get("swisseph_version") != swe.version:
+        return None
+    return data["eclipses"]
+
+
+def _write_index(year: int, eclipses: list):
+    path = _index_path(year)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "swisseph_version": swe.version,
+                       "year": year, "eclipses": eclipses}, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # disco de solo lectura: seguimos con la copia en memoria
+
+
+def indexed_eclipses(year: int):
+    """Eclipses del año en memoria o en el índice en disco; None si hay que calcularlos."""
+    eclipses = _years.get(year)
+    if eclipses is None:
+        eclipses = _read_index(year)
+        if eclipses is not None:
+            with _years_lock:
+                eclipses = _years.setdefault(year, eclipses)
+    return eclipses
+
+
+def eclipses_for_year(year: int) -> list:
+    """Eclipses del año: memoria → índice en disco → cálculo (y se guarda)."""
+    if year not in _years:
+        with _years_lock:
+            if year not in _years:
+                eclipses = _read_index(year)
+                if eclipses is None:
+                    eclipses = compute_year(year)
+                    _write_index(year, eclipses)
+                _years[year] = eclipses
+    return _years[year]
+
+
+def eclipses_between(jd_start: float, jd_end: float) -> list:
+    """Eclipses con máximo en [jd_start, jd_end)."""
+    first = swe.revjul(jd_start)[0]
+    last = swe.revjul(jd_end)[0]
+    return [
+        e for year in range(first, last + 1) for e in eclipses_for_year(year)
+        if jd_start <= e["jd_ut"] < jd_end
+    ]
@@ -0,0 +1,152 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""
+Motor de ejecución para Swiss Ephemeris.
+
+Swiss guarda en estado global la ruta de efemérides y la posición del
+observador (`set_topo`). Según cómo se compile, ese estado es por hilo (TLS,
+como en las wheels de pyswisseph: un hilo que no llamó a `set_ephe_path` cae
+en silencio a Moshier o falla con asteroides) o compartido por el proceso
+(dos peticiones concurrentes se pisan el observador). Este módulo:
+
+- fija la ruta de efemérides en cada hilo que calcula (`ensure_ephe_path`),
+- serializa las secuencias `set_topo` + `calc_ut` (`topocentric`),
+- evita tocar el observador en los cálculos geocéntricos,
+- y opcionalmente despacha los cálculos a un pool de procesos, cada uno con su
+  propio estado Swiss, para paralelismo real entre núcleos.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+
+import swisseph as swe
+
+# Protege el observador de Swiss en builds sin estado por hilo
+_swiss_lock = threading.RLock()
+# Ruta ya fijada en cada hilo
+_thread_state = threading.local()
+# Ruta por defecto del proceso (la primera que se configure)
+_default_ephe_path = None
+
+
+def ensure_ephe_path(ephe_path: str = None):
+    """
+    Fija la ruta de efemérides en el hilo actual solo si cambia
+    (set_ephe_path reabre ficheros). Sin argumento usa la ruta por defecto.
+    """
+    global _default_ephe_path
+    if ephe_path is None:
+        ephe_path = _default_ephe_path
+        if ephe_path is None:
+            return
+    elif _default_ephe_path is None:
+        _default_ephe_path = ephe_path
+    if getattr(_thread_state, "ephe_path", None) == ephe_path:
+        return
+    with _swiss_lock:
+        swe.set_ephe_path(ephe_path)
+    _thread_state.ephe_path = ephe_path
+
+
+def configure_ephe_path(ephe_path: str):
+    """Fija la ruta por defecto del proceso (p. ej. settings.SE_EPHE_PATH)."""
+    global _default_ephe_path
+    _default_ephe_path = ephe_path
+    ensure_ephe_path(ephe_path)
+
+
+@contextmanager
+def topocentric(lon: float, lat: float, alt: float = 0.0):
+    """
+    Fija el observador y mantiene el lock mientras dure el bloque.
+    Todo `calc_ut` con FLG_TOPOCTR debe hacerse dentro de este contexto.
+    """
+    with _swiss_lock:
+        swe.set_topo(lon, lat, alt)
+        yield
+
+
+def _init_worker(ephe_path):
+    if ephe_path:
+        configure_ephe_path(ephe_path)
+
+
+class EphemerisEngine:
+    """
+    Ejecuta funciones de cálculo en línea o en un pool de procesos.
+
+    Con `workers=0` la función se ejecuta en el hilo que llama (el lock de
+    `topocentric` basta para aislar peticiones). Con `workers>0` cada proceso
+    del pool tiene su propio estado Swiss, así que los cálculos de distintas
+    peticiones corren en paralelo de verdad. Las funciones enviadas deben ser
+    de nivel de módulo y no depender de Django (se ejecutan en otro proceso).
+    """
+
+    def __init__(self, workers: int = 0, ephe_path: str = None):
+        self.workers = workers
+        self.ephe_path = ephe_path
+        self._pool = None
+        if workers > 0:
+            # spawn: no heredar hilos ni locks del proceso de gunicorn
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(ephe_path,),
+            )
+        elif ephe_path:
+            configure_ephe_path(ephe_path)
+
+    @property
+    def parallel(self) -> bool:
+        return self._pool is not None
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Devuelve un Future con el resultado de `fn(*args, **kwargs)`."""
+        if self._pool is not None:
+            return self._pool.submit(fn, *args, **kwargs)
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """Ejecuta `fn` y espera el resultado (propaga sus excepciones)."""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def map(self, fn, *iterables) -> list:
+        """Aplica `fn` a cada elemento repartiendo entre los procesos del pool."""
+        futures = [self.submit(fn, *args) for args in zip(*iterables)]
+        return [f.result() for f in futures]
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> EphemerisEngine:
+    """Motor compartido del proceso, configurado con EPHEMERIS_WORKERS."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from django.conf import settings
+                _engine = EphemerisEngine(
+                    workers=getattr(settings, "EPHEMERIS_WORKERS", 0),
+                    ephe_path=settings.SE_EPHE_PATH,
+                )
+    return _engine
@@ -0,0 +1,189 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""
+Efemérides de rangos largos en streaming (GET /api/ephemeris/).
+
+Una cadena de generadores produce la respuesta por bloques de CHUNK_ROWS
+instantes, así que la memoria no crece con el rango:
+
+    instant_chunks  → arrays de JD (y marcas de tiempo) de cada bloque
+    position_chunks → lookup_many (tabla de Chebyshev vectorizada, o Swiss)
+    ndjson_lines / csv_lines → bytes del bloque
+
+Los instantes son UTC: el JD del inicio sale de `swe.utc_to_jd` y el resto se
+suma en pasos fijos (un segundo intercalar dentro del rango desplaza < 1 s).
+Las filas por segundo de cada stream quedan en `stream_stats` y se ven en
+/api/cache/stats/.
+"""
+
+import csv
+import io
+import logging
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from .ephemeris_table import get_table, lookup_many
+from .services import PLANETS
+from .timezones import utc_to_jd_ut
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 2000
+MAX_ROWS = 2_000_000  # ~228 años a paso horario
+STEP_UNITS = {"m": 60, "h": 3600, "d": 86400}
+DEFAULT_BODIES = ["sun", "moon", "mercury", "venus", "mars", "jupiter", "saturn", "uranus", "neptune", "pluto"]
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+class EphemerisRange:
+    """Parámetros validados de una consulta de rango."""
+
+    def __init__(self, start: datetime, end: datetime, step_seconds: int, bodies: list, fmt: str = "ndjson"):
+        self.start = start
+        self.end = end
+        self.step_seconds = step_seconds
+        self.bodies = bodies
+        self.fmt = fmt
+
+    @property
+    def rows(self) -> int:
+        return int((self.end - self.start).total_seconds() // self.step_seconds) + 1
+
+    @classmethod
+    def from_query(cls, query) -> "EphemerisRange":
+        """Desde los parámetros GET (ValueError si alguno no es válido)."""
+        try:
+            start = datetime.fromisoformat(query["start"])
+            end = datetime.fromisoformat(query["end"])
+        except KeyError as e:
+            raise ValueError(f"Missing '{e.args[0]}' parameter.")
+        if start.tzinfo is not None or end.tzinfo is not None:
+            raise ValueError("start and end are UTC: omit the offset.")
+        if end < start:
+            raise ValueError("end must not be before start.")
+
+        step = query.get("step", "1d")
+        unit = step[-1:]
+        if unit not in STEP_UNITS or not step[:-1].isdigit() or int(step[:-1]) == 0:
+            raise ValueError("step must look like 30m, 1h or 1d.")
+        step_seconds = int(step[:-1]) * STEP_UNITS[unit]
+
+        bodies = query.get("bodies")
+        bodies = bodies.split(",") if bodies else list(DEFAULT_BODIES)
+        unknown = [name for name in bodies if name not in PLANETS]
+        if unknown:
+            raise ValueError(f"Unknown bodies: {', '.join(unknown)}. Use: {', '.join(PLANETS)}")
+
+        fmt = query.get("format", "ndjson")
+        if fmt not in STREAM_FORMATS:
+            raise ValueError("format must be ndjson or csv.")
+
+        selection = cls(start, end, step_seconds, list(dict.fromkeys(bodies)), fmt)
+        if selection.rows > MAX_ROWS:
+            raise ValueError(f"Range too large: {selection.rows} rows (max {MAX_ROWS}).")
+        return selection
+
+
+def instant_chunks(selection: EphemerisRange, chunk_rows: int = CHUNK_ROWS):
+    """(marcas ISO, JDs) de cada bloque de instantes."""
+    jd_start = utc_to_jd_ut(selection.start)
+    start = np.datetime64(selection.start, "s")
+    step = np.timedelta64(selection.step_seconds, "s")
+    step_days = selection.step_seconds / 86400
+    total = selection.rows
+    for first in range(0, total, chunk_rows):
+        k = np.arange(first, min(first + chunk_rows, total))
+        stamps = np.datetime_as_string(start + k * step, unit="s")
+        yield stamps.tolist(), jd_start + k * step_days
+
+
+def position_chunks(chunks, bodies: list):
+    """
+    (marcas, {cuerpo: (lons, speeds)}) por bloque. Los cuerpos de la tabla
+    precalculada van juntos en una consulta vectorizada; el resto, por Swiss.
+    """
+    table = get_table()
+    in_table = [name for name in bodies if table is not None and name in table.body_index]
+    rest = [name for name in bodies if name not in in_table]
+    for stamps, jds in chunks:
+        positions = {}
+        for group in (in_table, rest):
+            if group:
+                positions.update(lookup_many(jds, {name: PLANETS[name] for name in group}))
+        yield stamps, positions
+
+
+def ndjson_lines(chunks, bodies: list):
+    """Una línea JSON por instante: {"t": "…", "sun": [lon, speed], …}."""
+    row = "{{" + ",".join(['"t":"{}"'] + [f'"{name}":[{{:.6f}},{{:.6f}}]' for name in bodies]) + "}}\n"
+    for stamps, positions in chunks:
+        columns = [stamps]
+        for name in bodies:
+            lons, speeds = positions[name]
+            columns += [lons.tolist(), speeds.tolist()]
+        yield "".join(row.format(*values) for values in zip(*columns)).encode()
+
+
+def csv_lines(chunks, bodies: list):
+    """CSV con cabecera: t, <cuerpo>_lon, <cuerpo>_speed, …"""
+    header = io.StringIO()
+    csv.writer(header).writerow(["t"] + [f"{name}_{field}" for name in bodies for field in ("lon", "speed")])
+    yield header.getvalue().encode()
+    row = ",".join(["{}"] + ["{:.6f},{:.6f}"] * len(bodies)) + "\r\n"
+    for stamps, positions in chunks:
+        columns = [stamps]
+        for name in bodies:
+            lons, speeds = positions[name]
+            columns += [lons.tolist(), speeds.tolist()]
+        yield "".join(row.format(*values) for values in zip(*columns)).encode()
+
+
+class StreamStats:
+    """Filas, tiempo y filas por segundo de los streams completados del proceso."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.streams = 0
+        self.rows = 0
+        self.seconds = 0.0
+        self.last_rows_per_second = 0.0
+
+    def record(self, rows: int, seconds: float):
+        with self._lock:
+            self.streams += 1
+            self.rows += rows
+            self.seconds += seconds
+            self.last_rows_per_second = rows / seconds if seconds else 0.0
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "streams": self.streams,
+                "rows": self.rows,
+                "seconds": round(self.seconds, 3),
+                "rows_per_second": round(self.rows / self.seconds) if self.seconds else 0,
+                "last_rows_per_second": round(self.last_rows_per_second),
+            }
+
+
+stream_stats = StreamStats()
+
+
+def stream_ephemeris(selection: EphemerisRange, chunk_rows: int = CHUNK_ROWS):
+    """Bytes de la respuesta completa, bloque a bloque; al acabar anota el throughput."""
+    started = time.perf_counter()
+    positions = position_chunks(instant_chunks(selection, chunk_rows), selection.bodies)
+    lines = ndjson_lines if selection.fmt == "ndjson" else csv_lines
+    yield from lines(positions, selection.bodies)
+    seconds = time.perf_counter() - started
+    stream_stats.record(selection.rows, seconds)
+    logger.info("ephemeris stream: %d rows in %.3fs (%.0f rows/s)",
+                selection.rows, seconds, selection.rows / seconds if seconds else 0.0)
@@ -0,0 +1,148 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""
+Búsqueda de instantes exactos de aspectos.
+
+En lugar de muestrear día a día y quedarse con "el día en que aparece" el
+aspecto, se muestrea la elongación entre dos cuerpos con paso grueso, se
+detectan los cambios de signo de f(t) = elongación − ángulo del aspecto y se
+refina cada raíz con Newton (la derivada es la diferencia de velocidades que ya
+devuelve Swiss), con bisección como red de seguridad. El resultado es el
+instante UTC del aspecto exacto con precisión de ~1 segundo.
+
+El cuerpo `fast` debe moverse siempre en el mismo sentido respecto a los demás
+(la Luna lo hace), y el paso debe mantener el cambio de elongación por debajo de
+180°: la Luna avanza como mucho ~16°/día respecto a cualquier planeta.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import swisseph as swe
+
+from .ephemeris_table import lookup, lookup_many
+
+# Aspectos mayores (separación 0–180°)
+MAJOR_ASPECTS = [
+    ("Conjunción", 0),
+    ("Sextil", 60),
+    ("Cuadratura", 90),
+    ("Trígono", 120),
+    ("Oposición", 180),
+]
+
+STEP_DAYS = 2.0
+TOLERANCE_DAYS = 1.0 / 86400  # 1 segundo
+MAX_ITERATIONS = 20
+
+_JD_UNIX_EPOCH = 2440587.5
+
+
+def _wrap180(x):
+    return (x + 180.0) % 360.0 - 180.0
+
+
+def jd_to_datetime(jd_ut: float) -> datetime:
+    """Julian Day UT → datetime UTC ingenuo (redondeado al segundo)."""
+    seconds = round((jd_ut - _JD_UNIX_EPOCH) * 86400)
+    return datetime(1970, 1, 1) + timedelta(seconds=seconds)
+
+
+def _elongation(jd, fast, slow, bodies):
+    pos = lookup(jd, {fast: bodies[fast], slow: bodies[slow]})
+    (lon_f, speed_f), (lon_s, speed_s) = pos[fast], pos[slow]
+    return (lon_f - lon_s) % 360.0, speed_f - speed_s
+
+
+def _refine(jd0, jd1, f0, f1, target, fast, slow, bodies, stats):
+    """Raíz de wrap180(elongación − target) en [jd0, jd1] (f0 y f1 de signo opuesto)."""
+    # Primera estimación por interpolación lineal (regula falsi)
+    jd = jd0 + (jd1 - jd0) * (-f0) / (f1 - f0)
+    for _ in range(MAX_ITERATIONS):
+        elong, rel_speed = _elongation(jd, fast, slow, bodies)
+        stats["evaluations"] += 1
+        f = _wrap180(elong - target)
+        # Mantener el intervalo que contiene la raíz
+        if (f < 0) == (f0 < 0):
+            jd0, f0 = jd, f
+        else:
+            jd1, f1 = jd, f
+        step = f / rel_speed if rel_speed else 0.0
+        new_jd = jd - step
+        if not (jd0 <= new_jd <= jd1):
+            new_jd = (jd0 + jd1) / 2  # Newton se sale: bisección
+        if abs(new_jd - jd) < TOLERANCE_DAYS:
+            return new_jd, elong
+        jd = new_jd
+    return jd, elong
+
+
+def find_aspect_events(fast: str, others: list, jd_start: float, jd_end: float,
+                       bodies: dict, aspects: list = None, step: float = STEP_DAYS,
+                       stats: dict = None) -> list:
+    """
+    Instantes exactos en [jd_start, jd_end) en que `fast` forma un aspecto
+    con cada cuerpo de `others`.
+
+    Args:
+        fast: cuerpo rápido (p. ej. "moon")
+        others: nombres de los demás cuerpos
+        bodies: {nombre: id Swiss} con todos los cuerpos implicados
+        aspects: lista de (nombre, ángulo 0–180); por defecto MAJOR_ASPECTS
+        stats: dict opcional donde se acumulan "samples" y "evaluations"
+
+    Returns:
+        lista ordenada por tiempo de dicts {"jd_ut", "datetime_utc", "fast",
+        "other", "aspect", "angle", "elongation"}
+    """
+    aspects = aspects or MAJOR_ASPECTS
+    if stats is None:
+        stats = {}
+    stats.setdefault("samples", 0)
+    stats.setdefault("evaluations", 0)
+
+    jds = np.arange(jd_start, jd_end + step, step)
+    jds[-1] = min(jds[-1], jd_end)
+    names = [fast] + list(others)
+    pos = lookup_many(jds, {name: bodies[name] for name in names})
+    stats["samples"] += len(jds) * len(names)
+
+    events = []
+    fast_lons = pos[fast][0]
+    for other in others:
+        elong = (fast_lons - pos[other][0]) % 360.0
+        for aspect_name, angle in aspects:
+            # Un aspecto de 60° ocurre a elongación 60° y 300° (creciente/menguante)
+            for target in sorted({angle, (360 - angle) % 360}):
+                f = _wrap180(elong - target)
+                f0, f1 = f[:-1], f[1:]
+                crossing = (((f0 < 0) & (f1 >= 0)) | ((f0 > 0) & (f1 <= 0))) & (np.abs(f1 - f0) < 180.0)
+                for i in np.nonzero(crossing)[0]:
+                    jd, exact = _refine(jds[i], jds[i + 1], f0[i], f1[i], target, fast, other, bodies, stats)
+                    if not (jd_start <= jd < jd_end):
+                        continue
+                    separation = exact if exact <= 180.0 else 360.0 - exact
+                    events.append({
+                        "jd_ut": jd,
+                        "datetime_utc": jd_to_datetime(jd),
+                        "fast": fast,
+                        "other": other,
+                        "aspect": aspect_name,
+                        "angle": separation,
+                        "elongation": exact,
+                    })
+
+    events.sort(key=lambda e: e["jd_ut"])
+    return events
+
+
+def month_jd_range(month: int, year: int):
+    """[inicio, fin) del mes en Julian Day UT (00:00 UT)."""
+    jd_start = swe.julday(year, month, 1, 0.0)
+    jd_end = swe.julday(year + (month == 12), month % 12 + 1, 1, 0.0)
+    return jd_start, jd_end
@@ -0,0 +1,197 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""
+Formatos de respuesta para clientes con poco ancho de banda (móviles).
+
+/api/compute/, /api/transits/ y /api/horoscope/daily/ negocian el formato:
+
+- `?format=json` (por defecto): la respuesta de siempre.
+- `?format=compact`: JSON con claves cortas (ResponseCompression), sin las
+  cadenas "formatted" ni alias, y números redondeados.
+- `?format=packed` o `Accept: application/vnd.astroapi.packed`: binario con
+  floats de 32 bits, todo little-endian:
+
+      cabecera  <4sBB     b"ASTP", versión (1), tipo (1 carta, 2 tránsitos, 3 horóscopo)
+      cuerpos   <H n      + n × <BBff   id de cuerpo, flags (bit 0: retrógrado), longitud, velocidad
+      puntos    <H m      + m × <f      carta: asc, mc y cúspides 1–12; vacío en el resto
+      aspectos  <H k      + k × <BBBBf  id cuerpo a, id cuerpo b, id de aspecto, peso, orbe
+      resto     <I len    + JSON compacto en UTF-8 con los campos no numéricos
+
+  Los ids son índices en BODY_NAMES y ASPECT_NAMES (GET /api/formats/ los
+  publica). float32 da ~2e-5° en longitudes, de sobra para dibujar.
+  `unpack` es el decodificador de referencia.
+"""
+
+import json
+import struct
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .cache_manager import ResponseCompression
+from .horoscope_service import ASPECTS_CONFIG
+from .prerendered import render_bytes
+from .services import ASPECTS, PLANETS
+
+FORMATS = ("json", "compact", "packed")
+PACKED_CONTENT_TYPE = "application/vnd.astroapi.packed"
+CONTENT_TYPES = {"json": "application/json", "compact": "application/json", "packed": PACKED_CONTENT_TYPE}
+
+PACKED_MAGIC = b"ASTP"
+PACKED_VERSION = 1
+KINDS = {"chart": 1, "transits": 2, "horoscope": 3}
+BODY_NAMES = tuple(PLANETS)
+ASPECT_NAMES = tuple(a["name"] for a in ASPECTS) + tuple(a["name"] for a in ASPECTS_CONFIG)
+
+_HEADER = struct.Struct("<4sBB")
+_COUNT = struct.Struct("<H")
+_BODY = struct.Struct("<BBff")
+_POINT = struct.Struct("<f")
+_ASPECT = struct.Struct("<BBBBf")
+_TAIL = struct.Struct("<I")
+
+
+def negotiate(request):
+    """Formato pedido ("json", "compact", "packed") o None si no es válido."""
+    fmt = request.GET.get("format")
+    if fmt:
+        return fmt if fmt in FORMATS else None
+    if PACKED_CONTENT_TYPE in request.META.get("HTTP_ACCEPT", ""):
+        return "packed"
+    return "json"
+
+
+def format_etag(etag: str, fmt: str) -> str:
+    """Cada formato es una representación distinta: su ETag fuerte también."""
+    return etag if fmt == "json" else f'{etag[:-1]}-{fmt}"'
+
+
+def compact_chart(result: dict) -> dict:
+    out = {"jd": result.get("jd_ut")}
+    if "planets" in result:
+        out["p"] = ResponseCompression.compress_planets(result["planets"])
+    if "houses" in result:
+        out["h"] = ResponseCompression.compress_houses(result["houses"])
+    if "aspects" in result:
+        out["a"] = ResponseCompression.compress_chart_aspects(result["aspects"])
+    return out
+
+
+def compact_transits(result: dict) -> dict:
+    return {
+        "d": result["date"],
+        "tz": result["timezone"],
+        "t": ResponseCompression.compress_transits(result["transits"]),
+    }
+
+
+def compact_horoscope(result: dict) -> dict:
+    out = {
+        "d": result["date"],
+        "t": ResponseCompression.compress_transits(result["transits"]),
+        "a": ResponseCompression.compress_aspects(result["top_aspects"]),
+        "ha": [[h["house"], h["weight"], h["planets"]] for h in result["houses_activated"]],
+        "asc": result["natal_ascendant"],
+        "i": result["interpretation"],
+    }
+    if "_from_cache" in result:
+        out["c"] = result["_from_cache"]
+    return out
+
+
+COMPACT = {"chart": compact_chart, "transits": compact_transits, "horoscope": compact_horoscope}
+
+
+def pack(kind: str, result: dict) -> bytes:
+    """Binario empaquetado (ver la cabecera del módulo)."""
+    if kind == "chart":
+        bodies = [(name, p["value"], p["speed"], p["retrograde"]) for name, p in result.get("planets", {}).items()]
+        houses = result.get("houses")
+        points = [houses["asc"]["value"], houses["mc"]["value"]] + [c["value"] for c in houses["cusps"]] if houses else []
+        aspects = [(a["planet_a"], a["planet_b"], a["aspect"], 0, a["orb"]) for a in result.get("aspects", [])]
+        rest = {"jd": result.get("jd_ut")}
+    else:
+        bodies = [(name, t["longitude"], t["speed"], t["speed"] < 0) for name, t in result["transits"].items()]
+        points = []
+        aspects = [(a["transit_planet"], a["natal_planet"], a["aspect"], min(a["weight"], 255), a["orb"])
+                   for a in result.get("top_aspects", [])]
+        rest = {k: v for k, v in COMPACT[kind](result).items() if k not in ("t", "a")}
+
+    parts = [_HEADER.pack(PACKED_MAGIC, PACKED_VERSION, KINDS[kind]), _COUNT.pack(len(bodies))]
+    parts += [_BODY.pack(BODY_NAMES.index(name), int(bool(retro)), lon, speed) for name, lon, speed, retro in bodies]
+    parts.append(_COUNT.pack(len(points)))
+    parts += [_POINT.pack(value) for value in points]
+    parts.append(_COUNT.pack(len(aspects)))
+    parts += [_ASPECT.pack(BODY_NAMES.index(a), BODY_NAMES.index(b), ASPECT_NAMES.index(name), weight, orb)
+              for a, b, name, weight, orb in aspects]
+    tail = json.dumps(rest, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    parts += [_TAIL.pack(len(tail)), tail]
+    return b"".join(parts)
+
+
+def unpack(data: bytes) -> dict:
+    """Decodificador de referencia del binario empaquetado."""
+    magic, version, kind = _HEADER.unpack_from(data, 0)
+    if magic != PACKED_MAGIC or version != PACKED_VERSION:
+        raise ValueError("Not an astroapi packed payload (or unsupported version).")
+    offset = _HEADER.size
+
+    def block(record):
+        nonlocal offset
+        (count,) = _COUNT.unpack_from(data, offset)
+        offset += _COUNT.size
+        rows = [record.unpack_from(data, offset + i * record.size) for i in range(count)]
+        offset += count * record.size
+        return rows
+
+    bodies = {BODY_NAMES[i]: {"longitude": lon, "speed": speed, "retrograde": bool(flags & 1)}
+              for i, flags, lon, speed in block(_BODY)}
+    points = [value for (value,) in block(_POINT)]
+    aspects = [{"a": BODY_NAMES[a], "b": BODY_NAMES[b], "aspect": ASPECT_NAMES[x], "weight": w, "orb": orb}
+               for a, b, x, w, orb in block(_ASPECT)]
+    (length,) = _TAIL.unpack_from(data, offset)
+    offset += _TAIL.size
+    rest = json.loads(data[offset:offset + length].decode("utf-8"))
+    kind_name = {v: k for k, v in KINDS.items()}[kind]
+    return {"kind": kind_name, "bodies": bodies, "points": points, "aspects": aspects, **rest}
+
+
+def encode(kind: str, result: dict, fmt: str) -> bytes:
+    """Cuerpo de la respuesta en `fmt`."""
+    if fmt == "packed":
+        return pack(kind, result)
+    if fmt == "compact":
+        return json.dumps(COMPACT[kind](result), cls=DjangoJSONEncoder, ensure_ascii=False,
+                          separators=(",", ":")).encode("utf-8")
+    return json.dumps(result, cls=DjangoJSONEncoder, ensure_ascii=False).encode("utf-8")
+
+
+def render(kind: str, result: dict, fmt: str) -> tuple:
+    """Entrada para response_cache (ver prerendered.render_bytes)."""
+    return render_bytes(encode(kind, result, fmt))
+
+
+def format_response(kind: str, result: dict, fmt: str, status: int = 200) -> HttpResponse:
+    resp = HttpResponse(encode(kind, result, fmt), content_type=CONTENT_TYPES[fmt], status=status)
+    patch_vary_headers(resp, ("Accept",))
+    return resp
+
+
+def formats_info() -> dict:
+    """Tablas de ids del binario empaquetado."""
+    return {
+        "formats": list(FORMATS),
+        "packed": {
+            "content_type": PACKED_CONTENT_TYPE,
+            "version": PACKED_VERSION,
+            "kinds": KINDS,
+            "bodies": list(BODY_NAMES),
+            "aspects": list(ASPECT_NAMES),
+        },
+    }
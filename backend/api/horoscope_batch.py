@@ -0,0 +1,182 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""
+Horóscopos diarios de muchas cartas para una misma fecha y zona
+(POST /api/horoscope/batch/).
+
+Los tránsitos se calculan una vez para todo el lote. Por cada bloque de
+CHUNK_CHARTS cartas (agrupadas por la lista de planetas natales):
+
+- una sola matriz de separaciones tránsitos × (cartas · planetas) contra
+  TRANSIT_ASPECTS; el orden (carta, -peso, posición) da los 5 aspectos
+  principales de cada carta sin ordenar en Python
+- la casa natal de cada tránsito para todas las cartas a la vez
+
+Solo los 5 aspectos y las 3 casas de cada carta vuelven a Python. El
+resultado es idéntico al de generate_daily_horoscope_personal (sin
+`_from_cache`: el lote no lee ni escribe la caché de horóscopos). El JSON de
+los tránsitos se serializa una vez y se intercala en cada línea.
+"""
+
+import json
+from datetime import datetime
+
+import numpy as np
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .aspect_engine import separation_matrix
+from .horoscope_service import (
+    FAST_PLANETS, TRANSIT_ASPECTS, calculate_transits, generate_interpretation,
+)
+
+CHUNK_CHARTS = 500
+MAX_BATCH_HOROSCOPES = 10000
+HARMONIC_ASPECTS = ("Trígono", "Sextil")
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def natal_arrays(birth_data: dict):
+    """(nombres, longitudes, cúspides, ascendente) de una carta de /api/compute/; ValueError si no vale."""
+    try:
+        planets = birth_data["planets"]
+        names = tuple(planets)
+        lons = [float(planets[name]["value"]) for name in names]
+        cusps = [float(cusp["value"]) for cusp in birth_data["houses"]["cusps"]]
+        ascendant = birth_data["houses"]["ascendente"]["formatted"]
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("birth_data must be a chart from /api/compute/ (planets and houses).")
+    if len(cusps) != 12:
+        raise ValueError("birth_data must have 12 house cusps.")
+    return names, lons, cusps, ascendant
+
+
+def house_numbers(lons, cusps) -> np.ndarray:
+    """
+    Casa (1–12) de cada longitud para cada carta: (cartas × longitudes).
+    Misma regla que horoscope_service.find_house_for_planet, vectorizada.
+    """
+    cusps = np.asarray(cusps, dtype=float)[:, None, :]    # (U, 1, 12)
+    following = np.roll(cusps, -1, axis=2)
+    lons = np.asarray(lons, dtype=float)[None, :, None]    # (1, T, 1)
+    inside = np.where(following < cusps,
+                      (lons >= cusps) | (lons < following),
+                      (cusps <= lons) & (lons < following))
+    return np.where(inside.any(axis=2), inside.argmax(axis=2) + 1, 1)
+
+
+class TransitSet:
+    """Los tránsitos del día compilados una vez para todo el lote."""
+
+    def __init__(self, transits: dict):
+        self.transits = transits
+        self.names = list(transits)
+        self.lons = [transits[name]["longitude"] for name in self.names]
+        self.classes = [0 if name in FAST_PLANETS else 1 for name in self.names]
+        self.applying = [transits[name]["speed"] > 0 for name in self.names]
+        self.is_fast = [name in FAST_PLANETS for name in self.names]
+        # Peso de find_aspects_to_natal: base por tránsito + extra por aspecto
+        self.base_weight = np.array([(10 if fast else 5) + (3 if applying else 0)
+                                     for fast, applying in zip(self.is_fast, self.applying)])
+        self.aspect_weight = np.array([2 if name in HARMONIC_ASPECTS else 0 for name in TRANSIT_ASPECTS.names])
+        self.json = _dumps(transits)
+
+
+def top_aspects_group(transit_set: TransitSet, natal_names: tuple, natal_lons, top: int = 5) -> list:
+    """Los `top` aspectos principales de cada carta de un grupo con los mismos planetas natales."""
+    count, n = len(natal_lons), len(natal_names)
+    if not transit_set.names or not n:
+        return [[] for _ in range(count)]
+    distances = separation_matrix(transit_set.lons, np.ravel(natal_lons), normalize=False)
+    rows, cols, idx, orbs = TRANSIT_ASPECTS.match(distances, transit_set.classes)
+    chart = cols // n
+    weight = transit_set.base_weight[rows] + transit_set.aspect_weight[idx]
+    # find_aspects_to_natal ordena de forma estable por peso: (carta, -peso, posición)
+    order = np.lexsort((np.arange(len(rows)), -weight, chart))
+    chart = chart[order]
+    first = np.searchsorted(chart, np.arange(count))
+    last = np.minimum(np.searchsorted(chart, np.arange(count), side="right"), first + top)
+
+    rows, cols, idx, orbs, weight = (a[order].tolist() for a in (rows, cols, idx, orbs, weight))
+    out = []
+    for u in range(count):
+        aspects = []
+        for k in range(first[u], last[u]):
+            i, c = rows[k], cols[k]
+            aspects.append({
+                "transit_planet": transit_set.names[i],
+                "natal_planet": natal_names[c % n],
+                "aspect": TRANSIT_ASPECTS.names[idx[k]],
+                "angle": distances[i, c].item(),
+                "orb": orbs[k],
+                "applying": transit_set.applying[i],
+                "weight": weight[k],
+            })
+        out.append(aspects)
+    return out
+
+
+def houses_activated(transit_names: list, houses: list) -> list:
+    """Las 3 casas más activadas (como generate_daily_horoscope_personal) desde la casa de cada tránsito."""
+    activated = {}
+    for name, house in zip(transit_names, houses):
+        activated.setdefault(house, []).append({"planet": name, "is_fast": name in FAST_PLANETS})
+    priority = [{"house": house, "weight": sum(5 if p["is_fast"] else 2 for p in planets), "planets": planets}
+                for house, planets in activated.items()]
+    return sorted(priority, key=lambda x: x["weight"], reverse=True)[:3]
+
+
+def horoscope_json(date_str: str, transit_set: TransitSet, aspects: list, houses: list, ascendant: str) -> str:
+    """JSON del horóscopo con las mismas claves y orden que el endpoint diario."""
+    rest = _dumps({
+        "top_aspects": aspects,
+        "houses_activated": houses,
+        "natal_ascendant": ascendant,
+        "interpretation": generate_interpretation(aspects, houses),
+    })
+    return f'{{"date": {_dumps(date_str)}, "transits": {transit_set.json}, {rest[1:]}'
+
+
+def chunk_lines(date_str: str, transit_set: TransitSet, items: list) -> bytes:
+    """
+    Líneas NDJSON de un bloque. `items` son (cabecera, carta) donde la
+    cabecera es el dict de identificación de la línea y la carta es la salida
+    de /api/compute/ o un mensaje de error (str).
+    """
+    lines = [None] * len(items)
+    groups = {}
+    for k, (head, chart) in enumerate(items):
+        if isinstance(chart, str):
+            lines[k] = _dumps(dict(head, error=chart))
+            continue
+        try:
+            names, lons, cusps, ascendant = natal_arrays(chart)
+        except ValueError as e:
+            lines[k] = _dumps(dict(head, error=str(e)))
+            continue
+        groups.setdefault(names, []).append((k, lons, cusps, ascendant))
+
+    for names, members in groups.items():
+        aspects = top_aspects_group(transit_set, names, [m[1] for m in members])
+        houses = house_numbers(transit_set.lons, [m[2] for m in members]).tolist()
+        for (k, _, _, ascendant), top, chart_houses in zip(members, aspects, houses):
+            priority = houses_activated(transit_set.names, chart_houses)
+            body = horoscope_json(date_str, transit_set, top, priority, ascendant)
+            lines[k] = f'{_dumps(items[k][0])[:-1]}, "horoscope": {body}}}'
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def stream_horoscopes(items: list, target_date: datetime, timezone: str = "UTC", chunk_charts: int = CHUNK_CHARTS,
+                      transits: dict = None):
+    """Bytes NDJSON, una línea por carta en el orden de `items`, bloque a bloque."""
+    transit_set = TransitSet(transits if transits is not None else calculate_transits(target_date, timezone))
+    date_str = target_date.strftime("%Y-%m-%d")
+    for first in range(0, len(items), chunk_charts):
+        yield chunk_lines(date_str, transit_set, items[first:first + chunk_charts])
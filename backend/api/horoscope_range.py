@@ -0,0 +1,166 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""
+Horóscopos de varios días seguidos para una carta (GET/POST /api/horoscope/range/).
+
+La carta natal se compila una vez (horoscope_batch.natal_arrays). Las horas
+UTC que rodean las 00:00 locales de cada día salen de una sola llamada a
+lookup_many, y cada día se interpola con las mismas reglas que
+calculate_transits. Después, una sola matriz de separaciones
+(días · tránsitos) × planetas natales da los aspectos de todos los días, y
+house_numbers da las casas.
+
+Cada día es idéntico a /api/horoscope/daily/ (sin `_from_cache`). Además,
+`changes` resume lo que cambia de un día al siguiente: cambios de signo y de
+casa, estaciones, fase lunar y aspectos que entran o salen de orbe.
+"""
+
+import hashlib
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from .aspect_engine import separation_matrix
+from .ephemeris_engine import get_engine
+from .ephemeris_table import lookup_many
+from .horoscope_batch import HARMONIC_ASPECTS, house_numbers, houses_activated, natal_arrays
+from .horoscope_service import (
+    FAST_PLANETS, HOROSCOPE_ALGORITHM_VERSION, TRANSIT_ASPECTS, TRANSIT_PLANETS, generate_interpretation,
+    interpolated_positions, snapshot_hour, to_utc, transits_from_positions,
+)
+from .timezones import utc_to_jd_ut
+
+MAX_RANGE_DAYS = 31
+
+
+def range_etag(chart_id: str, start_str: str, days: int, timezone: str) -> str:
+    """ETag fuerte del rango de horóscopos de una carta registrada."""
+    data = f"horoscope-range:{chart_id}:{start_str}:{days}:{timezone}:{HOROSCOPE_ALGORITHM_VERSION}"
+    return f'"{hashlib.sha256(data.encode()).hexdigest()[:32]}"'
+
+
+def day_transits(start: datetime, days: int, timezone: str = "UTC") -> list:
+    """
+    Tránsitos de cada día a las 00:00 locales. Las instantáneas horarias que
+    hacen falta se piden juntas a lookup_many (tabla vectorizada o Swiss) y se
+    interpolan como en calculate_transits.
+    """
+    instants = [to_utc(start + timedelta(days=d), timezone) for d in range(days)]
+    hours = set()
+    for dt in instants:
+        hour, frac = snapshot_hour(dt)
+        hours.add(hour)
+        if frac:
+            hours.add(hour + timedelta(hours=1))
+    hours = sorted(hours)
+    positions = get_engine().run(lookup_many, [utc_to_jd_ut(h) for h in hours], TRANSIT_PLANETS)
+    snapshots = {h: {name: (float(lons[k]), float(speeds[k])) for name, (lons, speeds) in positions.items()}
+                 for k, h in enumerate(hours)}
+    return [transits_from_positions(interpolated_positions(dt, snapshots.get)) for dt in instants]
+
+
+def aspects_by_day(daily: list, natal_names: tuple, natal_lons: list) -> list:
+    """Todos los aspectos tránsito-natal de cada día, en el orden de find_aspects_to_natal."""
+    if not daily or not natal_names:
+        return [[] for _ in daily]
+    transit_names = list(daily[0])
+    count = len(transit_names)
+    lons = [transits[name]["longitude"] for transits in daily for name in transit_names]
+    applying = [transits[name]["speed"] > 0 for transits in daily for name in transit_names]
+    fast = np.array([name in FAST_PLANETS for name in transit_names] * len(daily))
+    distances = separation_matrix(lons, natal_lons, normalize=False)
+    rows, cols, idx, orbs = TRANSIT_ASPECTS.match(distances, np.where(fast, 0, 1))
+
+    harmonic = np.array([name in HARMONIC_ASPECTS for name in TRANSIT_ASPECTS.names])
+    weight = np.where(fast[rows], 10, 5) + 3 * np.array(applying, dtype=bool)[rows] + 2 * harmonic[idx]
+    day = rows // count
+    # find_aspects_to_natal ordena de forma estable por peso: (día, -peso, posición)
+    order = np.lexsort((np.arange(len(rows)), -weight, day))
+
+    out = [[] for _ in daily]
+    for i, j, a, diff, w, d in zip(*(x[order].tolist() for x in (rows, cols, idx, orbs, weight, day))):
+        out[d].append({
+            "transit_planet": transit_names[i % count],
+            "natal_planet": natal_names[j],
+            "aspect": TRANSIT_ASPECTS.names[a],
+            "angle": distances[i, j].item(),
+            "orb": diff,
+            "applying": applying[i],
+            "weight": w,
+        })
+    return out
+
+
+def _aspect_key(aspect: dict) -> tuple:
+    return aspect["transit_planet"], aspect["natal_planet"], aspect["aspect"]
+
+
+def day_changes(date_str: str, before: dict, after: dict) -> dict:
+    """Qué cambia de un día (`before`) al siguiente (`after`)."""
+    sign_changes, house_changes, stations = [], [], []
+    for name, now in after["transits"].items():
+        was = before["transits"][name]
+        if now["sign"] != was["sign"]:
+            sign_changes.append({"planet": name, "from": was["sign"], "to": now["sign"]})
+        if after["houses"][name] != before["houses"][name]:
+            house_changes.append({"planet": name, "from": before["houses"][name], "to": after["houses"][name]})
+        if (now["speed"] < 0) != (was["speed"] < 0):
+            stations.append({"planet": name, "retrograde": now["speed"] < 0})
+
+    phase_before = before["transits"].get("moon", {}).get("phase")
+    phase_after = after["transits"].get("moon", {}).get("phase")
+    keys_before = {_aspect_key(a): a for a in before["aspects"]}
+    keys_after = {_aspect_key(a): a for a in after["aspects"]}
+    key_fields = ("transit_planet", "natal_planet", "aspect")
+    return {
+        "date": date_str,
+        "sign_changes": sign_changes,
+        "house_changes": house_changes,
+        "stations": stations,
+        "moon_phase": {"from": phase_before, "to": phase_after} if phase_before != phase_after else None,
+        "aspects_started": [dict(zip(key_fields, key)) for key in keys_after if key not in keys_before],
+        "aspects_ended": [dict(zip(key_fields, key)) for key in keys_before if key not in keys_after],
+    }
+
+
+def horoscope_range(birth_data: dict, start: datetime, days: int, timezone: str = "UTC") -> dict:
+    """
+    {"start", "days", "timezone", "horoscopes": [...], "changes": [...]}:
+    un horóscopo diario por día y, desde el segundo, lo que cambió respecto al anterior.
+    """
+    natal_names, natal_lons, cusps, ascendant = natal_arrays(birth_data)
+    daily = day_transits(start, days, timezone)
+    aspects = aspects_by_day(daily, natal_names, natal_lons)
+    transit_names = list(daily[0]) if daily else []
+    houses = house_numbers([t[name]["longitude"] for t in daily for name in transit_names], [cusps])
+    houses = houses.reshape(days, len(transit_names)).tolist() if daily else []
+
+    horoscopes, states, changes = [], [], []
+    for d, transits in enumerate(daily):
+        date_str = (start + timedelta(days=d)).strftime("%Y-%m-%d")
+        top = aspects[d][:5]
+        priority = houses_activated(transit_names, houses[d])
+        horoscopes.append({
+            "date": date_str,
+            "transits": transits,
+            "top_aspects": top,
+            "houses_activated": priority,
+            "natal_ascendant": ascendant,
+            "interpretation": generate_interpretation(top, priority),
+        })
+        states.append({"transits": transits, "aspects": aspects[d], "houses": dict(zip(transit_names, houses[d]))})
+        if d:
+            changes.append(day_changes(date_str, states[d - 1], states[d]))
+
+    return {
+        "start": start.strftime("%Y-%m-%d"),
+        "days": days,
+        "timezone": timezone,
+        "horoscopes": horoscopes,
+        "changes": changes,
+    }
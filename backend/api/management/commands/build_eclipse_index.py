@@ -0,0 +1,33 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.eclipses import ECLIPSE_INDEX_DIR, eclipses_for_year
+from api.ephemeris_engine import configure_ephe_path
+
+
+class Command(BaseCommand):
+    help = "Precalcula el índice persistente de eclipses por año."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start-year", type=int, default=1900)
+        parser.add_argument("--end-year", type=int, default=2100, help="Último año incluido.")
+
+    def handle(self, *args, **options):
+        start, end = options["start_year"], options["end_year"]
+        if end < start:
+            raise CommandError("--end-year must be >= --start-year")
+        configure_ephe_path(settings.SE_EPHE_PATH)
+
+        total = 0
+        for year in range(start, end + 1):
+            total += len(eclipses_for_year(year))
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} eclipses de {start} a {end} indexados en {ECLIPSE_INDEX_DIR}"
+        ))
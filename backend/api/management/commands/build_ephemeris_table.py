@@ -0,0 +1,45 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from datetime import datetime
+
+import swisseph as swe
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.ephemeris_table import TABLE_PATH, build_table
+
+
+class Command(BaseCommand):
+    help = "Precalcula la tabla de efemérides de tránsitos (segmentos de Chebyshev) mapeable en memoria."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start-year", type=int, default=1900)
+        parser.add_argument("--end-year", type=int, default=2100, help="Último año incluido.")
+        parser.add_argument("--output", default=TABLE_PATH)
+
+    def handle(self, *args, **options):
+        start, end = options["start_year"], options["end_year"]
+        if end < start:
+            raise CommandError("--end-year must be >= --start-year")
+        jd_start = swe.julday(start, 1, 1, 0.0)
+        jd_end = swe.julday(end + 1, 1, 1, 0.0)
+        t0 = datetime.now()
+
+        def progress(done, total):
+            self.stdout.write(f"  {done}/{total} segmentos")
+
+        header = build_table(options["output"], jd_start, jd_end,
+                             ephe_path=settings.SE_EPHE_PATH, progress=progress)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Tabla escrita en {options['output']} ({header['n_segments']} segmentos, "
+            f"{(datetime.now() - t0).total_seconds():.1f}s)"
+        ))
+        for name, err in header["max_error_deg"].items():
+            self.stdout.write(f"  {name:<10} error máx. {err:.2e}°  "
+                              f"velocidad {header['max_speed_error_deg_per_day'][name]:.2e}°/día")
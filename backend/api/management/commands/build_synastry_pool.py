@@ -0,0 +1,36 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.synastry import SYNASTRY_POOL_PATH, ChartPool
+
+
+class Command(BaseCommand):
+    help = ("Construye la población de /api/synastry/top/ a partir de un fichero JSON Lines "
+            "con una carta por línea: {\"id\", \"planets\" | \"longitudes\"}.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="Fichero .jsonl de cartas.")
+        parser.add_argument("--output", default=SYNASTRY_POOL_PATH)
+
+    def handle(self, *args, **options):
+        charts = []
+        try:
+            with open(options["input"], encoding="utf-8") as f:
+                for number, line in enumerate(f, 1):
+                    if line.strip():
+                        chart = json.loads(line)
+                        chart.setdefault("id", str(number))
+                        charts.append(chart)
+            pool = ChartPool.from_charts(charts)
+        except (OSError, KeyError, ValueError) as e:
+            raise CommandError(str(e))
+        pool.save(options["output"])
+        self.stdout.write(self.style.SUCCESS(f"{len(pool)} cartas guardadas en {options['output']}"))
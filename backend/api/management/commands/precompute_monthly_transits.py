@@ -0,0 +1,59 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+import os
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.ephemeris_engine import EphemerisEngine
+from api.monthly_store import MONTHLY_STORE_PATH, get_store, render_monthly
+from api.services import get_important_transits
+
+
+class Command(BaseCommand):
+    help = "Precalcula los tránsitos mensuales (1900–2100 por defecto) en el almacén persistente."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start-year", type=int, default=1900)
+        parser.add_argument("--end-year", type=int, default=2100, help="Último año incluido.")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="Procesos de cálculo en paralelo.")
+        parser.add_argument("--force", action="store_true", help="Recalcular aunque ya estén guardados.")
+
+    def handle(self, *args, **options):
+        start, end = options["start_year"], options["end_year"]
+        if end < start or start < 1900 or end > 2100:
+            raise CommandError("Years must satisfy 1900 <= start <= end <= 2100")
+
+        store = get_store()
+        months = [(m, y) for y in range(start, end + 1) for m in range(1, 13)]
+        if not options["force"]:
+            months = store.missing(months)
+        if not months:
+            self.stdout.write(self.style.SUCCESS("Nada que calcular: todos los meses están guardados."))
+            return
+
+        t0 = datetime.now()
+        engine = EphemerisEngine(workers=max(options["workers"], 1), ephe_path=settings.SE_EPHE_PATH)
+        try:
+            # Por años: el proceso principal escribe en SQLite, los workers calculan
+            for i in range(0, len(months), 12 * 10):
+                chunk = months[i:i + 12 * 10]
+                results = engine.map(get_important_transits, [m for m, _ in chunk], [y for _, y in chunk])
+                store.put_many(
+                    (m, y, render_monthly(m, y, transits)) for (m, y), transits in zip(chunk, results)
+                )
+                self.stdout.write(f"  {min(i + len(chunk), len(months))}/{len(months)} meses")
+        finally:
+            engine.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(months)} meses guardados en {MONTHLY_STORE_PATH} "
+            f"({(datetime.now() - t0).total_seconds():.1f}s)"
+        ))
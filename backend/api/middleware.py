@@ -9,12 +9,34 @@
 Middleware personalizado para optimización de performance.
 """
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.http import JsonResponse
 from django.utils.cache import patch_cache_control
 from django.utils.deprecation import MiddlewareMixin
+from whitenoise.middleware import WhiteNoiseMiddleware
 import time
 
+from .admission import Overloaded
 
-class PerformanceMiddleware(MiddlewareMixin):
+
+class LoopSafeMiddleware(MiddlewareMixin):
+    """
+    MiddlewareMixin que, bajo ASGI, ejecuta process_request/process_response
+    en el propio bucle de eventos: solo tocan cabeceras, así que no necesitan
+    el salto a un hilo que hace MiddlewareMixin.__acall__.
+    """
+
+    async def __acall__(self, request):
+        response = None
+        if hasattr(self, "process_request"):
+            response = self.process_request(request)
+        response = response or await self.get_response(request)
+        if hasattr(self, "process_response"):
+            response = self.process_response(request, response)
+        return response
+
+
+class PerformanceMiddleware(LoopSafeMiddleware):
     """
     Middleware que agrega headers de performance y caché.
     """
@@ -43,23 +65,35 @@ class PerformanceMiddleware(MiddlewareMixin):
                 s_maxage=3600
             )
         
-        elif '/api/horoscope/daily/' in path:
-            # Horóscopo diario: cacheable por 6 horas
-            patch_cache_control(
-                response,
-                public=True,
-                max_age=3600 * 6,
-                s_maxage=3600 * 6
-            )
+        elif '/api/horoscope/daily/' in path or '/api/horoscope/range/' in path:
+            # Horóscopo diario y por rango: cacheables por 6 horas (solo la variante GET)
+            if request.method == 'GET' and response.status_code in (200, 304):
+                patch_cache_control(
+                    response,
+                    public=True,
+                    max_age=3600 * 6,
+                    s_maxage=3600 * 6
+                )
         
-        elif '/api/compute/' in path:
-            # Carta natal: cacheable por 30 días
-            patch_cache_control(
-                response,
-                public=True,
-                max_age=86400 * 30,
-                s_maxage=86400 * 30
-            )
+        elif '/api/monthly-transits/' in path:
+            # Tránsitos mensuales: deterministas (ETag fuerte por versión del algoritmo)
+            if response.status_code in (200, 304):
+                patch_cache_control(
+                    response,
+                    public=True,
+                    max_age=86400,
+                    s_maxage=86400 * 30
+                )
+        
+        elif path.endswith('/api/compute/'):
+            # Carta natal: cacheable por 30 días (solo la variante GET; un POST no se cachea)
+            if request.method == 'GET' and response.status_code in (200, 304):
+                patch_cache_control(
+                    response,
+                    public=True,
+                    max_age=86400 * 30,
+                    s_maxage=86400 * 30
+                )
         
         # Header de indicador de caché
         if hasattr(response, 'data') and isinstance(response.data, dict):
@@ -71,7 +105,7 @@ class PerformanceMiddleware(MiddlewareMixin):
         return response
 
 
-class CORSMiddleware(MiddlewareMixin):
+class CORSMiddleware(LoopSafeMiddleware):
     """
     Middleware CORS optimizado para APIs públicas.
     """
@@ -84,3 +118,53 @@ class CORSMiddleware(MiddlewareMixin):
         response['Access-Control-Max-Age'] = '86400'  # 24 horas
         
         return response
+
+
+class AdmissionMiddleware(LoopSafeMiddleware):
+    """
+    Convierte el rechazo de una compuerta de admisión (api/admission.py) en
+    503 con Retry-After.
+    """
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, Overloaded):
+            return None
+        resp = JsonResponse({"error": "Server busy, retry later.", "endpoint": exception.gate,
+                             "reason": exception.reason}, status=503)
+        resp["Retry-After"] = str(exception.retry_after)
+        return resp
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware que admite ASGI. WhiteNoise solo es síncrono: Django
+    metería todo lo que hay debajo (las vistas async incluidas) en el único
+    hilo de sync_to_async y las peticiones se atenderían de una en una. Aquí
+    la búsqueda del fichero se hace en el bucle y solo servirlo va a un hilo.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=None):
+        if settings is None:
+            super().__init__(get_response)
+        else:
+            super().__init__(get_response, settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
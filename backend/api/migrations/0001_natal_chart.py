@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NatalChart',
+            fields=[
+                ('chart_id', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('birth_data', models.JSONField()),
+                ('chart', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+from django.db import models
+
+
+class NatalChart(models.Model):
+    """
+    Carta natal registrada una vez y referenciada después por `chart_id`
+    (sha256 de sus entradas normalizadas, ver chart_registry.chart_id_for).
+    """
+
+    chart_id = models.CharField(max_length=64, primary_key=True)
+    birth_data = models.JSONField()  # services.canonical_birth_data
+    chart = models.JSONField()  # salida completa de /api/compute/
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.chart_id
@@ -0,0 +1,136 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""
+Almacén persistente de tránsitos mensuales.
+
+`/api/monthly-transits/<month>/<year>/` es determinista para 1900–2100, así que
+el JSON de cada mes se guarda ya serializado en SQLite, con clave
+(año, mes, versión del algoritmo). Tras precalcular con
+`manage.py precompute_monthly_transits` el endpoint es una consulta.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .cache_stats import recorder
+from .ephemeris_engine import get_engine
+from .services import get_important_transits
+
+# Incrementar al cambiar get_important_transits (invalida lo guardado)
+MONTHLY_ALGORITHM_VERSION = 1
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+MONTHLY_STORE_PATH = os.environ.get(
+    "MONTHLY_STORE_PATH",
+    str(Path(os.environ.get("ASTROAPI_DATA_DIR", BASE_DIR / "data")) / "monthly_transits.sqlite3"),
+)
+
+
+def monthly_etag(month: int, year: int) -> str:
+    """ETag fuerte: solo depende de la entrada y de la versión del algoritmo."""
+    digest = hashlib.sha256(f"monthly:{year}:{month}:{MONTHLY_ALGORITHM_VERSION}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def render_monthly(month: int, year: int, transits: list) -> bytes:
+    """Cuerpo JSON de la respuesta (el mismo que serializaba la vista)."""
+    result = {"month": month, "year": year, "important_transits": transits}
+    return json.dumps(result, ensure_ascii=False).encode("utf-8")
+
+
+class MonthlyTransitsStore:
+    """Tabla SQLite (year, month, version) → cuerpo JSON ya serializado."""
+
+    def __init__(self, path: str = None):
+        self.path = path or MONTHLY_STORE_PATH
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS monthly_transits ("
+                " year INTEGER NOT NULL, month INTEGER NOT NULL, version INTEGER NOT NULL,"
+                " body BLOB NOT NULL, created REAL NOT NULL,"
+                " PRIMARY KEY (year, month, version))"
+            )
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def get(self, month: int, year: int):
+        row = self._conn().execute(
+            "SELECT body FROM monthly_transits WHERE year = ? AND month = ? AND version = ?",
+            (year, month, MONTHLY_ALGORITHM_VERSION),
+        ).fetchone()
+        recorder.record("monthly", "hits" if row else "misses")
+        return bytes(row[0]) if row else None
+
+    def put_many(self, items):
+        """items: iterable de (month, year, body_bytes)."""
+        rows = [(year, month, MONTHLY_ALGORITHM_VERSION, body, time.time()) for month, year, body in items]
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO monthly_transits (year, month, version, body, created)"
+                " VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        recorder.record("monthly", "sets", len(rows))
+
+    def usage(self) -> dict:
+        """Meses guardados y bytes de sus cuerpos (versión actual)."""
+        entries, size = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM monthly_transits WHERE version = ?",
+            (MONTHLY_ALGORITHM_VERSION,),
+        ).fetchone()
+        return {"entries": entries, "bytes": size}
+
+    def put(self, month: int, year: int, body: bytes):
+        self.put_many([(month, year, body)])
+
+    def missing(self, months) -> list:
+        """De una lista de (month, year), los que aún no están guardados."""
+        conn = self._conn()
+        return [(m, y) for m, y in months if conn.execute(
+            "SELECT 1 FROM monthly_transits WHERE year = ? AND month = ? AND version = ?",
+            (y, m, MONTHLY_ALGORITHM_VERSION),
+        ).fetchone() is None]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> MonthlyTransitsStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = MonthlyTransitsStore()
+    return _store
+
+
+def get_monthly_transits(month: int, year: int) -> bytes:
+    """Cuerpo JSON del mes: del almacén, o calculado y guardado si falta."""
+    store = get_store()
+    body = store.get(month, year)
+    if body is None:
+        transits = get_engine().run(get_important_transits, month, year)
+        body = render_monthly(month, year, transits)
+        store.put(month, year, body)
+    return body
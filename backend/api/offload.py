@@ -0,0 +1,115 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""
+Executor acotado para el cálculo de las vistas async (modo ASGI).
+
+Las vistas async consultan la caché y serializan en el bucle de eventos; lo
+que necesita Swiss Ephemeris (un fallo de caché) se manda aquí con
+`await offload(fn, ...)`, y los bloques de una respuesta en streaming con
+`offload_iter`. COMPUTE_THREADS limita los cálculos simultáneos del
+worker: el resto espera en la cola del executor sin bloquear el bucle, que
+sigue atendiendo conexiones lentas o en reposo. Con EPHEMERIS_WORKERS > 0 el
+hilo solo espera al pool de procesos de ephemeris_engine.
+
+El acceso a la base de datos no pasa por aquí: va con
+`sync_to_async(..., thread_sensitive=True)`, como pide Django para el ORM.
+La E/S corta de SQLite (L2 de la caché, almacén mensual, estadísticas) va
+con `offload_io` a los hilos de asgiref, para no esperar detrás de los
+cálculos: un lock de escritura de otro worker bloquea ese hilo, no el bucle.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+class ComputeExecutor:
+    """ThreadPoolExecutor con contadores de tareas en curso y en cola."""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="compute")
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.running = 0
+        self.peak_running = 0
+
+    def _run(self, fn, args, kwargs):
+        with self._lock:
+            self.running += 1
+            self.peak_running = max(self.peak_running, self.running)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Manda `fn(*args, **kwargs)` al pool; el Future termina con el cálculo aunque se cancele quien espera."""
+        with self._lock:
+            self.submitted += 1
+        return self._pool.submit(self._run, fn, args, kwargs)
+
+    async def run(self, fn, *args, **kwargs):
+        """Ejecuta `fn(*args, **kwargs)` en el pool y espera su resultado sin bloquear el bucle."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "submitted": self.submitted,
+                "running": self.running,
+                "peak_running": self.peak_running,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ComputeExecutor:
+    """Executor del proceso, con COMPUTE_THREADS hilos."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ComputeExecutor(settings.COMPUTE_THREADS)
+    return _executor
+
+
+async def offload(fn, *args, **kwargs):
+    """Atajo de `get_executor().run(...)`."""
+    return await get_executor().run(fn, *args, **kwargs)
+
+
+async def offload_io(fn, *args, **kwargs):
+    """`fn(*args, **kwargs)` con E/S bloqueante (SQLite) en un hilo de asgiref, fuera del bucle."""
+    return await sync_to_async(fn, thread_sensitive=False)(*args, **kwargs)
+
+
+async def offload_iter(iterable):
+    """
+    Iterador async sobre un generador síncrono: cada bloque se pide al
+    executor. Con ASGI, StreamingHttpResponse lee un iterador síncrono entero
+    (sync_to_async(list)) antes de enviar nada; así cada bloque sale en
+    cuanto está y la memoria no crece con la respuesta.
+    """
+    iterator = iter(iterable)
+    try:
+        while (chunk := await offload(next, iterator, None)) is not None:
+            yield chunk
+    finally:
+        if hasattr(iterator, "close"):
+            iterator.close()  # cliente desconectado: cierra el generador
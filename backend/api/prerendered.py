@@ -0,0 +1,68 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""
+Respuestas JSON ya serializadas (y comprimidas) para `response_cache`.
+
+En un acierto del horóscopo diario la caché devolvía el dict (copiado o
+deserializado), la vista lo volvía a pasar por JsonResponse y GZipMiddleware
+comprimía otra vez los mismos bytes. Aquí se guarda la respuesta final:
+
+    (cuerpo JSON en UTF-8, mismo cuerpo en gzip o None)
+
+y un acierto solo construye un HttpResponse con los bytes que pida el
+cliente. La variante gzip lleva `Content-Encoding: gzip`, así que
+GZipMiddleware no la toca; `Vary: Accept-Encoding` se pone siempre que haya
+variante comprimida y, como hace GZipMiddleware, el ETag fuerte pasa a débil
+en la variante gzip.
+"""
+
+import json
+import re
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+# Mismos criterios que django.middleware.gzip.GZipMiddleware
+_ACCEPTS_GZIP = re.compile(r"\bgzip\b")
+MIN_GZIP_SIZE = 200
+
+
+def response_key(variant: str, cache_key: str) -> str:
+    """Clave de la respuesta serializada de `cache_key` (familia "response")."""
+    return f"response:{variant}:{cache_key}"
+
+
+def render_json(data) -> tuple:
+    """(cuerpo JSON, cuerpo gzip o None si no compensa comprimir)."""
+    return render_bytes(json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode("utf-8"))
+
+
+def render_bytes(body: bytes) -> tuple:
+    """(cuerpo, cuerpo gzip o None si no compensa comprimir)."""
+    gzipped = compress_string(body) if len(body) >= MIN_GZIP_SIZE else None
+    if gzipped is not None and len(gzipped) >= len(body):
+        gzipped = None
+    return body, gzipped
+
+
+def prerendered_response(request, entry: tuple, etag: str = None, status: int = 200,
+                         content_type: str = "application/json") -> HttpResponse:
+    """HttpResponse con los bytes de `entry` en la codificación que acepte el cliente."""
+    body, gzipped = entry
+    use_gzip = gzipped is not None and _ACCEPTS_GZIP.search(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    resp = HttpResponse(gzipped if use_gzip else body, content_type=content_type, status=status)
+    if gzipped is not None:
+        patch_vary_headers(resp, ("Accept-Encoding",))
+    if use_gzip:
+        resp["Content-Encoding"] = "gzip"
+    if etag:
+        resp["ETag"] = f"W/{etag}" if use_gzip and etag.startswith('"') else etag
+    resp["Content-Length"] = str(len(resp.content))
+    return resp
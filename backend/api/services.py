@@ -13,14 +13,22 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with astroapi.  If not, see <https://www.gnu.org/licenses/>.
 
+import hashlib
+import json
 import swisseph as swe
-from datetime import datetime
-from dateutil import tz
+from datetime import datetime, timedelta
 from pathlib import Path
+from .ephemeris_engine import ensure_ephe_path, topocentric
+from .event_search import find_aspect_events, jd_to_datetime, month_jd_range
+from .eclipses import eclipses_between
+from .aspect_engine import AspectTable, separation_matrix
+from .timezones import (
+    get_zone, local_to_jd_ut, raise_for_status, utc_offset, utc_offsets, utc_to_jd_ut, STATUS_NAMES,
+)
 
 # Inicialización Swiss Ephemeris (DE431)
 BASE_DIR = Path(__file__).resolve().parents[1]
-swe.set_ephe_path(str(BASE_DIR.parent / "se_data"))  # carpeta con sepl*.se1, semo*.se1
+ensure_ephe_path(str(BASE_DIR.parent / "se_data"))  # carpeta con sepl*.se1, semo*.se1
 FLAGS = swe.FLG_SWIEPH | swe.FLG_SPEED        # sin TRUEPOS, sin TOPOCTR
 
 # Planetas que calculemos (Swiss IDs)
@@ -72,26 +80,110 @@ ASPECTS = [
     {"name": "Sextile",     "angle": 60,  "orb": 4},
     {"name": "Quincunx",    "angle": 150, "orb": 3},
 ]
+CHART_ASPECTS = AspectTable(ASPECTS)
+
+# Campos obligatorios del payload de /api/compute/
+REQUIRED_CHART_FIELDS = ["datetime", "timezone", "latitude", "longitude", "house_system", "topocentric_moon_only"]
+
+# Partes opcionales de la carta ("fields" del payload); "formatted" son las cadenas de fmt_zodiac
+CHART_FIELDS = ["planets", "houses", "aspects", "formatted"]
+
+# Incrementar al cambiar el cálculo de la carta (invalida las cartas cacheadas)
+CHART_ALGORITHM_VERSION = 1
+
+# Decimales de latitud/longitud en la clave de caché de cartas (4 ≈ 11 m)
+COORD_DECIMALS = 4
+
+# Máximo de cartas por petición en /api/compute/batch/
+MAX_BATCH_CHARTS = 500
 
 def set_ephe_path(ephe_path: str):
-    swe.set_ephe_path(ephe_path)
+    ensure_ephe_path(ephe_path)
 
-def to_jdut1(datetime_local: datetime, tz_name: str) -> float:
+def to_jdut1(datetime_local: datetime, tz_name: str, ambiguous: str = "earlier",
+             nonexistent: str = "shift_forward") -> float:
     """
     Convierte una fecha/hora local + zona horaria a Julian Day UT.
-    Usa las funciones de Swiss para conversión precisa.
+    La zona y sus transiciones salen de la caché de `timezones`; las horas
+    ambiguas o inexistentes se resuelven según `ambiguous` / `nonexistent`.
+    """
+    return local_to_jd_ut(datetime_local, tz_name, ambiguous, nonexistent)
+
+def chart_selection(payload: dict) -> dict:
+    """
+    Partes de la carta pedidas en el payload, normalizadas (orden de PLANETS y
+    de CHART_FIELDS) para que selecciones equivalentes compartan clave de caché.
+
+      "bodies": ["sun", "moon"]                    # por defecto, todos los PLANETS
+      "fields": ["planets", "houses", "formatted"] # por defecto, CHART_FIELDS
+    """
+    bodies = payload.get("bodies")
+    fields = payload.get("fields")
+    if bodies is None:
+        bodies = list(PLANETS)
+    elif not isinstance(bodies, list) or any(name not in PLANETS for name in bodies):
+        raise ValueError(f"bodies must be a list of: {', '.join(PLANETS)}")
+    if fields is None:
+        fields = CHART_FIELDS
+    elif not isinstance(fields, list) or any(field not in CHART_FIELDS for field in fields):
+        raise ValueError(f"fields must be a list of: {', '.join(CHART_FIELDS)}")
+    return {
+        "bodies": [name for name in PLANETS if name in bodies],
+        "fields": [field for field in CHART_FIELDS if field in fields],
+    }
+
+def canonical_birth_data(payload: dict) -> dict:
+    """
+    Entradas normalizadas de una carta, base de su clave de caché: instante UTC
+    (y estado de la hora local), lat/lon a COORD_DECIMALS, sistema de casas,
+    Luna topocéntrica, selección y versión del algoritmo. Dos payloads con el
+    mismo resultado comparten clave aunque usen zonas u horas locales distintas.
+    """
+    ambiguous, nonexistent = time_policies(payload)
+    dt = datetime.fromisoformat(payload["datetime"])
+    tz_name = payload.get("timezone", "UTC")
+    offset, status = utc_offset(dt, tz_name, ambiguous, nonexistent)
+    raise_for_status(dt, tz_name, status, ambiguous, nonexistent)
+    dt_utc = dt.replace(tzinfo=None) - timedelta(seconds=offset)
+    return {
+        "utc": dt_utc.isoformat(timespec="microseconds"),
+        "local_time": STATUS_NAMES[status],
+        "latitude": round(float(payload["latitude"]), COORD_DECIMALS),
+        "longitude": round(float(payload["longitude"]), COORD_DECIMALS),
+        "house_system": payload.get("house_system", "placidus"),
+        "topocentric_moon_only": bool(payload.get("topocentric_moon_only", True)),
+        "selection": chart_selection(payload),
+        "version": CHART_ALGORITHM_VERSION,
+    }
+
+def chart_etag(payload: dict) -> str:
+    """ETag fuerte de la carta: sha256 de las entradas normalizadas (incluye la versión del algoritmo)."""
+    canonical = json.dumps(canonical_birth_data(payload), sort_keys=True)
+    return f'"{hashlib.sha256(canonical.encode()).hexdigest()[:32]}"'
+
+def chart_payload_from_query(query) -> dict:
     """
-    zone = tz.gettz(tz_name)
-    if zone is None:
-        raise ValueError(f"Unknown timezone: {tz_name}")
-    dt_local = datetime_local.replace(tzinfo=zone)
-    dt_utc = dt_local.astimezone(tz.UTC)
-    # Usa swe.utc_to_jd para conversión precisa
-    iy, im, id = dt_utc.year, dt_utc.month, dt_utc.day
-    ih, imin = dt_utc.hour, dt_utc.minute
-    sec = dt_utc.second + dt_utc.microsecond / 1e6
-    jd_et, jd_ut = swe.utc_to_jd(iy, im, id, ih, imin, sec, swe.GREG_CAL)
-    return jd_ut
+    Payload de /api/compute/ desde los parámetros GET, con los mismos nombres
+    que el JSON: `bodies` y `fields` separados por comas y
+    `topocentric_moon_only` como true/false.
+    """
+    payload = {}
+    for field in REQUIRED_CHART_FIELDS + ["ambiguous_time", "nonexistent_time"]:
+        if field in query:
+            payload[field] = query[field]
+    if "topocentric_moon_only" in payload:
+        flag = payload["topocentric_moon_only"].lower()
+        if flag not in ("true", "false", "1", "0"):
+            raise ValueError("topocentric_moon_only must be true or false.")
+        payload["topocentric_moon_only"] = flag in ("true", "1")
+    for field in ("bodies", "fields"):
+        if field in query:
+            payload[field] = [item for item in query[field].split(",") if item]
+    return payload
+
+def time_policies(payload: dict):
+    """Políticas para horas ambiguas/inexistentes pedidas en el payload."""
+    return payload.get("ambiguous_time", "earlier"), payload.get("nonexistent_time", "shift_forward")
 
 def fmt_zodiac(lon):
     signs = ["Aries","Tauro","Géminis","Cáncer","Leo","Virgo",
@@ -103,41 +195,43 @@ def fmt_zodiac(lon):
     s = int(round((((deg - d) * 60) - m) * 60))
     return f"{signs[sign]} {d}° {m}' {s}\""
 
-def compute_planets(jdut1: float, lat: float, lon: float, topo: bool) -> dict:
+def compute_planets(jdut1: float, lat: float, lon: float, topo: bool,
+                    bodies: list = None, formatted: bool = True) -> dict:
     """
     Devuelve longitudes eclípticas aparentes (tropical) de planetas con info de retrógrado.
+    `bodies` limita los cuerpos calculados (por defecto todos los de PLANETS) y
+    `formatted=False` omite las cadenas de fmt_zodiac.
     """
-    results = {}
-    flags = FLAGS
-
     if topo:
-        # Topocéntrico para todos (o solo Luna si prefieres)
-        swe.set_topo(lon, lat, 0)  # alt=0m (puedes exponerlo en la API)
-        flags = flags | swe.FLG_TOPOCTR
-    else:
-        # geocéntrico
-        swe.set_topo(0, 0, 0)
+        # Topocéntrico para todos (o solo Luna si prefieres); el observador es
+        # estado global de Swiss, así que se calcula con el lock tomado
+        with topocentric(lon, lat, 0):  # alt=0m (puedes exponerlo en la API)
+            return _compute_planets(jdut1, FLAGS | swe.FLG_TOPOCTR, bodies, formatted)
+    # geocéntrico: no depende de set_topo
+    return _compute_planets(jdut1, FLAGS, bodies, formatted)
+
+def _planet_entry(lonlat, formatted: bool) -> dict:
+    lon_ecl = lonlat[0] % 360.0
+    speed = lonlat[3]  # velocidad diaria en longitud
+    is_retrograde = speed < 0
+    entry = {
+        "value": lon_ecl,
+        "speed": speed,
+        "retrograde": is_retrograde,
+    }
+    if formatted:
+        entry["formatted"] = fmt_zodiac(lon_ecl) + (" ℞" if is_retrograde else "")
+    return entry
 
-    for name, pid in PLANETS.items():
+def _compute_planets(jdut1: float, flags: int, bodies: list = None, formatted: bool = True) -> dict:
+    results = {}
+    for name in (bodies if bodies is not None else PLANETS):
         # Nota: TRUE_NODE es el nodo "verdadero"; para "medio", usa MEAN_NODE
-        lonlat, ret = swe.calc_ut(jdut1, pid, flags)
-        lon_ecl = lonlat[0] % 360.0
-        speed = lonlat[3]  # velocidad diaria en longitud
-        is_retrograde = speed < 0
-        
-        formatted = fmt_zodiac(lon_ecl)
-        if is_retrograde:
-            formatted += " ℞"
-        
-        results[name] = {
-            "value": lon_ecl,
-            "speed": speed,
-            "retrograde": is_retrograde,
-            "formatted": formatted,
-        }
+        lonlat, ret = swe.calc_ut(jdut1, PLANETS[name], flags)
+        results[name] = _planet_entry(lonlat, formatted)
     return results
 
-def compute_houses(jdut1: float, lat: float, lon: float, house_system: bytes):
+def compute_houses(jdut1: float, lat: float, lon: float, house_system: bytes, formatted: bool = True):
     """
     Casas y puntos (Asc, MC) según Swiss (usa UT).
     lon positivo Este (convención Swiss: Este = +).
@@ -148,11 +242,18 @@ def compute_houses(jdut1: float, lat: float, lon: float, house_system: bytes):
     asc = ascmc[0] % 360.0
     mc  = ascmc[1] % 360.0
     houses = [(c % 360.0) for c in cusps]  # 12
+
+    def point(value, **extra):
+        entry = dict(extra, value=value)
+        if formatted:
+            entry["formatted"] = fmt_zodiac(value)
+        return entry
+
     return {
-        "ascendente": {"value": asc, "formatted": fmt_zodiac(asc)},
-        "asc": {"value": asc, "formatted": fmt_zodiac(asc)},  # alias
-        "mc":  {"value": mc,  "formatted": fmt_zodiac(mc)},
-        "cusps": [{"house": i+1, "value": h, "formatted": fmt_zodiac(h)} for i, h in enumerate(houses)],
+        "ascendente": point(asc),
+        "asc": point(asc),  # alias
+        "mc":  point(mc),
+        "cusps": [point(h, house=i+1) for i, h in enumerate(houses)],
     }
 
 def _norm360(x): 
@@ -164,25 +265,21 @@ def angular_sep(a, b):
     return min(d, 360.0 - d)
 
 def compute_aspects(planets):
-    """Cálculo de aspectos con orbes fijos."""
+    """Cálculo de aspectos con orbes fijos (vectorizado, ver aspect_engine)."""
     names = list(planets.keys())
-    out = []
-    for i in range(len(names)):
-        for j in range(i+1, len(names)):
-            a, b = names[i], names[j]
-            la, lb = planets[a]["value"], planets[b]["value"]
-            sep = angular_sep(la, lb)
-            for asp in ASPECTS:
-                diff = abs(sep - asp["angle"])
-                if diff <= asp["orb"]:
-                    out.append({
-                        "planet_a": a,
-                        "planet_b": b,
-                        "aspect": asp["name"],
-                        "angle": round(sep, 4),
-                        "orb": round(diff, 4),
-                    })
-    return out
+    lons = [planets[name]["value"] for name in names]
+    sep = separation_matrix(lons, lons)
+    rows, cols, idx, orbs = CHART_ASPECTS.match(sep, upper=True)
+    return [
+        {
+            "planet_a": names[i],
+            "planet_b": names[j],
+            "aspect": CHART_ASPECTS.names[a],
+            "angle": round(sep[i, j].item(), 4),
+            "orb": round(orb, 4),
+        }
+        for i, j, a, orb in zip(rows.tolist(), cols.tolist(), idx.tolist(), orbs.tolist())
+    ]
 
 def compute_chart(payload: dict, ephe_path: str) -> dict:
     """
@@ -197,134 +294,172 @@ def compute_chart(payload: dict, ephe_path: str) -> dict:
       }
     """
     set_ephe_path(ephe_path)
+    return _compute_chart(payload, ephe_path)
 
-    dt = datetime.fromisoformat(payload["datetime"])
-    tzname = payload.get("timezone", "UTC")
+
+def _compute_chart(payload: dict, ephe_path: str, jdut1: float = None, local_time: int = None) -> dict:
+    """
+    Cálculo de la carta sin tocar la ruta de efemérides (ya fijada por el llamador).
+    `jdut1` y `local_time` (estado de la hora local) se pasan si ya se convirtieron en lote.
+    """
     lat = float(payload["latitude"])
     lon = float(payload["longitude"])  # Swiss espera Este positivo
 
-    jdut1 = to_jdut1(dt, tzname)
+    if jdut1 is None:
+        dt = datetime.fromisoformat(payload["datetime"])
+        jdut1, local_time = local_to_jd_ut(dt, payload.get("timezone", "UTC"), *time_policies(payload),
+                                           with_status=True)
 
     hs_code = HOUSE_SYSTEMS.get(payload.get("house_system", "placidus"), b'P')
 
     topo_moon_only = payload.get("topocentric_moon_only", True)
 
+    # Solo se calcula lo pedido
+    selection = chart_selection(payload)
+    fields = selection["fields"]
+    formatted = "formatted" in fields
+    bodies = selection["bodies"]
+    if "aspects" not in fields and "planets" not in fields:
+        bodies = []
+    topo_moon = topo_moon_only and "moon" in bodies
+
     # 1) Planetas: geocéntricos aparentes
-    planets_geo = compute_planets(jdut1, lat, lon, topo=False)
+    planets_geo = compute_planets(jdut1, lat, lon, topo=False, formatted=formatted,
+                                  bodies=[name for name in bodies if not (topo_moon and name == "moon")])
 
     # 2) Luna topocéntrica (si se pide)
-    if topo_moon_only:
-        swe.set_topo(lon, lat, 0)
-        lonlat, ret = swe.calc_ut(jdut1, swe.MOON, FLAGS | swe.FLG_TOPOCTR)
-        moon_topo = lonlat[0] % 360.0
-        moon_speed = lonlat[3]
-        planets_geo["moon"] = {
-            "value": moon_topo,
-            "speed": moon_speed,
-            "retrograde": moon_speed < 0,
-            "formatted": fmt_zodiac(moon_topo) + (" ℞" if moon_speed < 0 else "")
-        }
+    if topo_moon:
+        with topocentric(lon, lat, 0):
+            lonlat, ret = swe.calc_ut(jdut1, swe.MOON, FLAGS | swe.FLG_TOPOCTR)
+        planets_geo["moon"] = _planet_entry(lonlat, formatted)
+        planets_geo = {name: planets_geo[name] for name in bodies}  # orden de PLANETS
+
+    result = {"jd_ut": jdut1}
+    if "planets" in fields:
+        result["planets"] = planets_geo
 
     # 3) Casas (Asc/MC exactos a Swiss)
-    houses = compute_houses(jdut1, lat, lon, hs_code)
+    if "houses" in fields:
+        result["houses"] = compute_houses(jdut1, lat, lon, hs_code, formatted)
 
     # 4) Aspectos
-    aspects = compute_aspects(planets_geo)
+    if "aspects" in fields:
+        result["aspects"] = compute_aspects(planets_geo)
 
-    return {
-        "jd_ut": jdut1,
-        "planets": planets_geo,
-        "houses": houses,
-        "aspects": aspects,
-        "meta": {
-            "ephe_path": ephe_path,
-            "flags": int(FLAGS),
-            "house_system": payload.get("house_system", "placidus"),
-        }
+    result["meta"] = {
+        "ephe_path": ephe_path,
+        "flags": int(FLAGS),
+        "house_system": payload.get("house_system", "placidus"),
+        "local_time": STATUS_NAMES[local_time],
     }
+    return result
+
+
+def compute_charts_batch(payloads: list, ephe_path: str) -> list:
+    """
+    Calcula varias cartas natales en una sola pasada.
+
+    Fija la ruta de efemérides una sola vez y convierte todas las horas
+    locales a UT en una sola pasada vectorizada. Devuelve una lista en el mismo orden que
+    `payloads`, con {"index", "chart"} o {"index", "error"} por elemento:
+    un elemento inválido no invalida el lote.
+    """
+    set_ephe_path(ephe_path)
+    results = [None] * len(payloads)
+    valid = []
+    for index, payload in enumerate(payloads):
+        try:
+            if not isinstance(payload, dict):
+                raise ValueError("Each item must be a JSON object.")
+            for field in REQUIRED_CHART_FIELDS:
+                if field not in payload:
+                    raise ValueError(f"Missing required field: {field}")
+            dt = datetime.fromisoformat(payload["datetime"])
+            tz_name = payload.get("timezone", "UTC")
+            get_zone(tz_name)
+            valid.append((index, payload, dt, tz_name, time_policies(payload)))
+        except Exception as e:
+            results[index] = {"index": index, "error": str(e)}
+
+    # Offsets UTC de todo el lote de una vez (agrupado por políticas)
+    groups = {}
+    for item in valid:
+        groups.setdefault(item[4], []).append(item)
+    for (ambiguous, nonexistent), items in groups.items():
+        try:
+            offsets, status = utc_offsets([it[2] for it in items], [it[3] for it in items],
+                                          ambiguous, nonexistent)
+        except ValueError as e:  # política inválida: afecta a todo el grupo
+            for index, *_ in items:
+                results[index] = {"index": index, "error": str(e)}
+            continue
+        for (index, payload, dt, tz_name, _), offset, local_time in zip(items, offsets, status):
+            try:
+                raise_for_status(dt, tz_name, local_time, ambiguous, nonexistent)
+                dt_utc = dt.replace(tzinfo=None) - timedelta(seconds=int(offset))
+                chart = _compute_chart(payload, ephe_path, utc_to_jd_ut(dt_utc), int(local_time))
+                results[index] = {"index": index, "chart": chart}
+            except Exception as e:
+                results[index] = {"index": index, "error": str(e)}
+    return results
+
+
+# Cuerpos que la Luna aspecta en los tránsitos mensuales (sin Lilith ni Quirón)
+MONTHLY_BODIES = {name: pid for name, pid in PLANETS.items() if name not in ("lilith", "chiron")}
 
 
 def get_important_transits(month, year):
-    """Calcula tránsitos importantes del mes enfocados en la Luna: aspectos lunares y eclipses solares/lunares"""
-    from datetime import datetime, timedelta
-    
-    start_date = datetime(year, month, 1)
-    end_date = datetime(year, month + 1, 1) if month < 12 else datetime(year + 1, 1, 1)
-    
+    """
+    Calcula tránsitos importantes del mes enfocados en la Luna: aspectos lunares
+    (con su instante exacto en UTC) y eclipses solares/lunares del catálogo.
+    """
+    ensure_ephe_path()
+    jd_start, jd_end = month_jd_range(month, year)
+    others = [name for name in MONTHLY_BODIES if name != "moon"]
+    events = find_aspect_events("moon", others, jd_start, jd_end, MONTHLY_BODIES)
+
+    order = list(MONTHLY_BODIES)
     transits = []
-    current = start_date
-    while current < end_date:
-        jd = swe.julday(current.year, current.month, current.day)
-        positions = {}
-        for name, pid in PLANETS.items():
-            if name in ["lilith", "chiron"]:  # Excluir lilith y chiron, pero incluir true_node para eclipses
-                continue
-            result = swe.calc_ut(jd, pid, FLAGS)
-            lon = result[0][0]
-            positions[name] = lon % 360
-        
-        # Calcular posición del nodo para eclipses
-        node_result = swe.calc_ut(jd, swe.TRUE_NODE, FLAGS)
-        node_lon = node_result[0][0] % 360
-        
-        # Verificar aspectos entre planetas
-        planet_list = list(positions.keys())
-        for i in range(len(planet_list)):
-            for j in range(i+1, len(planet_list)):
-                p1, p2 = planet_list[i], planet_list[j]
-                diff = abs(positions[p1] - positions[p2]) % 360
-                if diff > 180:
-                    diff = 360 - diff
-                
-                aspect = None
-                if diff < 10:
-                    aspect = "Conjunción"
-                elif abs(diff - 60) < 10:
-                    aspect = "Sextil"
-                elif abs(diff - 90) < 10:
-                    aspect = "Cuadratura"
-                elif abs(diff - 120) < 10:
-                    aspect = "Trígono"
-                elif abs(diff - 180) < 10:
-                    aspect = "Oposición"
-                
-                if aspect:
-                    # Verificar si es eclipse
-                    is_eclipse = False
-                    if {p1, p2} == {"sun", "moon"}:
-                        moon_lon = positions["moon"]
-                        # Eclipse Solar: Luna Nueva (conjunción) dentro de 15° del Nodo Lunar
-                        if aspect == "Conjunción" and min(abs(moon_lon - node_lon), 360 - abs(moon_lon - node_lon)) < 15:
-                            aspect = "Eclipse Solar"
-                            is_eclipse = True
-                        # Eclipse Lunar: Luna Llena (oposición) dentro de 12-15° del Nodo Lunar opuesto
-                        elif aspect == "Oposición" and min(abs(moon_lon - (node_lon + 180) % 360), 360 - abs(moon_lon - (node_lon + 180) % 360)) < 15:
-                            aspect = "Eclipse Lunar"
-                            is_eclipse = True
-                    
-                    transits.append({
-                        "date": current.strftime("%Y-%m-%d"),
-                        "aspect": aspect,
-                        "planets": [PLANET_NAMES_ES.get(p1, p1), PLANET_NAMES_ES.get(p2, p2)],
-                        "angle": round(diff, 2),
-                        "is_eclipse": is_eclipse
-                    })
-        
-        current += timedelta(days=1)
-    
-    # Filtrar solo tránsitos lunares (que involucran a la Luna) y eclipses
-    lunar_transits = [t for t in transits if "Luna" in t["planets"]]
-    
-    # Eliminar duplicados aproximados (mismo aspecto en días consecutivos)
-    unique_transits = []
-    seen = set()
-    for t in lunar_transits:
-        key = (t["aspect"], tuple(sorted(t["planets"])), t["date"][:7])  # mes-año
-        if key not in seen:
-            unique_transits.append(t)
-            seen.add(key)
-    
-    return unique_transits
+    syzygies = {}
+    for event in events:
+        p1, p2 = sorted((event["fast"], event["other"]), key=order.index)
+        transit = {
+            "date": event["datetime_utc"].strftime("%Y-%m-%d"),
+            "datetime_utc": event["datetime_utc"].strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "aspect": event["aspect"],
+            "planets": [PLANET_NAMES_ES.get(p1, p1), PLANET_NAMES_ES.get(p2, p2)],
+            "angle": round(event["angle"], 2),
+            "is_eclipse": False
+        }
+        if event["other"] == "sun" and event["aspect"] in ("Conjunción", "Oposición"):
+            syzygies[event["jd_ut"]] = transit
+        transits.append(transit)
+
+    # Eclipses reales (catálogo de Swiss): la Luna Nueva/Llena correspondiente
+    # pasa a ser el eclipse; si cae al otro lado del cambio de mes, se añade aparte
+    for eclipse in eclipses_between(jd_start, jd_end):
+        wanted = "Conjunción" if eclipse["kind"] == "solar" else "Oposición"
+        match = next((t for jd, t in syzygies.items()
+                      if t["aspect"] == wanted and abs(jd - eclipse["jd_ut"]) < 1), None)
+        if match is None:
+            moment = jd_to_datetime(eclipse["jd_ut"])
+            match = {
+                "date": moment.strftime("%Y-%m-%d"),
+                "datetime_utc": eclipse["maximum_utc"],
+                "planets": [PLANET_NAMES_ES["sun"], PLANET_NAMES_ES["moon"]],
+                "angle": 0.0 if eclipse["kind"] == "solar" else 180.0,
+            }
+            transits.append(match)
+        match["aspect"] = "Eclipse Solar" if eclipse["kind"] == "solar" else "Eclipse Lunar"
+        match["is_eclipse"] = True
+        match["eclipse"] = {
+            "type": eclipse["type"],
+            "magnitude": eclipse["magnitude"],
+            "maximum_utc": eclipse["maximum_utc"],
+        }
+
+    transits.sort(key=lambda t: t["datetime_utc"])
+    return transits
 
 def get_lunar_phase(sun_lon: float, moon_lon: float) -> str:
     """Calcula la fase lunar basada en la separación angular Sol-Luna"""
@@ -0,0 +1,314 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""
+Backend de caché de Django sobre SQLite en modo WAL, compartido por todos los
+workers de un nodo sin necesidad de Redis.
+
+Con LocMemCache cada worker de gunicorn calcula y guarda su propia copia de
+cada tránsito y horóscopo. Este backend guarda las entradas en un fichero
+local: WAL permite lecturas concurrentes mientras otro proceso escribe, y
+las páginas se leen con mmap.
+
+- Escrituras atómicas: cada set/add/incr es una transacción BEGIN IMMEDIATE.
+- Límite en bytes (MAX_BYTES): unos triggers mantienen el total en la tabla
+  `cache_size`. Al superarlo se borran las entradas caducadas y después las
+  menos usadas recientemente (LRU) hasta bajar a MAX_BYTES × CULL_TO.
+- LRU aproximado: un acierto solo reescribe `accessed` si la última marca
+  tiene más de ACCESS_RESOLUTION segundos, para que las lecturas calientes no
+  serialicen escrituras entre procesos.
+- Estadísticas por familia de claves (api.cache_stats): aciertos, fallos,
+  escrituras y expulsiones; entradas y bytes salen de la columna `family`.
+
+Configuración:
+
+    CACHES = {"default": {
+        "BACKEND": "api.sqlite_cache.SQLiteCache",
+        "LOCATION": "/ruta/cache.sqlite3",
+        "OPTIONS": {"MAX_BYTES": 64 * 1024 * 1024},
+    }}
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .cache_stats import family_of, recorder
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS cache ("
+    " key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL,"
+    " accessed REAL NOT NULL, size INTEGER NOT NULL, family TEXT NOT NULL DEFAULT 'other')",
+    "CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)",
+    "CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)",
+    "CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO cache_size (id, bytes) VALUES (0, 0)",
+    "CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache BEGIN"
+    " UPDATE cache_size SET bytes = bytes + NEW.size WHERE id = 0; END",
+    "CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache BEGIN"
+    " UPDATE cache_size SET bytes = bytes - OLD.size WHERE id = 0; END",
+    "CREATE TRIGGER IF NOT EXISTS cache_update AFTER UPDATE OF size ON cache BEGIN"
+    " UPDATE cache_size SET bytes = bytes + NEW.size - OLD.size WHERE id = 0; END",
+]
+
+# Upsert (no INSERT OR REPLACE: el borrado implícito de REPLACE no dispara triggers)
+_UPSERT = (
+    "INSERT INTO cache (key, value, expires, accessed, size, family) VALUES (?, ?, ?, ?, ?, ?)"
+    " ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires,"
+    " accessed = excluded.accessed, size = excluded.size"
+)
+
+
+def _family(made_key: str) -> str:
+    """Familia de una clave ya construida por Django ("prefijo:versión:clave")."""
+    return family_of(made_key.split(":", 2)[-1])
+
+
+def _count_by_family(rows, event: str):
+    """Anota `event` por familia para filas (family, n)."""
+    for family, n in rows:
+        recorder.record(family, event, n)
+
+
+class SQLiteCache(BaseCache):
+    """Caché de Django en un fichero SQLite (WAL) con límite en bytes y expulsión LRU."""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.path = str(location)
+        self.max_bytes = int(options.get("MAX_BYTES", 64 * 1024 * 1024))
+        self.cull_to = float(options.get("CULL_TO", 0.9))
+        self.access_resolution = float(options.get("ACCESS_RESOLUTION", 1.0))
+        self.mmap_size = int(options.get("MMAP_SIZE", 256 * 1024 * 1024))
+        self._local = threading.local()
+
+    # -- conexión --------------------------------------------------------
+
+    def _conn(self) -> sqlite3.Connection:
+        """Conexión por hilo; se reabre tras un fork (gunicorn --preload)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={self.mmap_size}")
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for statement in _SCHEMA:
+                    conn.execute(statement)
+                columns = [row[1] for row in conn.execute("PRAGMA table_info(cache)")]
+                if "family" not in columns:  # ficheros creados antes de las estadísticas
+                    conn.execute("ALTER TABLE cache ADD COLUMN family TEXT NOT NULL DEFAULT 'other'")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _write(self, fn):
+        """Ejecuta fn(conn) en una transacción BEGIN IMMEDIATE."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    # -- expulsión -------------------------------------------------------
+
+    def _cull(self, conn, now: float):
+        """Dentro de la transacción: caducadas primero, después LRU, hasta MAX_BYTES × CULL_TO."""
+        (total,) = conn.execute("SELECT bytes FROM cache_size WHERE id = 0").fetchone()
+        if total <= self.max_bytes:
+            return
+        self._delete_expired(conn, now)
+        (total,) = conn.execute("SELECT bytes FROM cache_size WHERE id = 0").fetchone()
+        target = self.max_bytes * self.cull_to
+        evicted = Counter()
+        while total > target:
+            rows = conn.execute("SELECT key, size, family FROM cache ORDER BY accessed LIMIT 256").fetchall()
+            if not rows:
+                break
+            victims = []
+            for key, size, family in rows:
+                victims.append((key,))
+                evicted[family] += 1
+                total -= size
+                if total <= target:
+                    break
+            conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+        _count_by_family(evicted.items(), "evictions")
+
+    def _delete_expired(self, conn, now: float) -> int:
+        expired = conn.execute(
+            "SELECT family, COUNT(*) FROM cache WHERE expires <= ? GROUP BY family", (now,)
+        ).fetchall()
+        if not expired:
+            return 0
+        conn.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+        _count_by_family(expired, "expirations")
+        return sum(n for _, n in expired)
+
+    # -- API de BaseCache -------------------------------------------------
+
+    def _expires(self, timeout):
+        return self.get_backend_timeout(timeout)  # None = no caduca
+
+    def _put(self, key, value, timeout, only_if_missing: bool) -> bool:
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None and timeout <= 0:
+            self.delete(key)  # Django: timeout 0 = no cachear
+            return False
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        size = len(blob) + len(key)
+        if size > self.max_bytes:
+            return False
+        expires = self._expires(timeout)
+
+        def put(conn):
+            now = time.time()
+            if only_if_missing:
+                row = conn.execute("SELECT expires FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is not None and (row[0] is None or row[0] > now):
+                    return False
+            conn.execute(_UPSERT, (key, blob, expires, now, size, family))
+            self._cull(conn, now)
+            return True
+
+        family = _family(key)
+        stored = self._write(put)
+        if stored:
+            recorder.record(family, "sets")
+        return stored
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._put(key, value, timeout, only_if_missing=True)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._put(key, value, timeout, only_if_missing=False)
+
+    def _touch_accessed(self, keys, now: float):
+        conn = self._conn()
+        conn.executemany("UPDATE cache SET accessed = ? WHERE key = ?", [(now, key) for key in keys])
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._conn().execute(
+            "SELECT value, expires, accessed FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        family = _family(key)
+        if row is None:
+            recorder.record(family, "misses")
+            return default
+        now = time.time()
+        if row[1] is not None and row[1] <= now:
+            if self._conn().execute("DELETE FROM cache WHERE key = ? AND expires <= ?", (key, now)).rowcount:
+                recorder.record(family, "expirations")
+            recorder.record(family, "misses")
+            return default
+        if now - row[2] > self.access_resolution:
+            self._touch_accessed([key], now)
+        recorder.record(family, "hits")
+        return pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        """Una sola consulta para todas las claves."""
+        mapped = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not mapped:
+            return {}
+        placeholders = ",".join("?" * len(mapped))
+        rows = self._conn().execute(
+            f"SELECT key, value, expires, accessed FROM cache WHERE key IN ({placeholders})", list(mapped)
+        ).fetchall()
+        now = time.time()
+        out, stale = {}, []
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                continue
+            out[mapped[key]] = pickle.loads(value)
+            if now - accessed > self.access_resolution:
+                stale.append(key)
+        if stale:
+            self._touch_accessed(stale, now)
+        hits = Counter(_family(key) for key, value in mapped.items() if value in out)
+        misses = Counter(_family(key) for key, value in mapped.items() if value not in out)
+        _count_by_family(hits.items(), "hits")
+        _count_by_family(misses.items(), "misses")
+        return out
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._conn().execute(
+            "UPDATE cache SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (self._expires(timeout), key, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._conn().execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._conn().execute(
+            "SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)", (key, time.time())
+        ).fetchone() is not None
+
+    def incr(self, key, delta=1, version=None):
+        """Atómico entre procesos (lectura y escritura en la misma transacción)."""
+        key = self.make_and_validate_key(key, version=version)
+
+        def incr(conn):
+            row = conn.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None or (row[1] is not None and row[1] <= time.time()):
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            conn.execute("UPDATE cache SET value = ?, size = ? WHERE key = ?", (blob, len(blob) + len(key), key))
+            return value
+
+        return self._write(incr)
+
+    def clear(self):
+        self._write(lambda conn: conn.execute("DELETE FROM cache"))
+
+    def delete_expired(self) -> int:
+        """Borra las entradas caducadas; devuelve cuántas."""
+        return self._write(lambda conn: self._delete_expired(conn, time.time()))
+
+    def close(self, **kwargs):
+        # La conexión se reutiliza entre peticiones del mismo hilo
+        pass
+
+    # -- estadísticas ----------------------------------------------------
+
+    def info(self) -> dict:
+        """Entradas y bytes ocupados frente al límite."""
+        conn = self._conn()
+        (entries,) = conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        (size,) = conn.execute("SELECT bytes FROM cache_size WHERE id = 0").fetchone()
+        return {"backend": "sqlite", "path": self.path, "entries": entries,
+                "bytes": size, "max_bytes": self.max_bytes}
+
+    def usage(self) -> dict:
+        """{familia: {"entries", "bytes"}} de lo guardado (todos los workers)."""
+        rows = self._conn().execute("SELECT family, COUNT(*), SUM(size) FROM cache GROUP BY family")
+        return {family: {"entries": entries, "bytes": size} for family, entries, size in rows}
@@ -0,0 +1,256 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""
+Sinastría: aspectos cruzados entre dos cartas y búsqueda de las cartas más
+compatibles dentro de una población.
+
+Puntuación: cada aspecto cruzado aporta
+    ASPECT_SCORES[aspecto] × (1 − orbe / orbe máximo) × peso(cuerpo A) × peso(cuerpo B)
+Los planetas transpersonales pesan 0: son generacionales y no distinguen entre
+personas de edad parecida.
+
+Para el modo uno-contra-muchos, las longitudes de la población se guardan
+cuantizadas en uint16 (65536 unidades por vuelta, ~0,0055°). La diferencia
+entre dos longitudes es entonces una resta uint16 (el desbordamiento hace el
+módulo 360°) y la puntuación de esa separación sale de una tabla de 65536
+valores. Su error frente al cálculo en float64 tiene una cota fija
+(_APPROX_ERROR): se vuelven a puntuar en float64 todos los candidatos que no
+quedan por debajo de la k-ésima puntuación aproximada menos dos veces esa
+cota, así que tanto las cartas del top-k como sus puntuaciones son exactas.
+"""
+
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from .aspect_engine import AspectTable, separation_matrix
+from .services import ASPECTS
+
+# Cuerpos de los vectores de longitudes de la población (en este orden)
+SYNASTRY_BODIES = ["sun", "moon", "mercury", "venus", "mars",
+                   "jupiter", "saturn", "uranus", "neptune", "pluto"]
+
+BODY_WEIGHTS = {
+    "sun": 1.5, "moon": 1.5,
+    "venus": 1.25, "mars": 1.25,
+    "mercury": 1.0,
+    "jupiter": 0.5, "saturn": 0.5,
+}
+
+# Armónicos suman, tensos restan
+ASPECT_SCORES = {
+    "Conjunction": 1.0,
+    "Trine": 1.0,
+    "Sextile": 0.7,
+    "Opposition": -0.3,
+    "Square": -0.6,
+    "Quincunx": -0.2,
+}
+
+SYNASTRY_ASPECTS = AspectTable(ASPECTS)
+
+MAX_TOP_K = 100
+MAX_INLINE_POOL = 10000
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+SYNASTRY_POOL_PATH = os.environ.get(
+    "SYNASTRY_POOL_PATH",
+    str(Path(os.environ.get("ASTROAPI_DATA_DIR", BASE_DIR / "data")) / "synastry_pool.npz"),
+)
+
+_UNITS = 65536
+_ASPECT_SCORE_ARRAY = np.array([ASPECT_SCORES[name] for name in SYNASTRY_ASPECTS.names])
+_ASPECT_ORBS = SYNASTRY_ASPECTS.orbs[0]
+
+
+def body_longitudes(planets: dict) -> dict:
+    """
+    {cuerpo: longitud} a partir de `planets` de /api/compute/
+    ({"sun": {"value": ...}}), de {"sun": {"longitude": ...}} o de {"sun": 123.4}.
+    """
+    out = {}
+    for name, data in planets.items():
+        if isinstance(data, dict):
+            data = data["value"] if "value" in data else data["longitude"]
+        out[name] = float(data)
+    return out
+
+
+def longitude_vector(planets: dict) -> np.ndarray:
+    """Vector de longitudes en el orden de SYNASTRY_BODIES (acepta también una lista)."""
+    if isinstance(planets, (list, tuple)):
+        vector = np.asarray(planets, dtype=float)
+        if vector.shape != (len(SYNASTRY_BODIES),):
+            raise ValueError(f"Expected {len(SYNASTRY_BODIES)} longitudes ({', '.join(SYNASTRY_BODIES)}).")
+        return vector % 360.0
+    lons = body_longitudes(planets)
+    missing = [name for name in SYNASTRY_BODIES if name not in lons]
+    if missing:
+        raise ValueError(f"Missing bodies: {', '.join(missing)}")
+    return np.array([lons[name] for name in SYNASTRY_BODIES]) % 360.0
+
+
+def _aspect_strength(separations: np.ndarray) -> np.ndarray:
+    """Σ_aspectos ASPECT_SCORES × (1 − orbe/orbe máx.) para separaciones 0–180°."""
+    diff = np.abs(separations[..., None] - SYNASTRY_ASPECTS.angles)
+    return (_ASPECT_SCORE_ARRAY * np.clip(1.0 - diff / _ASPECT_ORBS, 0.0, None)).sum(axis=-1)
+
+
+def _pair_weights(names_a: list, names_b: list) -> np.ndarray:
+    wa = np.array([BODY_WEIGHTS.get(name, 0.0) for name in names_a])
+    wb = np.array([BODY_WEIGHTS.get(name, 0.0) for name in names_b])
+    return wa[:, None] * wb[None, :]
+
+
+def compute_synastry(planets_a: dict, planets_b: dict) -> dict:
+    """Aspectos cruzados (cada cuerpo de A con cada cuerpo de B) y puntuación total."""
+    lons_a, lons_b = body_longitudes(planets_a), body_longitudes(planets_b)
+    names_a, names_b = list(lons_a), list(lons_b)
+    sep = separation_matrix(list(lons_a.values()), list(lons_b.values()))
+    weights = _pair_weights(names_a, names_b)
+    rows, cols, idx, orbs = SYNASTRY_ASPECTS.match(sep)
+
+    aspects = []
+    for i, j, a, orb in zip(rows.tolist(), cols.tolist(), idx.tolist(), orbs.tolist()):
+        name = SYNASTRY_ASPECTS.names[a]
+        score = ASPECT_SCORES[name] * (1.0 - orb / _ASPECT_ORBS[a]) * weights[i, j]
+        aspects.append({
+            "planet_a": names_a[i],
+            "planet_b": names_b[j],
+            "aspect": name,
+            "angle": round(sep[i, j].item(), 4),
+            "orb": round(orb, 4),
+            "score": round(score, 4),
+        })
+    return {"aspects": aspects, "score": round(sum(a["score"] for a in aspects), 4)}
+
+
+def quantize(longitudes) -> np.ndarray:
+    """Longitudes (grados) → uint16 con 65536 unidades por vuelta."""
+    units = np.rint(np.asarray(longitudes, dtype=float) % 360.0 * (_UNITS / 360.0))
+    return (units.astype(np.int64) % _UNITS).astype(np.uint16)
+
+
+def _build_lut() -> np.ndarray:
+    """Puntuación de cada diferencia cuantizada (0–65535) entre dos longitudes."""
+    angles = np.arange(_UNITS) * (360.0 / _UNITS)
+    return _aspect_strength(np.minimum(angles, 360.0 - angles)).astype(np.float32)
+
+
+_LUT = _build_lut()
+_WEIGHTS = _pair_weights(SYNASTRY_BODIES, SYNASTRY_BODIES)
+# Pares (i, j) con peso y una tabla ya multiplicada por cada peso distinto
+_PAIRS = [(i, j) for i, j in zip(*np.nonzero(_WEIGHTS))]
+_WEIGHTED_LUTS = {w: (_LUT * w).astype(np.float32) for w in set(_WEIGHTS[_WEIGHTS > 0].tolist())}
+
+
+def _approximation_error() -> float:
+    """
+    Cota de |approximate_scores − exact_scores| para cualquier par de cartas.
+    Cada longitud cuantizada se mueve como mucho media unidad, así que cada
+    separación se mueve una unidad como mucho y su puntuación, la pendiente
+    máxima de _aspect_strength por esa unidad. Se suma el redondeo a float32
+    de las tablas y de la suma de los pares.
+    """
+    unit = 360.0 / _UNITS
+    separations = np.arange(_UNITS // 2 + 1) * unit
+    near = np.abs(separations[:, None] - SYNASTRY_ASPECTS.angles) <= _ASPECT_ORBS + unit
+    slope = (near * np.abs(_ASPECT_SCORE_ARRAY) / _ASPECT_ORBS).sum(axis=1).max()
+    weights = _WEIGHTS[_WEIGHTS > 0]
+    rounding = np.finfo(np.float32).eps * (len(weights) + 1) * (weights * np.abs(_LUT).max()).sum()
+    return float((weights * slope * unit).sum() + rounding)
+
+
+_APPROX_ERROR = _approximation_error()
+
+
+class ChartPool:
+    """Población de cartas: ids + longitudes (N × SYNASTRY_BODIES)."""
+
+    def __init__(self, ids, longitudes):
+        self.ids = np.asarray(ids)
+        self.longitudes = np.asarray(longitudes, dtype=float) % 360.0
+        if self.longitudes.ndim != 2 or self.longitudes.shape[1] != len(SYNASTRY_BODIES):
+            raise ValueError(f"Pool longitudes must be N x {len(SYNASTRY_BODIES)}.")
+        if len(self.ids) != len(self.longitudes):
+            raise ValueError("Pool ids and longitudes differ in length.")
+        # Una fila contigua por cuerpo: cada par recorre memoria secuencial
+        self.codes = np.ascontiguousarray(quantize(self.longitudes).T)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_charts(cls, charts: list):
+        """charts: [{"id", "planets" | "longitudes"}] (p. ej. el "pool" de la petición)."""
+        ids, vectors = [], []
+        for index, chart in enumerate(charts):
+            if not isinstance(chart, dict):
+                raise ValueError(f"Pool item {index} must be a JSON object.")
+            vectors.append(longitude_vector(chart["planets"] if "planets" in chart else chart["longitudes"]))
+            ids.append(str(chart.get("id", index)))
+        return cls(ids, np.array(vectors).reshape(-1, len(SYNASTRY_BODIES)))
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["ids"], data["longitudes"])
+
+    def save(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, ids=self.ids, longitudes=self.longitudes)
+
+    def approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """Puntuación de toda la población con la tabla cuantizada (float32)."""
+        q = quantize(query)
+        scores = np.zeros(len(self), dtype=np.float32)
+        diffs = np.empty(len(self), dtype=np.uint16)
+        values = np.empty(len(self), dtype=np.float32)
+        for i, j in _PAIRS:
+            np.subtract(self.codes[j], q[i], out=diffs)  # uint16: módulo 360° gratis
+            np.take(_WEIGHTED_LUTS[_WEIGHTS[i, j]], diffs, out=values)
+            scores += values
+        return scores
+
+    def exact_scores(self, query: np.ndarray, index: np.ndarray) -> np.ndarray:
+        """Puntuación exacta (float64) de los candidatos `index`."""
+        d = np.abs(query[None, :, None] - self.longitudes[index][:, None, :])
+        sep = np.where(d > 180, 360.0 - d, d)
+        return (_aspect_strength(sep) * _WEIGHTS).sum(axis=(1, 2))
+
+    def top_k(self, planets, k: int = 10) -> list:
+        """Las k cartas más compatibles con `planets`: [{"id", "score"}] de mayor a menor."""
+        query = longitude_vector(planets)
+        k = min(k, len(self))
+        if k <= 0:
+            return []
+        approx = self.approximate_scores(query)
+        # Hay k cartas con exacta ≥ kth − error, así que cada una del top-k exacto
+        # tiene aproximada ≥ kth − 2·error: ninguna queda fuera de los candidatos
+        kth = np.partition(approx, len(self) - k)[len(self) - k]
+        candidates = np.flatnonzero(approx >= kth - 2 * _APPROX_ERROR)
+        exact = self.exact_scores(query, candidates)
+        order = np.lexsort((candidates, -exact))[:k]
+        return [{"id": self.ids[i].item(), "score": round(float(exact[o]), 4)}
+                for o, i in zip(order, candidates[order])]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Población guardada en SYNASTRY_POOL_PATH (None si no existe)."""
+    global _pool
+    if _pool is None and Path(SYNASTRY_POOL_PATH).exists():
+        with _pool_lock:
+            if _pool is None:
+                _pool = ChartPool.load(SYNASTRY_POOL_PATH)
+    return _pool
@@ -0,0 +1,131 @@
+# backend/api/tests/test_admission.py
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from .. import monthly_store
+from ..admission import AdmissionGate, Overloaded, admitted
+
+
+class AdmissionGateTest(SimpleTestCase):
+    def test_queue_full_sheds_and_release_hands_over(self):
+        gate = AdmissionGate("test", limit=1, queue=1, timeout=5)
+
+        async def main():
+            await gate.acquire()
+            waiter = asyncio.ensure_future(gate.acquire())
+            await asyncio.sleep(0)
+            with self.assertRaises(Overloaded) as ctx:
+                await gate.acquire()
+            self.assertEqual(ctx.exception.reason, "queue full")
+            gate.release()
+            await waiter  # la plaza pasa a la petición en cola
+            gate.release()
+
+        asyncio.run(main())
+        info = gate.info()
+        self.assertEqual((info["running"], info["waiting"]), (0, 0))
+        self.assertEqual((info["admitted"], info["queued"], info["shed_full"], info["peak_waiting"]), (2, 1, 1, 1))
+
+    def test_queue_timeout(self):
+        gate = AdmissionGate("test", limit=1, queue=4, timeout=0.02, retry_after=7)
+
+        async def main():
+            await gate.acquire()
+            with self.assertRaises(Overloaded) as ctx:
+                await gate.acquire()
+            gate.release()
+            return ctx.exception
+
+        exc = asyncio.run(main())
+        self.assertEqual((exc.reason, exc.retry_after), ("queue timeout", 7))
+        info = gate.info()
+        self.assertEqual((info["running"], info["waiting"], info["shed_timeout"]), (0, 0, 1))
+
+    def test_cancelled_waiter_leaves_queue(self):
+        gate = AdmissionGate("test", limit=1, queue=4, timeout=5)
+
+        async def main():
+            await gate.acquire()
+            waiter = asyncio.ensure_future(gate.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            gate.release()
+
+        asyncio.run(main())
+        self.assertEqual((gate.info()["running"], gate.info()["waiting"]), (0, 0))
+
+    def test_cancelled_request_keeps_slot_until_compute_ends(self):
+        # Cliente desconectado: el hilo sigue calculando y la plaza sigue ocupada
+        gate = AdmissionGate("test", limit=1, queue=4, timeout=5)
+        started, finish = threading.Event(), threading.Event()
+
+        def work():
+            started.set()
+            finish.wait(5)
+
+        async def main():
+            task = asyncio.ensure_future(admitted("test", work))
+            await asyncio.to_thread(started.wait, 5)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return gate.info()["running"]
+
+        with mock.patch.dict("api.admission._gates", {"test": gate}):
+            self.assertEqual(asyncio.run(main()), 1)
+        finish.set()
+        deadline = time.monotonic() + 5
+        while gate.info()["running"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(gate.info()["running"], 0)
+
+    def test_concurrency_is_bounded(self):
+        gate = AdmissionGate("test", limit=2, queue=100, timeout=5)
+        peak = []
+
+        def work():
+            peak.append(gate.info()["running"])
+
+        async def main():
+            await asyncio.gather(*(admitted("test", work) for _ in range(20)))
+
+        with mock.patch.dict("api.admission._gates", {"test": gate}):
+            asyncio.run(main())
+        self.assertEqual(len(peak), 20)
+        self.assertLessEqual(max(peak), 2)
+        self.assertEqual(gate.info()["running"], 0)
+
+
+class AdmissionMiddlewareTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        store = monthly_store.MonthlyTransitsStore(os.path.join(self.tmpdir.name, "monthly.sqlite3"))
+        patcher = mock.patch.object(monthly_store, "_store", store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cached_answers_bypass_a_full_gate(self):
+        cached = reverse("monthly_transits", args=[9, 2025])
+        self.assertEqual(self.client.get(cached).status_code, 200)
+
+        closed = AdmissionGate("monthly", limit=0, queue=0, retry_after=3)
+        with mock.patch.dict("api.admission._gates", {"monthly": closed}):
+            self.assertEqual(self.client.get(cached).status_code, 200)
+            r = self.client.get(reverse("monthly_transits", args=[10, 2025]))
+            self.assertEqual(r.status_code, 503)
+            self.assertEqual(r["Retry-After"], "3")
+            self.assertEqual(r.json()["endpoint"], "monthly")
+            self.assertNotIn("public", r.get("Cache-Control", ""))
+            stats = self.client.get(reverse("cache_stats")).json()["admission"]
+        self.assertEqual(stats["monthly"]["shed_full"], 1)
+        self.assertIn("horoscope", stats)
@@ -0,0 +1,71 @@
+# backend/api/tests/test_aspect_engine.py
+import random
+
+from django.test import SimpleTestCase
+
+from ..horoscope_service import ASPECTS_CONFIG, FAST_PLANETS, angular_distance, find_aspects_to_natal
+from ..services import ASPECTS, angular_sep, compute_aspects
+
+
+def loop_compute_aspects(planets):
+    """Implementación anterior (bucles anidados) como referencia."""
+    names = list(planets.keys())
+    out = []
+    for i in range(len(names)):
+        for j in range(i + 1, len(names)):
+            a, b = names[i], names[j]
+            sep = angular_sep(planets[a]["value"], planets[b]["value"])
+            for asp in ASPECTS:
+                diff = abs(sep - asp["angle"])
+                if diff <= asp["orb"]:
+                    out.append({"planet_a": a, "planet_b": b, "aspect": asp["name"],
+                                "angle": round(sep, 4), "orb": round(diff, 4)})
+    return out
+
+
+def loop_find_aspects_to_natal(transits, natal_planets):
+    aspects = []
+    for transit_name, transit_data in transits.items():
+        is_fast = transit_name in FAST_PLANETS
+        for natal_name, natal_data in natal_planets.items():
+            distance = angular_distance(transit_data["longitude"], natal_data["longitude"])
+            for asp_config in ASPECTS_CONFIG:
+                orb = asp_config["orb_fast"] if is_fast else asp_config["orb_slow"]
+                diff = abs(distance - asp_config["angle"])
+                if diff <= orb:
+                    is_applying = transit_data["speed"] > 0
+                    weight = (10 if is_fast else 5) + (3 if is_applying else 0)
+                    if asp_config["name"] in ["Trígono", "Sextil"]:
+                        weight += 2
+                    aspects.append({"transit_planet": transit_name, "natal_planet": natal_name,
+                                    "aspect": asp_config["name"], "angle": distance, "orb": diff,
+                                    "applying": is_applying, "weight": weight})
+    return sorted(aspects, key=lambda x: x["weight"], reverse=True)
+
+
+class AspectEngineTest(SimpleTestCase):
+    def setUp(self):
+        self.rng = random.Random(42)
+
+    def bodies(self, n, prefix="b"):
+        names = FAST_PLANETS + ["jupiter", "saturn"] + [f"{prefix}{i}" for i in range(n)]
+        return {name: self.rng.uniform(-30, 400) for name in names[:n]}
+
+    def test_compute_aspects_identical(self):
+        for n in (2, 13, 50):
+            planets = {name: {"value": lon} for name, lon in self.bodies(n).items()}
+            # Separaciones exactamente en el límite del orbe
+            planets["edge_a"] = {"value": 10.0}
+            planets["edge_b"] = {"value": 18.0}
+            self.assertEqual(compute_aspects(planets), loop_compute_aspects(planets))
+
+    def test_find_aspects_to_natal_identical(self):
+        for n in (1, 10, 40):
+            transits = {name: {"longitude": lon % 360, "speed": self.rng.uniform(-1, 1)}
+                        for name, lon in self.bodies(n).items()}
+            natal = {name: {"longitude": lon % 360} for name, lon in self.bodies(n + 3, "n").items()}
+            self.assertEqual(find_aspects_to_natal(transits, natal), loop_find_aspects_to_natal(transits, natal))
+
+    def test_empty(self):
+        self.assertEqual(compute_aspects({}), [])
+        self.assertEqual(find_aspects_to_natal({}, {"sun": {"longitude": 1.0}}), [])
@@ -0,0 +1,199 @@
+# backend/api/tests/test_async_views.py
+import asyncio
+import json
+import threading
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import AsyncClient, SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from .. import views
+from ..cache_manager import natal_cache, response_cache, transits_cache
+from ..cache_stats import CacheStatsRecorder
+from ..monthly_store import MonthlyTransitsStore
+from ..offload import ComputeExecutor
+from ..sqlite_cache import SQLiteCache
+from .test_chart_registry import BIRTH
+
+
+def asgi_request(path: str, query: str = "", method: str = "GET", body: bytes = b"", on_send=None) -> list:
+    """
+    Petición por el ASGIHandler real (como uvicorn, sin red): devuelve los
+    mensajes enviados. `on_send(mensaje)` se llama al enviar cada uno.
+    """
+    from backend.asgi import application
+
+    sent = []
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "headers": [(b"host", b"testserver"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 5000), "server": ("testserver", 80),
+    }
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()  # el cliente no se desconecta
+
+    async def send(message):
+        sent.append(message)
+        if on_send:
+            on_send(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+class ComputeExecutorTest(SimpleTestCase):
+    def test_concurrency_is_bounded(self):
+        executor = ComputeExecutor(max_workers=2)
+        threads = set()
+
+        def work(i):
+            threads.add(threading.current_thread().name)
+            time.sleep(0.02)
+            return i * i
+
+        async def main():
+            return await asyncio.gather(*(executor.run(work, i) for i in range(12)))
+
+        try:
+            self.assertEqual(asyncio.run(main()), [i * i for i in range(12)])
+        finally:
+            executor.shutdown()
+        info = executor.info()
+        self.assertEqual((info["submitted"], info["running"]), (12, 0))
+        self.assertLessEqual(info["peak_running"], 2)
+        self.assertTrue(all(name.startswith("compute") for name in threads))
+
+    def test_loop_keeps_running_while_computing(self):
+        executor = ComputeExecutor(max_workers=1)
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        async def main():
+            await asyncio.gather(executor.run(time.sleep, 0.1), ticker())
+
+        try:
+            asyncio.run(main())
+        finally:
+            executor.shutdown()
+        self.assertEqual(len(ticks), 5)
+        self.assertLess(ticks[-1] - ticks[0], 0.1)
+
+
+class AsgiEntryPointTest(SimpleTestCase):
+    def test_application(self):
+        from django.core.handlers.asgi import ASGIHandler
+
+        from backend.asgi import application
+
+        self.assertIsInstance(application, ASGIHandler)
+
+    def test_compute_views_are_async(self):
+        for view in (views.compute_chart_view, views.compute_batch_view, views.daily_horoscope_view,
+                     views.transits_view, views.monthly_transits_view, views.eclipses_view,
+                     views.synastry_view, views.synastry_top_view, views.horoscope_batch_view):
+            self.assertTrue(asyncio.iscoroutinefunction(view), view.__name__)
+
+    def test_middleware_chain_is_async_capable(self):
+        # Un middleware solo síncrono serializaría todas las vistas async en un hilo
+        for path in settings.MIDDLEWARE:
+            self.assertTrue(getattr(import_string(path), "async_capable", False), path)
+
+
+class AsyncViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        natal_cache.clear()
+        response_cache.clear()
+        transits_cache.clear()
+        self.async_client = AsyncClient()
+
+    async def test_cache_hit_stays_on_loop(self):
+        query = {"date": "2031-01-02", "timezone": "UTC"}
+        first = await self.async_client.get(reverse("transits"), query)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["Access-Control-Allow-Origin"], "*")
+        self.assertIn("X-Response-Time", first)
+        with mock.patch("api.views.offload") as offload:
+            second = await self.async_client.get(reverse("transits"), query)
+        offload.assert_not_called()
+        self.assertEqual(second.json(), first.json())
+
+    async def test_sqlite_stays_off_loop(self):
+        # Ninguna conexión SQLite (L2, almacén mensual, volcado de estadísticas) en el hilo del bucle
+        on_loop = []
+
+        def spy(original):
+            def conn(self):
+                try:
+                    asyncio.get_running_loop()
+                    on_loop.append(type(self).__name__)
+                except RuntimeError:
+                    pass
+                return original(self)
+            return conn
+
+        r = await self.async_client.post(reverse("register_chart"), data=json.dumps(BIRTH),
+                                         content_type="application/json")
+        chart_id = r.json()["chart_id"]
+        stats = CacheStatsRecorder(settings.TEST_DATA_DIR + "/stats-off-loop.sqlite3", flush_interval=0)
+        requests = [
+            ("get", reverse("transits"), {"date": "2031-01-02", "timezone": "UTC"}),
+            ("get", reverse("daily_horoscope"), {"chart_id": chart_id, "target_date": "2031-01-02"}),
+            ("post", reverse("daily_horoscope"), {"chart_id": chart_id, "target_date": "2031-01-03"}),
+            ("get", reverse("horoscope_range"), {"chart_id": chart_id, "start": "2031-01-02", "days": 2}),
+            ("post", reverse("compute_chart"), BIRTH),
+            ("get", reverse("monthly_transits", args=[1, 2031]), {}),
+        ]
+        with mock.patch.object(SQLiteCache, "_conn", spy(SQLiteCache._conn)), \
+                mock.patch.object(CacheStatsRecorder, "_conn", spy(CacheStatsRecorder._conn)), \
+                mock.patch.object(MonthlyTransitsStore, "_conn", spy(MonthlyTransitsStore._conn)), \
+                mock.patch("api.sqlite_cache.recorder", stats), mock.patch("api.monthly_store.recorder", stats):
+            for _ in range(2):  # fallos y luego aciertos de L2
+                for method, url, data in requests:
+                    if method == "get":
+                        r = await self.async_client.get(url, data)
+                    else:
+                        r = await self.async_client.post(url, data=json.dumps(data), content_type="application/json")
+                    self.assertEqual(r.status_code, 200, url)
+                natal_cache.clear()
+                response_cache.clear()
+                transits_cache.clear()
+        self.assertEqual(on_loop, [])
+        self.assertGreater(stats.totals()["transits"]["hits"], 0)
+
+    async def test_compute_miss_goes_to_executor(self):
+        with mock.patch("api.views.offload", wraps=views.offload) as offload:
+            r = await self.async_client.post(reverse("compute_chart"), data=json.dumps(BIRTH),
+                                             content_type="application/json")
+            self.assertEqual(r.status_code, 200)
+            self.assertEqual(offload.call_count, 1)
+            await self.async_client.post(reverse("compute_chart"), data=json.dumps(BIRTH),
+                                         content_type="application/json")
+            self.assertEqual(offload.call_count, 1)
+
+    async def test_horoscope_by_chart_id(self):
+        r = await self.async_client.post(reverse("register_chart"), data=json.dumps(BIRTH),
+                                         content_type="application/json")
+        chart_id = r.json()["chart_id"]
+        natal_cache.clear()  # la carta sale de la base de datos vía sync_to_async
+        url = reverse("daily_horoscope")
+        r = await self.async_client.get(url, {"chart_id": chart_id, "target_date": "2031-01-02"})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["date"], "2031-01-02")
+        r = await self.async_client.get(url, {"chart_id": "0" * 64, "target_date": "2031-01-02"})
+        self.assertEqual(r.status_code, 404)
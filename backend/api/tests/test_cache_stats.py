@@ -0,0 +1,74 @@
+# backend/api/tests/test_cache_stats.py
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from ..cache_manager import transits_cache
+from ..cache_stats import CacheStatsRecorder, family_of
+from ..sqlite_cache import SQLiteCache
+
+
+class CacheStatsTest(SimpleTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.stats_path = os.path.join(self.tmpdir.name, "stats.sqlite3")
+
+    def test_families(self):
+        self.assertEqual(family_of("transits:2025-10-09-12:UTC"), "transits")
+        self.assertEqual(family_of("chart:abc"), "natal")
+        self.assertEqual(family_of("singleflight:natal:abc"), "other")
+
+    def test_totals_add_up_across_workers(self):
+        a = CacheStatsRecorder(self.stats_path, flush_interval=3600)
+        b = CacheStatsRecorder(self.stats_path, flush_interval=3600)
+        a.record("transits", "hits", 3)
+        b.record("transits", "hits", 2)
+        b.record("natal", "misses")
+        a.flush()
+        totals = b.totals()
+        self.assertEqual(totals["transits"]["hits"], 5)
+        self.assertEqual(totals["natal"]["misses"], 1)
+
+    def test_sqlite_cache_counts_by_family(self):
+        stats = CacheStatsRecorder(self.stats_path, flush_interval=3600)
+        backend = SQLiteCache(os.path.join(self.tmpdir.name, "cache.sqlite3"), {"OPTIONS": {"MAX_BYTES": 6000}})
+        with mock.patch("api.sqlite_cache.recorder", stats):
+            backend.set("transits:a", b"x" * 1000, 60)
+            backend.set("horoscope:a", b"x" * 1000, 1)
+            backend.get("transits:a")
+            backend.get("transits:missing")
+            backend.get_many(["transits:a", "natal:missing"])
+            self.assertEqual(backend.usage()["transits"]["entries"], 1)
+            with mock.patch("api.sqlite_cache.time.time", return_value=time.time() + 30):
+                backend.delete_expired()
+            for i in range(6):
+                backend.set(f"natal:{i}", b"x" * 1000, 60)
+        totals = stats.totals()
+        self.assertEqual(totals["transits"]["hits"], 2)
+        self.assertEqual(totals["transits"]["misses"], 1)
+        self.assertEqual(totals["natal"]["misses"], 1)
+        self.assertEqual(totals["horoscope"]["expirations"], 1)
+        self.assertEqual(totals["natal"]["sets"], 6)
+        self.assertGreater(totals["transits"]["evictions"] + totals["natal"]["evictions"], 0)
+
+    def test_stats_endpoint(self):
+        cache.clear()
+        stats = CacheStatsRecorder(self.stats_path, flush_interval=3600)
+        with mock.patch("api.cache_stats.recorder", stats), mock.patch("api.sqlite_cache.recorder", stats), \
+                mock.patch("api.monthly_store.recorder", stats):
+            for _ in range(2):
+                transits_cache.clear()  # la segunda lectura llega a SQLite
+                self.client.get(reverse("transits"), {"date": "2031-01-02", "timezone": "UTC"})
+            report = self.client.get(reverse("cache_stats")).json()["cache"]
+        transits = report["families"]["transits"]
+        self.assertEqual((transits["hits"], transits["misses"], transits["sets"]), (1, 1, 1))
+        self.assertEqual(transits["hit_ratio"], 0.5)
+        self.assertEqual(transits["entries"], 1)
+        self.assertGreater(transits["bytes"], 0)
+        self.assertIn("monthly", report["families"])
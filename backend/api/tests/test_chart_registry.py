@@ -0,0 +1,62 @@
+# backend/api/tests/test_chart_registry.py
+import json
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..cache_manager import natal_cache, response_cache
+from ..chart_registry import chart_id_for
+from ..models import NatalChart
+
+BIRTH = {
+    "datetime": "1992-02-14T20:30:00",
+    "timezone": "Europe/Madrid",
+    "latitude": 41.5421,
+    "longitude": 2.1094,
+    "house_system": "placidus",
+    "topocentric_moon_only": False,
+}
+
+
+class ChartRegistryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        natal_cache.clear()
+        response_cache.clear()
+
+    def post(self, name, payload):
+        return self.client.post(reverse(name), data=json.dumps(payload), content_type="application/json")
+
+    def test_chart_id_is_stable(self):
+        chart_id = chart_id_for(BIRTH)
+        self.assertRegex(chart_id, r"^[0-9a-f]{64}$")
+        same = dict(BIRTH, datetime="1992-02-14T19:30:00", timezone="UTC", fields=["planets"])
+        self.assertEqual(chart_id_for(same), chart_id)
+        self.assertNotEqual(chart_id_for(dict(BIRTH, house_system="koch")), chart_id)
+
+    def test_register_and_horoscope_by_id(self):
+        r = self.post("register_chart", BIRTH)
+        self.assertEqual(r.status_code, 201)
+        chart_id = r.json()["chart_id"]
+        self.assertEqual(chart_id, chart_id_for(BIRTH))
+        self.assertEqual(self.post("register_chart", BIRTH).json()["chart_id"], chart_id)
+        self.assertEqual(NatalChart.objects.count(), 1)
+
+        stored = self.client.get(reverse("chart_detail", args=[chart_id])).json()
+        self.assertEqual(stored["chart"], r.json()["chart"])
+
+        natal_cache.clear()  # la carta sale de la base de datos
+        by_id = self.post("daily_horoscope", {"chart_id": chart_id, "target_date": "2025-10-09"}).json()
+        self.assertFalse(by_id["_from_cache"])
+        full = self.post("daily_horoscope", {"birth_data": r.json()["chart"], "target_date": "2025-10-09"}).json()
+        by_id.pop("_from_cache"), full.pop("_from_cache")
+        self.assertEqual(by_id, full)
+
+        again = self.post("daily_horoscope", {"chart_id": chart_id, "target_date": "2025-10-09"}).json()
+        self.assertTrue(again["_from_cache"])
+
+    def test_unknown_chart_id(self):
+        r = self.post("daily_horoscope", {"chart_id": "0" * 64})
+        self.assertEqual(r.status_code, 404)
+        self.assertEqual(self.client.get(reverse("chart_detail", args=["nope"])).status_code, 404)
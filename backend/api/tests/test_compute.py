@@ -71,6 +71,88 @@ class ComputeAPITest(TestCase):
         print(f"Aspectos encontrados: {len(data['aspects'])}")
 
 
+class ComputeBatchAPITest(TestCase):
+    def test_batch_preserves_order_and_reports_item_errors(self):
+        url = reverse("compute_batch")
+        base = {
+            "datetime": "1992-02-14T20:30:00",
+            "timezone": "Europe/Madrid",
+            "latitude": 41.5421,
+            "longitude": 2.1094,
+            "house_system": "placidus",
+            "topocentric_moon_only": False
+        }
+        missing_tz = {k: v for k, v in base.items() if k != "timezone"}
+        bad_tz = dict(base, timezone="Mars/Olympus")
+        r = self.client.post(url, data=json.dumps([base, missing_tz, bad_tz, base]), content_type="application/json")
+        self.assertEqual(r.status_code, 200)
+        data = r.json()
+
+        self.assertEqual(data["count"], 4)
+        self.assertEqual(data["errors"], 2)
+        self.assertEqual([item["index"] for item in data["results"]], [0, 1, 2, 3])
+        self.assertIn("timezone", data["results"][1]["error"])
+        self.assertIn("Unknown timezone", data["results"][2]["error"])
+        self.assertIn("charts_per_second", data["meta"])
+
+        # Cada carta del lote coincide con la del endpoint individual
+        single = self.client.post(reverse("compute_chart"), data=json.dumps(base), content_type="application/json").json()
+        self.assertEqual(data["results"][0]["chart"]["planets"], single["planets"])
+        self.assertEqual(data["results"][3]["chart"]["houses"], single["houses"])
+
+    def test_batch_rejects_non_list(self):
+        r = self.client.post(reverse("compute_batch"), data=json.dumps({"charts": "nope"}), content_type="application/json")
+        self.assertEqual(r.status_code, 400)
+
+
+class ComputeSelectionAPITest(TestCase):
+    base = {
+        "datetime": "1992-02-14T20:30:00",
+        "timezone": "Europe/Madrid",
+        "latitude": 41.5421,
+        "longitude": 2.1094,
+        "house_system": "placidus",
+        "topocentric_moon_only": True,
+    }
+
+    def post(self, payload):
+        return self.client.post(reverse("compute_chart"), data=json.dumps(payload), content_type="application/json")
+
+    def test_big_three(self):
+        full = self.post(self.base).json()
+        r = self.post(dict(self.base, bodies=["moon", "sun"], fields=["planets", "houses"]))
+        self.assertEqual(r.status_code, 200)
+        data = r.json()
+
+        self.assertEqual(list(data["planets"]), ["sun", "moon"])
+        self.assertNotIn("aspects", data)
+        self.assertNotIn("formatted", data["planets"]["moon"])
+        self.assertNotIn("formatted", data["houses"]["asc"])
+        # Mismos valores que en la carta completa (Luna topocéntrica incluida)
+        for name in ("sun", "moon"):
+            self.assertEqual(data["planets"][name]["value"], full["planets"][name]["value"])
+        self.assertEqual(data["houses"]["asc"]["value"], full["houses"]["asc"]["value"])
+
+    def test_aspects_only_between_selected_bodies(self):
+        data = self.post(dict(self.base, bodies=["sun", "moon", "venus"], fields=["aspects"])).json()
+        self.assertNotIn("planets", data)
+        self.assertNotIn("houses", data)
+        for aspect in data["aspects"]:
+            self.assertIn(aspect["planet_a"], ("sun", "moon", "venus"))
+            self.assertIn(aspect["planet_b"], ("sun", "moon", "venus"))
+
+    def test_invalid_selection(self):
+        self.assertEqual(self.post(dict(self.base, bodies=["vulcan"])).status_code, 400)
+        self.assertEqual(self.post(dict(self.base, fields="houses")).status_code, 400)
+
+    def test_cache_key_includes_selection(self):
+        from ..cache_manager import CacheManager
+        big_three = dict(self.base, bodies=["sun", "moon"], fields=["planets", "houses"])
+        reordered = dict(self.base, bodies=["moon", "sun"], fields=["houses", "planets"])
+        self.assertEqual(CacheManager.get_natal_chart_key(big_three), CacheManager.get_natal_chart_key(reordered))
+        self.assertNotEqual(CacheManager.get_natal_chart_key(big_three), CacheManager.get_natal_chart_key(self.base))
+
+
 class MonthlyTransitsTest(TestCase):
     def test_monthly_transits_october_2025(self):
         from ..services import get_important_transits
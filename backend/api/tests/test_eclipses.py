@@ -0,0 +1,57 @@
+# backend/api/tests/test_eclipses.py
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import eclipses
+from ..admission import Overloaded
+from ..services import get_important_transits
+
+
+class EclipseCatalogTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        patcher = mock.patch.multiple(eclipses, ECLIPSE_INDEX_DIR=Path(self.tmpdir.name), _years={})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_year_catalog_is_computed_once_and_persisted(self):
+        catalog = eclipses.eclipses_for_year(2024)
+        total_solar = [e for e in catalog if e["kind"] == "solar" and e["type"] == "total"]
+        self.assertEqual(len(total_solar), 1)
+        self.assertTrue(total_solar[0]["maximum_utc"].startswith("2024-04-08T18:1"))
+        self.assertAlmostEqual(total_solar[0]["magnitude"], 1.057, delta=0.01)
+        self.assertTrue((Path(self.tmpdir.name) / "eclipses_2024.json").exists())
+
+        # Nuevo proceso: se lee del índice sin volver a llamar a Swiss
+        eclipses._years.clear()
+        with mock.patch.object(eclipses, "compute_year") as compute:
+            self.assertEqual(eclipses.eclipses_for_year(2024), catalog)
+            compute.assert_not_called()
+
+    def test_monthly_transits_use_catalog(self):
+        transits = get_important_transits(9, 2025)
+        found = [(t["aspect"], t["eclipse"]["type"]) for t in transits if t["is_eclipse"]]
+        self.assertEqual(found, [("Eclipse Lunar", "total"), ("Eclipse Solar", "partial")])
+        # Sin eclipses ese mes aunque haya Luna Nueva y Llena
+        self.assertFalse(any(t["is_eclipse"] for t in get_important_transits(6, 2025)))
+
+    def test_yearly_endpoint(self):
+        r = self.client.get(reverse("eclipses", args=[2025]))
+        self.assertEqual(r.status_code, 200)
+        data = r.json()
+        self.assertEqual(len(data["eclipses"]), 4)
+        self.assertEqual({e["kind"] for e in data["eclipses"]}, {"solar", "lunar"})
+
+    def test_indexed_year_skips_the_gate(self):
+        eclipses.eclipses_for_year(2025)
+        eclipses._years.clear()  # otro proceso: solo está el índice en disco
+        overloaded = mock.AsyncMock(side_effect=Overloaded("eclipses", "queue full", 5))
+        with mock.patch("api.views.admitted", overloaded):
+            self.assertEqual(self.client.get(reverse("eclipses", args=[2025])).status_code, 200)
+            self.assertEqual(self.client.get(reverse("eclipses", args=[2026])).status_code, 503)
+        overloaded.assert_awaited_once()
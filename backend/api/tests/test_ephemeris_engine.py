@@ -0,0 +1,60 @@
+# backend/api/tests/test_ephemeris_engine.py
+from concurrent.futures import ThreadPoolExecutor
+from django.test import SimpleTestCase
+from django.conf import settings
+
+from ..ephemeris_engine import EphemerisEngine
+from ..services import compute_chart, get_important_transits
+from ..horoscope_service import transit_positions
+
+TOPO_PAYLOAD = {
+    "datetime": "1997-11-06T14:05:00",
+    "timezone": "Europe/Madrid",
+    "latitude": 41.5629623,
+    "longitude": 2.0100492,
+    "house_system": "placidus",
+    "topocentric_moon_only": True
+}
+
+GEO_PAYLOAD = {
+    "datetime": "1992-07-12T23:58:00",
+    "timezone": "America/Tegucigalpa",
+    "latitude": 14.0723,
+    "longitude": -87.1921,
+    "house_system": "placidus",
+    "topocentric_moon_only": False
+}
+
+
+class EphemerisEngineTest(SimpleTestCase):
+    def test_concurrent_topocentric_and_geocentric_charts_are_isolated(self):
+        expected_topo = compute_chart(TOPO_PAYLOAD, settings.SE_EPHE_PATH)
+        expected_geo = compute_chart(GEO_PAYLOAD, settings.SE_EPHE_PATH)
+
+        payloads = [TOPO_PAYLOAD, GEO_PAYLOAD] * 40
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            charts = list(pool.map(lambda p: compute_chart(p, settings.SE_EPHE_PATH), payloads))
+
+        for payload, chart in zip(payloads, charts):
+            expected = expected_topo if payload is TOPO_PAYLOAD else expected_geo
+            self.assertEqual(chart["planets"], expected["planets"])
+
+    def test_process_pool_matches_inline(self):
+        inline = EphemerisEngine(workers=0, ephe_path=settings.SE_EPHE_PATH)
+        pooled = EphemerisEngine(workers=2, ephe_path=settings.SE_EPHE_PATH)
+        try:
+            self.assertTrue(pooled.parallel)
+            charts = pooled.map(compute_chart, [TOPO_PAYLOAD, GEO_PAYLOAD], [settings.SE_EPHE_PATH] * 2)
+            self.assertEqual(charts[0]["planets"], inline.run(compute_chart, TOPO_PAYLOAD, settings.SE_EPHE_PATH)["planets"])
+            self.assertEqual(charts[1]["houses"], inline.run(compute_chart, GEO_PAYLOAD, settings.SE_EPHE_PATH)["houses"])
+
+            jd = 2460000.5
+            self.assertEqual(pooled.run(transit_positions, jd), inline.run(transit_positions, jd))
+            self.assertEqual(pooled.run(get_important_transits, 10, 2025), inline.run(get_important_transits, 10, 2025))
+        finally:
+            pooled.shutdown()
+
+    def test_errors_propagate(self):
+        engine = EphemerisEngine(workers=0)
+        with self.assertRaises(ValueError):
+            engine.run(compute_chart, dict(GEO_PAYLOAD, timezone="Nowhere/Nothing"), settings.SE_EPHE_PATH)
@@ -0,0 +1,96 @@
+# backend/api/tests/test_ephemeris_stream.py
+import json
+import warnings
+from datetime import datetime
+from itertools import groupby
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from .. import ephemeris_stream
+from ..ephemeris_stream import EphemerisRange, instant_chunks, stream_ephemeris, stream_stats
+from ..horoscope_service import transit_positions
+from ..timezones import utc_to_jd_ut
+from .test_async_views import asgi_request
+
+
+def selection(**params):
+    return EphemerisRange.from_query(dict({"start": "2031-01-01", "end": "2031-01-01T09:00", "step": "1h"}, **params))
+
+
+class EphemerisRangeTest(SimpleTestCase):
+    def test_parse(self):
+        sel = selection(step="30m", bodies="moon,sun,moon")
+        self.assertEqual((sel.rows, sel.step_seconds, sel.bodies), (19, 1800, ["moon", "sun"]))
+        self.assertEqual(selection().bodies[0], "sun")
+        for params in ({"step": "1w"}, {"step": "0h"}, {"bodies": "sun,vulcan"}, {"format": "xml"},
+                       {"end": "2030-12-31"}, {"end": "2031-01-01T09:00+02:00"}, {"end": "2300-01-01"}):
+            with self.assertRaises(ValueError):
+                selection(**params)
+        with self.assertRaises(ValueError):
+            EphemerisRange.from_query({"start": "2031-01-01"})
+
+    def test_chunks_are_contiguous(self):
+        chunks = list(instant_chunks(selection(), chunk_rows=4))
+        self.assertEqual([len(stamps) for stamps, _ in chunks], [4, 4, 2])
+        self.assertEqual(chunks[2][0], ["2031-01-01T08:00:00", "2031-01-01T09:00:00"])
+        self.assertAlmostEqual(chunks[1][1][0], utc_to_jd_ut(datetime(2031, 1, 1, 4)), places=6)
+
+    def test_lazy(self):
+        with mock.patch.object(ephemeris_stream, "lookup_many", wraps=ephemeris_stream.lookup_many) as lookup:
+            stream = stream_ephemeris(selection(bodies="moon"), chunk_rows=2)
+            next(stream)
+            self.assertEqual(lookup.call_count, 1)
+            self.assertEqual(len(list(stream)), 4)
+        self.assertEqual(lookup.call_count, 5)
+
+
+class EphemerisViewTest(SimpleTestCase):
+    def test_ndjson(self):
+        streams = stream_stats.streams
+        r = self.client.get(reverse("ephemeris"), {"start": "2031-01-01", "end": "2031-01-02", "step": "6h"})
+        self.assertTrue(r.streaming)
+        self.assertEqual(r["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in b"".join(r.streaming_content).splitlines()]
+        self.assertEqual(len(rows), int(r["X-Total-Rows"]))
+        self.assertEqual(rows[-1]["t"], "2031-01-02T00:00:00")
+
+        expected = transit_positions(utc_to_jd_ut(datetime(2031, 1, 1, 6)))
+        for name, (lon, speed) in expected.items():
+            self.assertAlmostEqual(rows[1][name][0], lon, places=5)
+            self.assertAlmostEqual(rows[1][name][1], speed, places=5)
+        self.assertEqual(stream_stats.streams, streams + 1)
+
+    def test_csv_and_errors(self):
+        r = self.client.get(reverse("ephemeris"), {"start": "2031-01-01", "end": "2031-01-03",
+                                                   "bodies": "moon,chiron", "format": "csv"})
+        lines = b"".join(r.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "t,moon_lon,moon_speed,chiron_lon,chiron_speed")
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[3].startswith("2031-01-03T00:00:00,"))
+        self.assertEqual(self.client.get(reverse("ephemeris"), {"start": "2031-01-01"}).status_code, 400)
+
+    def test_asgi_sends_each_chunk_as_it_is_built(self):
+        events = []
+
+        def traced(sel):
+            for chunk in stream_ephemeris(sel):
+                events.append("built")
+                yield chunk
+
+        def on_send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                events.append("sent")
+
+        # Un año horario: 8760 filas, 5 bloques
+        with mock.patch("api.views.stream_ephemeris", traced), warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            sent = asgi_request(reverse("ephemeris"), "start=2031-01-01&end=2031-12-31T23:00&step=1h",
+                                on_send=on_send)
+        self.assertEqual(sent[0]["status"], 200)
+        # ASGIHandler parte cada bloque en mensajes de 64 KB: cuenta las rachas
+        self.assertEqual([event for event, _ in groupby(events)], ["built", "sent"] * 5)
+        self.assertFalse([w for w in caught if "synchronous iterators" in str(w.message)])
+        rows = b"".join(m.get("body", b"") for m in sent[1:]).splitlines()
+        self.assertEqual(len(rows), 8760)
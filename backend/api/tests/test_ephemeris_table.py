@@ -0,0 +1,54 @@
+# backend/api/tests/test_ephemeris_table.py
+import os
+import tempfile
+
+import numpy as np
+import swisseph as swe
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from ..ephemeris_engine import ensure_ephe_path
+from ..ephemeris_table import EphemerisTable, build_table, FLAGS, TABLE_BODIES
+
+
+class EphemerisTableTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmpdir.name, "table.bin")
+        cls.jd_start = swe.julday(2024, 1, 1, 0.0)
+        cls.header = build_table(cls.path, cls.jd_start, cls.jd_start + 64, ephe_path=settings.SE_EPHE_PATH)
+        cls.table = EphemerisTable(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.table
+        cls.tmpdir.cleanup()
+        super().tearDownClass()
+
+    def test_positions_within_recorded_error_bound(self):
+        ensure_ephe_path(settings.SE_EPHE_PATH)
+        for jd in np.linspace(self.jd_start, self.jd_start + 63.99, 37):
+            positions = self.table.positions(jd)
+            for name, pid in TABLE_BODIES.items():
+                ref = swe.calc_ut(jd, pid, FLAGS)[0]
+                lon, speed = positions[name]
+                err = abs((lon - ref[0] + 180.0) % 360.0 - 180.0)
+                self.assertLessEqual(err, max(self.header["max_error_deg"][name], 1e-6) * 1.5, name)
+                self.assertLess(err, 1e-3, name)
+                self.assertAlmostEqual(speed, ref[3], delta=1e-2)
+
+    def test_vectorized_matches_scalar(self):
+        jds = self.jd_start + np.array([0.0, 3.25, 8.0, 17.7, 63.5])
+        many = self.table.positions_many(jds, ["moon", "pluto"])
+        for i, jd in enumerate(jds):
+            one = self.table.positions(jd, ["moon", "pluto"])
+            for name in ("moon", "pluto"):
+                self.assertAlmostEqual(many[name][0][i], one[name][0], places=9)
+                self.assertAlmostEqual(many[name][1][i], one[name][1], places=9)
+
+    def test_range_is_enforced(self):
+        self.assertFalse(self.table.covers(self.jd_start - 1))
+        with self.assertRaises(ValueError):
+            self.table.positions(self.jd_start + 65)
@@ -0,0 +1,44 @@
+# backend/api/tests/test_event_search.py
+import swisseph as swe
+from django.test import SimpleTestCase
+
+from ..event_search import find_aspect_events, month_jd_range
+from ..ephemeris_table import lookup
+from ..services import MONTHLY_BODIES
+
+
+class AspectEventSearchTest(SimpleTestCase):
+    def test_events_are_exact(self):
+        jd_start, jd_end = month_jd_range(10, 2025)
+        others = [name for name in MONTHLY_BODIES if name != "moon"]
+        stats = {}
+        events = find_aspect_events("moon", others, jd_start, jd_end, MONTHLY_BODIES, stats=stats)
+
+        self.assertTrue(events)
+        self.assertEqual(events, sorted(events, key=lambda e: e["jd_ut"]))
+        for event in events:
+            self.assertTrue(jd_start <= event["jd_ut"] < jd_end)
+            pos = lookup(event["jd_ut"], {"moon": swe.MOON, event["other"]: MONTHLY_BODIES[event["other"]]})
+            sep = abs((pos["moon"][0] - pos[event["other"]][0] + 180.0) % 360.0 - 180.0)
+            target = dict((name, angle) for name, angle in [
+                ("Conjunción", 0), ("Sextil", 60), ("Cuadratura", 90), ("Trígono", 120), ("Oposición", 180)
+            ])[event["aspect"]]
+            self.assertAlmostEqual(sep, target, delta=1e-3)
+
+        # Mucho más barato que muestrear densamente con precisión de segundos
+        self.assertLess(stats["samples"] + stats["evaluations"], 1000)
+
+    def test_new_moon_time(self):
+        # Luna Nueva del 21/09/2025 a las 19:54 UTC
+        jd_start, jd_end = month_jd_range(9, 2025)
+        events = find_aspect_events("moon", ["sun"], jd_start, jd_end, MONTHLY_BODIES)
+        conjunctions = [e for e in events if e["aspect"] == "Conjunción"]
+        self.assertEqual(len(conjunctions), 1)
+        self.assertEqual(conjunctions[0]["datetime_utc"].strftime("%Y-%m-%d %H:%M"), "2025-09-21 19:54")
+
+    def test_waxing_and_waning_aspects(self):
+        jd_start, jd_end = month_jd_range(3, 2024)
+        events = find_aspect_events("moon", ["sun"], jd_start, jd_end, MONTHLY_BODIES)
+        squares = [e for e in events if e["aspect"] == "Cuadratura"]
+        # Cuarto creciente (90°) y menguante (270°) en el mes
+        self.assertEqual(sorted(round(e["elongation"]) for e in squares), [90, 270])
@@ -0,0 +1,77 @@
+# backend/api/tests/test_formats.py
+import json
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..cache_manager import natal_cache, response_cache
+from ..formats import PACKED_CONTENT_TYPE, unpack
+from .test_chart_registry import BIRTH
+
+
+class FormatsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        natal_cache.clear()
+        response_cache.clear()
+
+    def compute(self, fmt=None, **headers):
+        url = reverse("compute_chart") + (f"?format={fmt}" if fmt else "")
+        return self.client.post(url, data=json.dumps(BIRTH), content_type="application/json", **headers)
+
+    def test_chart_formats(self):
+        full = self.compute().json()
+        compact = self.compute("compact")
+        packed = self.compute(HTTP_ACCEPT=PACKED_CONTENT_TYPE)
+        self.assertEqual(packed["Content-Type"], PACKED_CONTENT_TYPE)
+        self.assertIn("Accept", packed["Vary"])
+        self.assertLess(len(compact.content) * 2, len(self.compute().content))
+        self.assertLess(len(packed.content), len(compact.content))
+
+        data = compact.json()
+        self.assertEqual(data["p"]["sun"]["v"], round(full["planets"]["sun"]["value"], 4))
+        self.assertEqual(len(data["h"]["c"]), 12)
+        self.assertEqual(len(data["a"]), len(full["aspects"]))
+
+        chart = unpack(packed.content)
+        self.assertEqual(chart["kind"], "chart")
+        for name, planet in full["planets"].items():
+            self.assertAlmostEqual(chart["bodies"][name]["longitude"], planet["value"], places=4)
+            self.assertEqual(chart["bodies"][name]["retrograde"], planet["retrograde"])
+        self.assertEqual(len(chart["points"]), 14)
+        self.assertEqual([a["aspect"] for a in chart["aspects"]], [a["aspect"] for a in full["aspects"]])
+        self.assertEqual(chart["jd"], full["jd_ut"])
+
+    def test_transits_and_errors(self):
+        params = {"date": "2031-01-02", "timezone": "UTC"}
+        full = self.client.get(reverse("transits"), params).json()
+        packed = unpack(self.client.get(reverse("transits"), dict(params, format="packed")).content)
+        self.assertAlmostEqual(packed["bodies"]["moon"]["longitude"], full["transits"]["moon"]["longitude"], places=4)
+        self.assertEqual((packed["d"], packed["tz"]), ("2031-01-02", "UTC"))
+        self.assertEqual(self.client.get(reverse("transits"), dict(params, format="xml")).status_code, 400)
+        self.assertEqual(self.compute("xml").status_code, 400)
+
+        info = self.client.get(reverse("formats")).json()
+        self.assertEqual(info["packed"]["bodies"][1], "moon")
+
+    def test_horoscope_formats(self):
+        chart_id = self.client.post(reverse("register_chart"), data=json.dumps(BIRTH),
+                                    content_type="application/json").json()["chart_id"]
+        params = {"chart_id": chart_id, "target_date": "2031-01-02", "timezone": "UTC"}
+        full = self.client.get(reverse("daily_horoscope"), params)
+        compact = self.client.get(reverse("daily_horoscope"), dict(params, format="compact"))
+        packed = self.client.get(reverse("daily_horoscope"), dict(params, format="packed"))
+        self.assertEqual(len({full["ETag"], compact["ETag"], packed["ETag"]}), 3)
+        self.assertEqual(compact.json()["i"], full.json()["interpretation"])
+
+        horoscope = unpack(packed.content)
+        self.assertEqual(horoscope["i"], full.json()["interpretation"])
+        self.assertEqual(len(horoscope["aspects"]), len(full.json()["top_aspects"]))
+        self.assertEqual(horoscope["aspects"][0]["weight"], full.json()["top_aspects"][0]["weight"])
+
+        hit = self.client.get(reverse("daily_horoscope"), dict(params, format="packed"))
+        self.assertEqual((hit["X-Cache-Status"], hit.content), ("HIT", packed.content))
+        r = self.client.get(reverse("daily_horoscope"), dict(params, format="packed"),
+                            HTTP_IF_NONE_MATCH=packed["ETag"])
+        self.assertEqual(r.status_code, 304)
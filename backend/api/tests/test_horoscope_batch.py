@@ -0,0 +1,138 @@
+# backend/api/tests/test_horoscope_batch.py
+import json
+from datetime import datetime
+from functools import partial
+from itertools import groupby
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from ..cache_manager import natal_cache
+from ..horoscope_batch import chunk_lines, house_numbers, stream_horoscopes
+from ..horoscope_service import calculate_transits, find_house_for_planet, generate_daily_horoscope_personal
+from ..services import compute_chart
+from .test_async_views import asgi_request
+from .test_chart_registry import BIRTH
+
+PLACES = [
+    ("1992-02-14T20:30:00", "Europe/Madrid", 41.5421, 2.1094),
+    ("1992-07-12T23:58:00", "America/Tegucigalpa", 14.0723, -87.1921),
+    ("1985-11-03T06:15:00", "Asia/Tokyo", 35.6762, 139.6503),
+    ("2001-05-30T14:00:00", "America/Argentina/Buenos_Aires", -34.6037, -58.3816),
+    ("1970-01-01T00:00:00", "UTC", 64.1466, -21.9426),
+]
+
+
+def charts():
+    return [compute_chart(dict(BIRTH, datetime=dt, timezone=tz, latitude=lat, longitude=lon), settings.SE_EPHE_PATH)
+            for dt, tz, lat, lon in PLACES]
+
+
+def read_lines(content: bytes) -> list:
+    return [json.loads(line) for line in content.decode("utf-8").splitlines()]
+
+
+class HoroscopeBatchTest(SimpleTestCase):
+    def test_house_numbers_match_scalar_rule(self):
+        cusps = [[c["value"] for c in chart["houses"]["cusps"]] for chart in charts()]
+        lons = [0.0, 15.5, 89.99, 180.0, 270.25, 359.9] + [cusp for row in cusps for cusp in row]
+        houses = house_numbers(lons, cusps)
+        for u, row in enumerate(cusps):
+            self.assertEqual(houses[u].tolist(), [find_house_for_planet(lon, row) for lon in lons])
+
+    def test_matches_daily_horoscope(self):
+        cache.clear()
+        natal = charts()
+        day = datetime(2031, 1, 2)
+        items = [({"index": k}, chart) for k, chart in enumerate(natal)]
+        lines = read_lines(b"".join(stream_horoscopes(items, day, "UTC", chunk_charts=2)))
+        self.assertEqual([line["index"] for line in lines], list(range(len(natal))))
+        for chart, line in zip(natal, lines):
+            single = generate_daily_horoscope_personal(chart, day, "UTC")
+            single.pop("_from_cache")
+            self.assertEqual(line["horoscope"], json.loads(json.dumps(single)))
+
+    def test_transits_computed_once(self):
+        items = [({"index": k}, chart) for k, chart in enumerate(charts())]
+        with mock.patch("api.horoscope_batch.calculate_transits", wraps=calculate_transits) as calc:
+            b"".join(stream_horoscopes(items, datetime(2031, 1, 2), "UTC", chunk_charts=2))
+        self.assertEqual(calc.call_count, 1)
+
+
+    def test_asgi_sends_each_chunk_as_it_is_built(self):
+        events = []
+
+        def traced(*args):
+            events.append("built")
+            return chunk_lines(*args)
+
+        def on_send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                events.append("sent")
+
+        # Cinco cartas en bloques de dos: tres bloques
+        body = json.dumps({"target_date": "2031-01-02", "charts": [{"birth_data": c} for c in charts()]})
+        with mock.patch("api.horoscope_batch.chunk_lines", traced), \
+                mock.patch("api.views.stream_horoscopes", partial(stream_horoscopes, chunk_charts=2)):
+            sent = asgi_request(reverse("horoscope_batch"), method="POST", body=body.encode(), on_send=on_send)
+        self.assertEqual(sent[0]["status"], 200)
+        self.assertEqual([event for event, _ in groupby(events)], ["built", "sent"] * 3)
+        lines = read_lines(b"".join(m.get("body", b"") for m in sent[1:]))
+        self.assertEqual([line["index"] for line in lines], [0, 1, 2, 3, 4])
+
+
+class HoroscopeBatchAPITest(TestCase):
+    def setUp(self):
+        cache.clear()
+        natal_cache.clear()
+
+    def test_streams_one_line_per_chart(self):
+        r = self.client.post(reverse("register_chart"), data=json.dumps(BIRTH), content_type="application/json")
+        chart_id, chart = r.json()["chart_id"], r.json()["chart"]
+        natal_cache.clear()  # los registrados salen de la base de datos
+        payload = {
+            "target_date": "2031-01-02",
+            "charts": [
+                {"id": "user_001", "chart_id": chart_id},
+                {"id": "user_002", "birth_data": chart},
+                {"chart_id": "0" * 64},
+                {"birth_data": {"planets": {}}},
+                "nope",
+            ],
+        }
+        r = self.client.post(reverse("horoscope_batch"), data=json.dumps(payload), content_type="application/json")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r["Content-Type"], "application/x-ndjson")
+        self.assertEqual(r["X-Total-Charts"], "5")
+        lines = read_lines(b"".join(r.streaming_content))
+        self.assertEqual([line["index"] for line in lines], [0, 1, 2, 3, 4])
+        self.assertEqual((lines[0]["id"], lines[0]["chart_id"]), ("user_001", chart_id))
+        self.assertEqual(lines[0]["horoscope"], lines[1]["horoscope"])
+        self.assertEqual(lines[0]["horoscope"]["date"], "2031-01-02")
+        self.assertEqual(lines[2]["error"], "Unknown chart_id.")
+        self.assertIn("error", lines[3])
+        self.assertIn("error", lines[4])
+
+        single = self.client.post(reverse("daily_horoscope"), data=json.dumps(
+            {"chart_id": chart_id, "target_date": "2031-01-02"}), content_type="application/json").json()
+        single.pop("_from_cache")
+        self.assertEqual(lines[0]["horoscope"], single)
+
+    def test_chart_ids_shorthand_and_validation(self):
+        url = reverse("horoscope_batch")
+        r = self.client.post(url, data=json.dumps({"chart_ids": ["0" * 64]}), content_type="application/json")
+        self.assertEqual(read_lines(b"".join(r.streaming_content))[0]["error"], "Unknown chart_id.")
+        # Ids que no son cadenas: error por línea, no un 500
+        r = self.client.post(url, data=json.dumps({"chart_ids": [[1], {"a": 1}, 5]}), content_type="application/json")
+        self.assertEqual([line["error"] for line in read_lines(b"".join(r.streaming_content))],
+                         ["Unknown chart_id."] * 3)
+        r = self.client.post(url, data=json.dumps({"charts": "nope"}), content_type="application/json")
+        self.assertEqual(r.status_code, 400)
+        r = self.client.post(url, data=json.dumps({"charts": [], "timezone": 5}), content_type="application/json")
+        self.assertEqual(r.status_code, 400)
+        r = self.client.post(url, data=json.dumps({"charts": [], "target_date": "02/01/2031"}),
+                             content_type="application/json")
+        self.assertEqual(r.status_code, 400)
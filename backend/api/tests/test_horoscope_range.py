@@ -0,0 +1,116 @@
+# backend/api/tests/test_horoscope_range.py
+import json
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from ..cache_manager import natal_cache, response_cache
+from ..ephemeris_table import lookup_many
+from ..horoscope_range import day_transits, horoscope_range
+from ..horoscope_service import calculate_transits, find_aspects_to_natal, generate_daily_horoscope_personal
+from ..services import compute_chart
+from .test_chart_registry import BIRTH
+
+
+class HoroscopeRangeTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.chart = compute_chart(BIRTH, settings.SE_EPHE_PATH)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_day_transits_match_calculate_transits(self):
+        # Kolkata (+05:30) interpola; Madrid cruza el cambio de hora del 30/03/2031
+        for timezone in ("UTC", "Asia/Kolkata", "Europe/Madrid"):
+            start = datetime(2031, 3, 27)
+            for d, transits in enumerate(day_transits(start, 6, timezone)):
+                self.assertEqual(transits, calculate_transits(start + timedelta(days=d), timezone), timezone)
+
+    def test_one_ephemeris_call_for_the_whole_range(self):
+        with mock.patch("api.horoscope_range.lookup_many", wraps=lookup_many) as spy:
+            horoscope_range(self.chart, datetime(2031, 1, 1), 31, "Asia/Kolkata")
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(len(spy.call_args.args[0]), 62)  # dos horas UTC por día (+05:30)
+
+    def test_days_match_daily_horoscope(self):
+        start = datetime(2031, 1, 1)
+        result = horoscope_range(self.chart, start, 7, "America/Tegucigalpa")
+        self.assertEqual((result["start"], result["days"], len(result["horoscopes"])), ("2031-01-01", 7, 7))
+        for d, day in enumerate(result["horoscopes"]):
+            single = generate_daily_horoscope_personal(self.chart, start + timedelta(days=d), "America/Tegucigalpa")
+            single.pop("_from_cache")
+            self.assertEqual(day, single)
+
+    def test_changes_between_days(self):
+        start = datetime(2031, 1, 1)
+        result = horoscope_range(self.chart, start, 7)
+        changes = result["changes"]
+        self.assertEqual([c["date"] for c in changes], [f"2031-01-0{d}" for d in range(2, 8)])
+        # La Luna cambia de signo cada ~2,5 días
+        moon_moves = [c for c in changes for s in c["sign_changes"] if s["planet"] == "moon"]
+        self.assertGreaterEqual(len(moon_moves), 2)
+
+        natal = {name: {"longitude": p["value"]} for name, p in self.chart["planets"].items()}
+        keys = [{(a["transit_planet"], a["natal_planet"], a["aspect"])
+                 for a in find_aspects_to_natal(day["transits"], natal)} for day in result["horoscopes"]]
+        for d, change in enumerate(changes, start=1):
+            started = {(a["transit_planet"], a["natal_planet"], a["aspect"]) for a in change["aspects_started"]}
+            ended = {(a["transit_planet"], a["natal_planet"], a["aspect"]) for a in change["aspects_ended"]}
+            self.assertEqual(started, keys[d] - keys[d - 1])
+            self.assertEqual(ended, keys[d - 1] - keys[d])
+
+
+class HoroscopeRangeAPITest(TestCase):
+    def setUp(self):
+        cache.clear()
+        natal_cache.clear()
+        response_cache.clear()
+        r = self.client.post(reverse("register_chart"), data=json.dumps(BIRTH), content_type="application/json")
+        self.chart_id, self.chart = r.json()["chart_id"], r.json()["chart"]
+
+    def test_get_is_cacheable(self):
+        url = reverse("horoscope_range")
+        params = {"chart_id": self.chart_id, "start": "2031-01-01", "days": 3}
+        r = self.client.get(url, params)
+        self.assertEqual(r.status_code, 200)
+        data = r.json()
+        self.assertEqual(data["chart_id"], self.chart_id)
+        self.assertEqual([h["date"] for h in data["horoscopes"]], ["2031-01-01", "2031-01-02", "2031-01-03"])
+        self.assertEqual(len(data["changes"]), 2)
+        self.assertIn("max-age", r["Cache-Control"])
+
+        self.assertEqual(self.client.get(url, params, HTTP_IF_NONE_MATCH=r["ETag"]).status_code, 304)
+        natal_cache.clear()
+        again = self.client.get(url, params)  # de response_cache, sin cargar la carta
+        self.assertEqual(again.content, r.content)
+
+    def test_missing_start_redirects_to_today(self):
+        r = self.client.get(reverse("horoscope_range"), {"chart_id": self.chart_id, "days": 3})
+        self.assertEqual(r.status_code, 302)
+        self.assertIn(f"start={datetime.now():%Y-%m-%d}", r["Location"])
+        self.assertNotIn("public", r["Cache-Control"])
+        self.assertEqual(len(self.client.get(r["Location"]).json()["horoscopes"]), 3)
+
+    def test_post_with_birth_data(self):
+        payload = {"birth_data": self.chart, "start": "2031-01-01", "days": 2, "timezone": "Asia/Kolkata"}
+        r = self.client.post(reverse("horoscope_range"), data=json.dumps(payload), content_type="application/json")
+        self.assertEqual(r.status_code, 200)
+        data = r.json()
+        self.assertNotIn("chart_id", data)
+        self.assertEqual((data["timezone"], len(data["horoscopes"])), ("Asia/Kolkata", 2))
+
+    def test_validation(self):
+        url = reverse("horoscope_range")
+        self.assertEqual(self.client.get(url, {"chart_id": self.chart_id, "days": 0}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"chart_id": self.chart_id, "days": 32}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"chart_id": self.chart_id, "start": "01/01/2031"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"start": "2031-01-01"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"chart_id": "0" * 64, "start": "2031-01-01"}).status_code, 404)
+        r = self.client.post(url, data=json.dumps({"birth_data": {"planets": {}}}), content_type="application/json")
+        self.assertEqual(r.status_code, 400)
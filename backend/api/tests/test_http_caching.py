@@ -0,0 +1,104 @@
+# backend/api/tests/test_http_caching.py
+import json
+from datetime import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..cache_manager import natal_cache, response_cache
+
+QUERY = {
+    "datetime": "1992-02-14T20:30:00",
+    "timezone": "Europe/Madrid",
+    "latitude": "41.5421",
+    "longitude": "2.1094",
+    "house_system": "placidus",
+    "topocentric_moon_only": "false",
+}
+
+
+class ComputeGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        natal_cache.clear()
+        response_cache.clear()
+
+    def test_get_matches_post(self):
+        r = self.client.get(reverse("compute_chart"), QUERY)
+        self.assertEqual(r.status_code, 200)
+        self.assertIn("max-age=2592000", r["Cache-Control"])
+        payload = dict(QUERY, latitude=41.5421, longitude=2.1094, topocentric_moon_only=False)
+        posted = self.client.post(reverse("compute_chart"), data=json.dumps(payload),
+                                  content_type="application/json")
+        self.assertEqual(r.json(), posted.json())
+        self.assertNotIn("ETag", posted)
+
+        # Mismo instante en otra zona: mismo ETag
+        same = self.client.get(reverse("compute_chart"), dict(QUERY, datetime="1992-02-14T19:30:00", timezone="UTC"))
+        self.assertEqual(same["ETag"], r["ETag"])
+        selected = self.client.get(reverse("compute_chart"), dict(QUERY, bodies="sun,moon", fields="planets"))
+        self.assertEqual(list(selected.json()["planets"]), ["sun", "moon"])
+        self.assertNotEqual(selected["ETag"], r["ETag"])
+
+    def test_if_none_match_skips_computation(self):
+        etag = self.client.get(reverse("compute_chart"), QUERY)["ETag"]
+        with mock.patch("api.views.compute_chart_cached") as compute:
+            r = self.client.get(reverse("compute_chart"), QUERY, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 304)
+        self.assertEqual(r["ETag"], etag)
+        compute.assert_not_called()
+
+    def test_invalid_query(self):
+        self.assertEqual(self.client.get(reverse("compute_chart"), dict(QUERY, bodies="sun,ceres")).status_code, 400)
+        self.assertEqual(
+            self.client.get(reverse("compute_chart"), dict(QUERY, topocentric_moon_only="maybe")).status_code, 400
+        )
+        missing = dict(QUERY)
+        del missing["latitude"]
+        self.assertEqual(self.client.get(reverse("compute_chart"), missing).status_code, 400)
+
+
+class HoroscopeGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        natal_cache.clear()
+        response_cache.clear()
+        birth = dict(QUERY, latitude=41.5421, longitude=2.1094, topocentric_moon_only=False)
+        r = self.client.post(reverse("register_chart"), data=json.dumps(birth), content_type="application/json")
+        self.chart_id = r.json()["chart_id"]
+
+    def test_get_with_etag(self):
+        params = {"chart_id": self.chart_id, "target_date": "2031-01-02", "timezone": "UTC"}
+        first = self.client.get(reverse("daily_horoscope"), params)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["X-Cache-Status"], "MISS")
+        self.assertNotIn("_from_cache", first.json())
+        self.assertIn("max-age=21600", first["Cache-Control"])
+
+        second = self.client.get(reverse("daily_horoscope"), params)
+        self.assertEqual(second["X-Cache-Status"], "HIT")
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+        with mock.patch("api.views.generate_daily_horoscope_personal") as generate:
+            r = self.client.get(reverse("daily_horoscope"), params, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(r.status_code, 304)
+        generate.assert_not_called()
+
+    def test_missing_date_redirects_to_today(self):
+        r = self.client.get(reverse("daily_horoscope"), {"chart_id": self.chart_id, "timezone": "UTC"})
+        self.assertEqual(r.status_code, 302)
+        self.assertIn(f"target_date={datetime.now():%Y-%m-%d}", r["Location"])
+        self.assertIn(f"chart_id={self.chart_id}", r["Location"])
+        self.assertNotIn("public", r["Cache-Control"])
+        self.assertIn("no-cache", r["Cache-Control"])
+        self.assertEqual(self.client.get(r["Location"]).status_code, 200)
+
+    def test_errors(self):
+        self.assertEqual(self.client.get(reverse("daily_horoscope")).status_code, 400)
+        unknown = {"chart_id": "0" * 64, "target_date": "2031-01-02"}
+        self.assertEqual(self.client.get(reverse("daily_horoscope"), unknown).status_code, 404)
+        r = self.client.get(reverse("daily_horoscope"), {"chart_id": self.chart_id, "target_date": "02/01/2031"})
+        self.assertEqual(r.status_code, 400)
@@ -0,0 +1,56 @@
+# backend/api/tests/test_monthly_store.py
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import monthly_store
+
+
+class MonthlyTransitsStoreTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.store = monthly_store.MonthlyTransitsStore(os.path.join(self.tmpdir.name, "monthly.sqlite3"))
+        patcher = mock.patch.object(monthly_store, "_store", self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_view_computes_once_then_serves_from_store(self):
+        url = reverse("monthly_transits", args=[9, 2025])
+        r = self.client.get(url)
+        self.assertEqual(r.status_code, 200)
+        data = r.json()
+        self.assertEqual((data["month"], data["year"]), (9, 2025))
+        self.assertTrue(any(t["is_eclipse"] for t in data["important_transits"]))
+        self.assertEqual(r["ETag"], monthly_store.monthly_etag(9, 2025))
+        self.assertIn("max-age", r["Cache-Control"])
+
+        with mock.patch.object(monthly_store, "get_important_transits") as compute:
+            again = self.client.get(url)
+            compute.assert_not_called()
+        self.assertEqual(again.content, r.content)
+
+    def test_if_none_match_skips_computation(self):
+        url = reverse("monthly_transits", args=[1, 1950])
+        etag = monthly_store.monthly_etag(1, 1950)
+        with mock.patch.object(monthly_store, "get_monthly_transits") as lookup:
+            r = self.client.get(url, HTTP_IF_NONE_MATCH=f"W/{etag}")
+            lookup.assert_not_called()
+        self.assertEqual(r.status_code, 304)
+        self.assertEqual(r["ETag"], etag)
+        self.assertIsNone(self.store.get(1, 1950))
+
+    def test_etag_changes_with_algorithm_version(self):
+        etag = monthly_store.monthly_etag(3, 2000)
+        with mock.patch.object(monthly_store, "MONTHLY_ALGORITHM_VERSION", monthly_store.MONTHLY_ALGORITHM_VERSION + 1):
+            self.assertNotEqual(monthly_store.monthly_etag(3, 2000), etag)
+
+    def test_precompute_command(self):
+        call_command("precompute_monthly_transits", "--start-year", "2030", "--end-year", "2030",
+                     "--workers", "2", stdout=open(os.devnull, "w"))
+        self.assertEqual(self.store.missing([(m, 2030) for m in range(1, 13)]), [])
+        self.assertEqual(self.store.missing([(1, 2031)]), [(1, 2031)])
@@ -0,0 +1,65 @@
+# backend/api/tests/test_natal_cache.py
+import json
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..cache_manager import CacheManager, TwoTierCache, natal_cache
+
+
+class NatalCacheKeyTest(TestCase):
+    base = {
+        "datetime": "1992-02-14T20:30:00",
+        "timezone": "Europe/Madrid",
+        "latitude": 41.5421,
+        "longitude": 2.1094,
+        "house_system": "placidus",
+        "topocentric_moon_only": False,
+    }
+
+    def key(self, **changes):
+        return CacheManager.get_natal_chart_key(dict(self.base, **changes))
+
+    def test_same_instant_same_key(self):
+        # 20:30 en Madrid (UTC+1) es 19:30 UTC
+        self.assertEqual(self.key(), self.key(datetime="1992-02-14T19:30:00", timezone="UTC"))
+        self.assertEqual(self.key(), self.key(latitude=41.54213, longitude=2.10936))
+        self.assertNotEqual(self.key(), self.key(latitude=41.5431))
+        self.assertNotEqual(self.key(), self.key(house_system="koch"))
+        self.assertNotEqual(self.key(), self.key(topocentric_moon_only=True))
+
+    def test_two_tiers(self):
+        tiers = TwoTierCache("test", max_entries=2)
+        self.assertIsNone(tiers.get("natal:test-a"))
+        tiers.set("natal:test-a", {"a": 1}, 60)
+        self.assertEqual(tiers.get("natal:test-a"), {"a": 1})
+
+        # Sin L1 (otro proceso o entrada expulsada) se sirve de L2
+        tiers.set("natal:test-b", {"b": 1}, 60)
+        tiers.set("natal:test-c", {"c": 1}, 60)
+        self.assertEqual(tiers.get("natal:test-a"), {"a": 1})
+
+        stats = tiers.stats()
+        self.assertEqual((stats["misses"], stats["l1_hits"], stats["l2_hits"]), (1, 1, 1))
+        self.assertEqual(stats["l1_entries"], 2)
+        self.assertAlmostEqual(stats["hit_ratio"], 2 / 3, places=3)
+
+
+class NatalCacheAPITest(TestCase):
+    def setUp(self):
+        cache.clear()
+        natal_cache.clear()
+
+    def test_compute_is_cached(self):
+        payload = dict(NatalCacheKeyTest.base)
+        url = reverse("compute_chart")
+        first = self.client.post(url, data=json.dumps(payload), content_type="application/json").json()
+        again = dict(payload, datetime="1992-02-14T19:30:00", timezone="UTC", latitude=41.54214)
+        second = self.client.post(url, data=json.dumps(again), content_type="application/json").json()
+        self.assertEqual(first, second)
+
+        stats = natal_cache.stats()
+        self.assertEqual((stats["misses"], stats["l1_hits"]), (1, 1))
+        report = self.client.get(reverse("cache_stats")).json()
+        self.assertEqual(report["tiers"]["natal_chart"]["l1_hits"], 1)
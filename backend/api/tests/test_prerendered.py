@@ -0,0 +1,75 @@
+# backend/api/tests/test_prerendered.py
+import gzip
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from ..cache_manager import natal_cache, response_cache
+from ..prerendered import render_json
+from .test_chart_registry import BIRTH
+
+
+class RenderJsonTest(SimpleTestCase):
+    def test_gzip_variant(self):
+        body, gzipped = render_json({"summary": "Día tranquilo. " * 50})
+        self.assertEqual(json.loads(body), {"summary": "Día tranquilo. " * 50})
+        self.assertIn("Día".encode(), body)  # sin escapes \\u
+        self.assertEqual(gzip.decompress(gzipped), body)
+        # Cuerpos pequeños no se comprimen (como GZipMiddleware)
+        self.assertIsNone(render_json({"a": 1})[1])
+
+
+class PrerenderedHoroscopeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        natal_cache.clear()
+        response_cache.clear()
+        r = self.client.post(reverse("register_chart"), data=json.dumps(BIRTH), content_type="application/json")
+        self.chart_id = r.json()["chart_id"]
+
+    def post(self, **headers):
+        payload = {"chart_id": self.chart_id, "target_date": "2031-01-02"}
+        return self.client.post(reverse("daily_horoscope"), data=json.dumps(payload),
+                                content_type="application/json", **headers)
+
+    def test_post_hit_serves_stored_bytes(self):
+        first = self.post(HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(first["Content-Encoding"], "gzip")
+        self.assertFalse(json.loads(gzip.decompress(first.content))["_from_cache"])
+
+        with mock.patch("api.views.generate_daily_horoscope_personal") as generate, \
+                mock.patch("django.middleware.gzip.compress_string") as compress:
+            hit = self.post(HTTP_ACCEPT_ENCODING="gzip")
+            plain = self.post()
+        generate.assert_not_called()
+        compress.assert_not_called()
+
+        self.assertEqual(hit["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", hit["Vary"])
+        self.assertEqual(int(hit["Content-Length"]), len(hit.content))
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertIn("Accept-Encoding", plain["Vary"])
+        self.assertEqual(gzip.decompress(hit.content), plain.content)
+        self.assertTrue(plain.json()["_from_cache"])
+
+    def test_get_hit_skips_chart_lookup(self):
+        params = {"chart_id": self.chart_id, "target_date": "2031-01-02", "timezone": "UTC"}
+        first = self.client.get(reverse("daily_horoscope"), params, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(first["X-Cache-Status"], "MISS")
+        # Variante comprimida: ETag débil, como con GZipMiddleware
+        self.assertTrue(first["ETag"].startswith('W/"'))
+
+        with mock.patch("api.views.load_chart") as load:
+            hit = self.client.get(reverse("daily_horoscope"), params)
+            r = self.client.get(reverse("daily_horoscope"), params, HTTP_IF_NONE_MATCH=first["ETag"])
+        load.assert_not_called()
+        self.assertEqual(hit["X-Cache-Status"], "HIT")
+        self.assertEqual(hit["ETag"], first["ETag"].removeprefix("W/"))
+        self.assertEqual(hit.content, gzip.decompress(first.content))
+        self.assertEqual(r.status_code, 304)
+
+        report = self.client.get(reverse("cache_stats")).json()
+        self.assertEqual(report["tiers"]["response"]["l1_hits"], 1)
@@ -0,0 +1,102 @@
+# backend/api/tests/test_single_flight.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from ..cache_manager import SingleFlight, cache_daily_horoscope, cache_transits
+
+
+class SingleFlightTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def run_concurrently(self, fn, n=8):
+        with ThreadPoolExecutor(n) as pool:
+            return [f.result() for f in [pool.submit(fn) for _ in range(n)]]
+
+    def test_concurrent_misses_compute_once(self):
+        flight = SingleFlight("test")
+        calls = []
+        started = threading.Event()
+
+        def compute():
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            cache.set("sf:key", "value", 60)
+            return "value"
+
+        def request():
+            return flight.do("sf:key", compute, lambda: cache.get("sf:key"))
+
+        results = self.run_concurrently(request)
+        self.assertEqual(results, ["value"] * 8)
+        self.assertEqual(len(calls), 1)
+        stats = flight.stats()
+        self.assertEqual(stats["computations"], 1)
+        self.assertEqual(stats["coalesced"] + stats["remote_hits"], 7)
+        self.assertIsNone(cache.get("singleflight:sf:key"))  # lock liberado
+
+    def test_errors_reach_waiters(self):
+        flight = SingleFlight("test")
+
+        def compute():
+            time.sleep(0.05)
+            raise RuntimeError("boom")
+
+        def request():
+            try:
+                flight.do("sf:error", compute, lambda: None)
+            except RuntimeError as e:
+                return str(e)
+
+        self.assertEqual(self.run_concurrently(request, 4), ["boom"] * 4)
+
+    def test_waits_for_other_worker(self):
+        flight = SingleFlight("test")
+        cache.add("singleflight:sf:remote", 12345, 30)  # lock de otro worker
+        threading.Timer(0.05, cache.set, ("sf:remote", "remote", 60)).start()
+        value = flight.do("sf:remote", lambda: self.fail("should not compute"), lambda: cache.get("sf:remote"),
+                          shared=str.upper)
+        self.assertEqual(value, "REMOTE")
+        self.assertEqual(flight.stats()["remote_hits"], 1)
+
+    def test_stale_lock_times_out(self):
+        flight = SingleFlight("test", wait_timeout=0.05)
+        cache.add("singleflight:sf:stale", 12345, 30)
+        self.assertEqual(flight.do("sf:stale", lambda: "mine", lambda: None), "mine")
+        self.assertEqual(flight.stats()["lock_timeouts"], 1)
+
+    @override_settings(SINGLE_FLIGHT_CROSS_WORKER=False)
+    def test_in_process_only(self):
+        flight = SingleFlight("test")
+        cache.add("singleflight:sf:local", 12345, 30)  # se ignora
+        self.assertEqual(flight.do("sf:local", lambda: "mine", lambda: None), "mine")
+
+    def test_cache_transits_decorator(self):
+        calls = []
+
+        @cache_transits(ttl=60)
+        def snapshot(hour):
+            calls.append(1)
+            time.sleep(0.1)
+            return {"sun": hour.hour}
+
+        hour = datetime(2031, 3, 4, 5)
+        self.assertEqual(self.run_concurrently(lambda: snapshot(hour)), [{"sun": 5}] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_coalesced_horoscopes_are_marked_from_cache(self):
+        @cache_daily_horoscope(ttl=60)
+        def horoscope(birth_data, target_date, timezone):
+            time.sleep(0.1)
+            return {"date": target_date.strftime("%Y-%m-%d")}
+
+        results = self.run_concurrently(lambda: horoscope.fill({"planets": {}}, datetime(2031, 3, 4), "UTC"))
+        # Solo el que calculó lleva _from_cache=False; el resto recibió su resultado
+        self.assertEqual(sorted(r["_from_cache"] for r in results), [False] + [True] * 7)
+        self.assertEqual({r["date"] for r in results}, {"2031-03-04"})
@@ -0,0 +1,84 @@
+# backend/api/tests/test_sqlite_cache.py
+import multiprocessing
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+from django.test import SimpleTestCase
+
+from .. import eclipses
+from ..cache_stats import recorder
+from ..monthly_store import MonthlyTransitsStore
+from ..sqlite_cache import SQLiteCache
+
+
+def _set_in_child(path):
+    SQLiteCache(path, {}).set("from-child", {"pid": os.getpid()}, 60)
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "cache.sqlite3")
+
+    def make(self, **options):
+        return SQLiteCache(self.path, {"OPTIONS": options})
+
+    def test_basic_operations(self):
+        cache = self.make()
+        cache.set("a", {"x": [1, 2]}, 60)
+        self.assertEqual(cache.get("a"), {"x": [1, 2]})
+        self.assertFalse(cache.add("a", "other", 60))
+        self.assertTrue(cache.add("b", 1, 60))
+        self.assertEqual(cache.incr("b", 4), 5)
+        self.assertEqual(cache.get_many(["a", "b", "c"]), {"a": {"x": [1, 2]}, "b": 5})
+        self.assertTrue(cache.delete("a"))
+        self.assertIsNone(cache.get("a"))
+        with self.assertRaises(ValueError):
+            cache.incr("missing")
+
+        cache.set("short", 1, 60)
+        with mock.patch("api.sqlite_cache.time.time", return_value=time.time() + 120):
+            self.assertFalse(cache.has_key("short"))
+            self.assertIsNone(cache.get("short"))
+        cache.clear()
+        self.assertEqual(cache.info()["bytes"], 0)
+
+    def test_byte_limit_evicts_least_recently_used(self):
+        cache = self.make(MAX_BYTES=10_000, ACCESS_RESOLUTION=0)
+        blob = b"x" * 900
+        for i in range(10):
+            cache.set(f"k{i}", blob, 60)
+        cache.get("k0")  # k0 pasa a ser la más reciente
+        cache.set("k10", blob, 60)
+
+        info = cache.info()
+        self.assertLessEqual(info["bytes"], 10_000)
+        self.assertEqual(info["entries"], len([k for k in range(11) if cache.has_key(f"k{k}")]))
+        self.assertTrue(cache.has_key("k0"))
+        self.assertTrue(cache.has_key("k10"))
+        self.assertFalse(cache.has_key("k1"))
+        cache.set("huge", b"x" * 20_000, 60)  # mayor que el límite: no se guarda
+        self.assertFalse(cache.has_key("huge"))
+
+    def test_shared_between_processes(self):
+        cache = self.make()
+        cache.set("warm", 1, 60)  # conexión abierta antes del fork
+        process = multiprocessing.get_context("fork").Process(target=_set_in_child, args=(self.path,))
+        process.start()
+        process.join(30)
+        self.assertEqual(process.exitcode, 0)
+        self.assertNotEqual(cache.get("from-child")["pid"], os.getpid())
+
+
+class TestSuiteCacheTest(SimpleTestCase):
+    def test_suite_does_not_touch_the_node_files(self):
+        if hasattr(default_cache, "path"):
+            self.assertTrue(default_cache.path.startswith(settings.TEST_DATA_DIR))
+        self.assertTrue(recorder.path.startswith(settings.TEST_DATA_DIR))
+        self.assertTrue(MonthlyTransitsStore().path.startswith(settings.TEST_DATA_DIR))
+        self.assertTrue(str(eclipses.ECLIPSE_INDEX_DIR).startswith(settings.TEST_DATA_DIR))
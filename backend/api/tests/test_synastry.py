@@ -0,0 +1,97 @@
+# backend/api/tests/test_synastry.py
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+import numpy as np
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from .. import synastry
+from ..synastry import SYNASTRY_BODIES, ChartPool, compute_synastry
+
+
+def planets_from(vector):
+    return {name: {"value": float(lon)} for name, lon in zip(SYNASTRY_BODIES, vector)}
+
+
+class SynastryScoringTest(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.longitudes = rng.uniform(0, 360, (5000, len(SYNASTRY_BODIES)))
+        self.pool = ChartPool([f"c{i}" for i in range(len(self.longitudes))], self.longitudes)
+        self.query = rng.uniform(0, 360, len(SYNASTRY_BODIES))
+
+    def test_cross_aspects(self):
+        a = {"sun": {"value": 10.0}, "moon": {"value": 100.0}}
+        b = {"venus": {"value": 130.5}, "mars": {"value": 4.0}}
+        result = compute_synastry(a, b)
+        found = {(x["planet_a"], x["planet_b"], x["aspect"]) for x in result["aspects"]}
+        self.assertEqual(found, {("sun", "venus", "Trine"), ("sun", "mars", "Conjunction"),
+                                 ("moon", "mars", "Square")})
+        self.assertAlmostEqual(result["score"], sum(x["score"] for x in result["aspects"]), places=3)
+
+    def test_pool_score_matches_synastry(self):
+        exact = self.pool.exact_scores(self.query, np.arange(10))
+        for i in range(10):
+            expected = compute_synastry(planets_from(self.query), planets_from(self.longitudes[i]))["score"]
+            self.assertAlmostEqual(exact[i], expected, places=3)
+        # La tabla cuantizada se aproxima a la puntuación exacta
+        approx = self.pool.approximate_scores(self.query)
+        exact = self.pool.exact_scores(self.query, np.arange(len(self.pool)))
+        self.assertLess(np.abs(approx - exact).max(), 0.05)
+        self.assertLessEqual(np.abs(approx - exact).max(), synastry._APPROX_ERROR)
+
+    def test_top_k_is_exact_ranking(self):
+        top = self.pool.top_k(planets_from(self.query), k=20)
+        exact = self.pool.exact_scores(self.query, np.arange(len(self.pool)))
+        expected = np.lexsort((np.arange(len(self.pool)), -exact))[:20]
+        self.assertEqual([r["id"] for r in top], [f"c{i}" for i in expected])
+        self.assertEqual([r["score"] for r in top], sorted((r["score"] for r in top), reverse=True))
+
+    def test_missing_body(self):
+        with self.assertRaises(ValueError):
+            self.pool.top_k({"sun": {"value": 1.0}})
+
+
+class SynastryAPITest(TestCase):
+    def test_synastry_endpoint(self):
+        a = {"planets": {"sun": {"value": 10.0}}}
+        b = {"venus": {"value": 130.0}}
+        r = self.client.post(reverse("synastry"), data=json.dumps({"chart_a": a, "chart_b": b}),
+                             content_type="application/json")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["aspects"][0]["aspect"], "Trine")
+
+        r = self.client.post(reverse("synastry"), data=json.dumps({"chart_a": a}), content_type="application/json")
+        self.assertEqual(r.status_code, 400)
+
+    def test_top_k_inline_and_stored_pool(self):
+        rng = np.random.default_rng(5)
+        pool = [{"id": f"p{i}", "longitudes": rng.uniform(0, 360, 10).tolist()} for i in range(50)]
+        chart = planets_from(rng.uniform(0, 360, 10))
+        r = self.client.post(reverse("synastry_top"), data=json.dumps({"chart": chart, "k": 5, "pool": pool}),
+                             content_type="application/json")
+        self.assertEqual(r.status_code, 200)
+        inline = r.json()
+        self.assertEqual((inline["count"], inline["pool_size"]), (5, 50))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            source = os.path.join(tmpdir, "charts.jsonl")
+            path = os.path.join(tmpdir, "pool.npz")
+            with open(source, "w") as f:
+                f.write("\n".join(json.dumps(chart) for chart in pool))
+            call_command("build_synastry_pool", source, output=path, stdout=io.StringIO())
+            with mock.patch.multiple(synastry, SYNASTRY_POOL_PATH=path, _pool=None):
+                r = self.client.post(reverse("synastry_top"), data=json.dumps({"chart": chart, "k": 5}),
+                                     content_type="application/json")
+        self.assertEqual(r.json()["results"], inline["results"])
+
+    def test_top_k_without_pool(self):
+        with mock.patch.multiple(synastry, SYNASTRY_POOL_PATH="/nonexistent/pool.npz", _pool=None):
+            r = self.client.post(reverse("synastry_top"), data=json.dumps({"chart": {}}),
+                                 content_type="application/json")
+        self.assertEqual(r.status_code, 400)
@@ -0,0 +1,107 @@
+# backend/api/tests/test_timezones.py
+import json
+import random
+from datetime import datetime, timedelta
+
+import swisseph as swe
+from dateutil import tz
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from ..timezones import (
+    AMBIGUOUS, NONEXISTENT, OK, AmbiguousTimeError, NonExistentTimeError,
+    local_to_jd_ut, local_to_jd_ut_many, utc_offsets, zone_table,
+)
+
+
+def dateutil_jd(dt, tz_name):
+    """Conversión anterior: astimezone de dateutil + swe.utc_to_jd."""
+    u = dt.replace(tzinfo=tz.gettz(tz_name)).astimezone(tz.UTC)
+    return swe.utc_to_jd(u.year, u.month, u.day, u.hour, u.minute,
+                         u.second + u.microsecond / 1e6, swe.GREG_CAL)[1]
+
+
+class TimezoneResolverTest(SimpleTestCase):
+    def test_matches_dateutil_outside_transitions(self):
+        rng = random.Random(7)
+        names = ["Europe/Madrid", "America/New_York", "America/Tegucigalpa", "Asia/Kolkata", "Australia/Sydney"]
+        dts = [datetime(1900, 1, 1) + timedelta(minutes=rng.randrange(200 * 525600)) for _ in range(2000)]
+        tz_names = [rng.choice(names) for _ in dts]
+
+        jds, status = local_to_jd_ut_many(dts, tz_names, with_status=True)
+        for dt, name, jd, st in zip(dts, tz_names, jds, status):
+            if st == OK:
+                self.assertEqual(jd, dateutil_jd(dt, name))
+            # El escalar y el vectorizado coinciden siempre
+            self.assertEqual(local_to_jd_ut(dt, name, with_status=True), (jd, st))
+
+    def test_madrid_transitions_2025(self):
+        starts, offsets = zone_table("Europe/Madrid", 2025)
+        self.assertEqual(offsets.tolist(), [3600, 7200, 3600])
+        self.assertEqual(starts[1:].tolist(), [1743296400, 1761440400])  # 30/03 y 26/10 a la 01:00 UTC
+
+    def test_nonexistent_time(self):
+        cases = [
+            ("Europe/Madrid", datetime(2025, 3, 30, 2, 30), [3600, 7200]),
+            ("America/New_York", datetime(2025, 3, 9, 2, 30), [-18000, -14400]),
+        ]
+        for tz_name, gap, expected in cases:
+            forward, status = utc_offsets([gap], tz_name, nonexistent="shift_forward")
+            backward, _ = utc_offsets([gap], tz_name, nonexistent="shift_backward")
+            self.assertEqual(status[0], NONEXISTENT)
+            self.assertEqual([forward[0], backward[0]], expected)
+        with self.assertRaises(NonExistentTimeError):
+            local_to_jd_ut(datetime(2025, 3, 30, 2, 30), "Europe/Madrid", nonexistent="raise")
+
+    def test_ambiguous_time(self):
+        fold = datetime(2025, 10, 26, 2, 30)
+        earlier, status = utc_offsets([fold], "Europe/Madrid", ambiguous="earlier")
+        later, _ = utc_offsets([fold], "Europe/Madrid", ambiguous="later")
+        self.assertEqual(status[0], AMBIGUOUS)
+        self.assertEqual((earlier[0], later[0]), (7200, 3600))
+        with self.assertRaises(AmbiguousTimeError):
+            local_to_jd_ut_many([datetime(2025, 1, 1), fold], "Europe/Madrid", ambiguous="raise")
+
+    def test_unknown_zone_and_policy(self):
+        with self.assertRaises(ValueError):
+            local_to_jd_ut(datetime(2025, 1, 1), "Mars/Olympus_Mons")
+        with self.assertRaises(ValueError):
+            local_to_jd_ut(datetime(2025, 1, 1), "UTC", ambiguous="sometimes")
+
+
+class ComputeLocalTimeAPITest(TestCase):
+    payload = {
+        "datetime": "2025-03-30T02:30:00",
+        "timezone": "Europe/Madrid",
+        "latitude": 40.4168,
+        "longitude": -3.7038,
+        "house_system": "placidus",
+        "topocentric_moon_only": False,
+    }
+
+    def test_nonexistent_time_is_reported(self):
+        r = self.client.post(reverse("compute_chart"), data=json.dumps(self.payload),
+                             content_type="application/json")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["meta"]["local_time"], "nonexistent")
+
+        strict = dict(self.payload, nonexistent_time="raise")
+        r = self.client.post(reverse("compute_chart"), data=json.dumps(strict),
+                             content_type="application/json")
+        self.assertEqual(r.status_code, 400)
+
+    def test_batch_matches_single(self):
+        charts = [
+            dict(self.payload, datetime="1992-02-14T20:30:00"),
+            dict(self.payload, datetime="2025-10-26T02:30:00", ambiguous_time="later"),
+            dict(self.payload, nonexistent_time="raise"),
+            dict(self.payload, timezone="Mars/Olympus_Mons"),
+        ]
+        r = self.client.post(reverse("compute_batch"), data=json.dumps(charts), content_type="application/json")
+        results = r.json()["results"]
+        self.assertEqual([("chart" in item) for item in results], [True, True, False, False])
+        for item, payload in zip(results[:2], charts[:2]):
+            single = self.client.post(reverse("compute_chart"), data=json.dumps(payload),
+                                      content_type="application/json").json()
+            self.assertEqual(item["chart"]["jd_ut"], single["jd_ut"])
+        self.assertEqual(results[1]["chart"]["meta"]["local_time"], "ambiguous")
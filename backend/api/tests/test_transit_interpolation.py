@@ -0,0 +1,54 @@
+# backend/api/tests/test_transit_interpolation.py
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from .. import horoscope_service
+from ..horoscope_service import (
+    calculate_transits, interpolate_positions, snapshot_hour, to_jd_ut, to_utc, transit_positions,
+)
+
+
+def angle_diff(a, b):
+    return abs((a - b + 180) % 360 - 180)
+
+
+class TransitInterpolationTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_snapshot_hour(self):
+        hour = datetime(2025, 10, 9, 14)
+        self.assertEqual(snapshot_hour(hour), (hour, 0.0))
+        self.assertEqual(snapshot_hour(hour + timedelta(minutes=45)), (hour, 0.75))
+        # 14:30 en Madrid (UTC+2) usa las instantáneas de las 12:00 y 13:00 UTC
+        self.assertEqual(snapshot_hour(to_utc(datetime(2025, 10, 9, 14, 30), "Europe/Madrid")),
+                         (datetime(2025, 10, 9, 12), 0.5))
+
+    def test_matches_direct_computation_to_the_minute(self):
+        for minute in (0, 1, 17, 30, 59):
+            dt = datetime(2025, 10, 9, 14, minute)
+            jd = to_jd_ut(dt, "Europe/Madrid")
+            direct = transit_positions(jd)
+            transits = calculate_transits(dt, "Europe/Madrid")
+            for name, (lon, speed) in direct.items():
+                self.assertLess(angle_diff(transits[name]["longitude"], lon), 1e-5, name)
+                self.assertAlmostEqual(transits[name]["speed"], speed, delta=1e-3)
+
+    def test_wraps_around_360(self):
+        before = {"moon": (359.8, 13.2)}
+        after = {"moon": (0.35, 13.2)}
+        lon, speed = interpolate_positions(before, after, 0.5)["moon"]
+        self.assertAlmostEqual(lon, 0.075, places=3)
+        self.assertAlmostEqual(speed, 13.2, places=1)
+
+    def test_one_snapshot_per_hour(self):
+        with mock.patch.object(horoscope_service, "transit_positions", wraps=transit_positions) as compute:
+            for minute in range(0, 60, 5):
+                calculate_transits(datetime(2031, 1, 2, 3, minute), "UTC")
+            calculate_transits(datetime(2031, 1, 2, 4), "UTC")
+        # 03:00 y 04:00 UT: dos cálculos para trece peticiones
+        self.assertEqual(compute.call_count, 2)
+        self.assertIsNotNone(cache.get("transits:2031-01-02-04"))
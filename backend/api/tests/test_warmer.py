@@ -0,0 +1,75 @@
+# backend/api/tests/test_warmer.py
+import time
+from datetime import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from .. import warmer
+from ..cache_manager import SmartCache
+from ..warmer import CacheWarmer, TrafficStats
+
+
+class CacheWarmerTest(SimpleTestCase):
+    def make(self, **kwargs):
+        stats = TrafficStats()
+        for tz in ["Europe/Madrid"] * 3 + ["UTC"]:
+            stats.record(timezone=tz)
+        stats.record(date="2031-01-02")
+        stats.record(date="2020-05-05")  # pasada: no se precalienta
+        stats.record(month=(2031, 6))
+        options = dict(interval=60, lead=300, cpu_budget=1.0, top_n=5)
+        options.update(kwargs)
+        return CacheWarmer(stats=stats, **options)
+
+    def test_plan_targets_traffic_and_boundaries(self):
+        labels = [label for label, _, _ in self.make().plan(datetime(2031, 1, 1, 23, 57))]
+        self.assertEqual(labels, [
+            "transits 2031-01-01 23h Europe/Madrid", "transits 2031-01-02 00h Europe/Madrid",
+            "transits 2031-01-01 23h UTC", "transits 2031-01-02 00h UTC",
+            "transits 2031-01-02 Europe/Madrid", "transits 2031-01-02 UTC",
+            "monthly 01/2031", "monthly 02/2031", "monthly 06/2031",
+            "evict expired",
+        ])
+        # Lejos del cambio de hora/día: solo la hora actual
+        labels = [label for label, _, _ in self.make().plan(datetime(2031, 1, 1, 10, 15))]
+        self.assertIn("transits 2031-01-01 10h UTC", labels)
+        self.assertNotIn("transits 2031-01-01 11h UTC", labels)
+
+    def test_run_once_respects_budget(self):
+        def slow(*args):
+            time.sleep(0.01)
+
+        w = self.make(cpu_budget=0.5)
+        with mock.patch.multiple(warmer, _warm_transits=mock.DEFAULT, _warm_month=mock.DEFAULT,
+                                 _evict_expired=mock.DEFAULT) as mocks:
+            for m in mocks.values():
+                m.side_effect = slow
+            w.run_once(datetime(2031, 1, 1, 10, 15))
+            self.assertEqual(mocks["_warm_transits"].call_count, 4)
+            self.assertEqual(mocks["_warm_month"].call_count, 3)
+            # Los meses ya guardados no se repiten
+            w.run_once(datetime(2031, 1, 1, 10, 15))
+            self.assertEqual(mocks["_warm_month"].call_count, 3)
+
+        info = w.info()
+        self.assertEqual((info["cycles"], info["errors"]), (2, 0))
+        self.assertGreaterEqual(info["throttled_seconds"], info["busy_seconds"] * 0.9)
+        # Cada ciclo divide los contadores entre dos: 3 → 1 → 0
+        self.assertEqual(w.stats.top(5)["timezones"], [])
+
+    def test_evicts_expired_entries(self):
+        cache.set("warmer:expired", 1, 1)
+        with mock.patch("api.sqlite_cache.time.time", return_value=time.time() + 60):
+            self.assertGreaterEqual(SmartCache.invalidate_old_transits()["shared"], 1)
+        self.assertIsNone(cache.get("warmer:expired"))
+
+    def test_views_record_traffic(self):
+        with mock.patch.object(warmer, "traffic", TrafficStats()) as stats, \
+                mock.patch("api.views.traffic", stats), \
+                mock.patch("api.views.get_monthly_transits", return_value=b"{}"):
+            self.client.get(reverse("transits"), {"date": "2031-01-02", "timezone": "Asia/Tokyo"})
+            self.client.get(reverse("monthly_transits", args=[6, 2031]))
+        self.assertEqual(stats.top(1), {"timezones": ["Asia/Tokyo"], "dates": ["2031-01-02"], "months": [(2031, 6)]})
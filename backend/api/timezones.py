@@ -0,0 +1,309 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""
+Resolución de zonas horarias y conversión hora local → Julian Day UT.
+
+- Las zonas se resuelven una vez (`tz.gettz` lee y parsea un fichero tzdata)
+  y se guardan en un LRU acotado.
+- Para cada (zona, año) se precalcula la tabla de transiciones de offset UTC,
+  así que convertir muchas horas locales es una operación vectorizada con
+  numpy en lugar de un `astimezone` por elemento.
+- Las horas locales ambiguas (al retrasar el reloj se repiten) y las
+  inexistentes (hueco al adelantarlo) se resuelven con una política explícita.
+  dateutil no lo hace de forma coherente: 02:30 del cambio de primavera se
+  interpreta con el offset de invierno en America/New_York y con el de verano
+  en Europe/Madrid.
+
+Políticas:
+    ambiguous:   "earlier" (primera ocurrencia, por defecto), "later", "raise"
+    nonexistent: "shift_forward" (offset previo al salto: 02:30 → 03:30, por
+                 defecto, como fold=0 de PEP 495), "shift_backward" (offset
+                 posterior: 02:30 → 01:30), "raise"
+"""
+
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+import swisseph as swe
+from dateutil import tz
+
+AMBIGUOUS_POLICIES = ("earlier", "later", "raise")
+NONEXISTENT_POLICIES = ("shift_forward", "shift_backward", "raise")
+
+# Estado de cada hora local convertida
+OK, AMBIGUOUS, NONEXISTENT = 0, 1, 2
+STATUS_NAMES = {OK: "ok", AMBIGUOUS: "ambiguous", NONEXISTENT: "nonexistent"}
+
+ZONE_CACHE_SIZE = 512
+TABLE_CACHE_SIZE = 4096
+
+# Zonas sin tabla de transiciones (tzstr, tzlocal): muestreo diario del offset
+# (ninguna zona cambia dos veces en un día) y bisección al segundo
+_SAMPLE_SECONDS = 86400
+_EPOCH = datetime(1970, 1, 1)
+_UTC_EPOCH = datetime(1970, 1, 1, tzinfo=tz.UTC)
+_ONE_SECOND = timedelta(seconds=1)
+
+
+class AmbiguousTimeError(ValueError):
+    """Hora local repetida y política ambiguous="raise"."""
+
+
+class NonExistentTimeError(ValueError):
+    """Hora local inexistente (hueco de DST) y política nonexistent="raise"."""
+
+
+@lru_cache(maxsize=ZONE_CACHE_SIZE)
+def get_zone(tz_name: str):
+    """Objeto tzinfo por nombre IANA (LRU acotado). ValueError si no existe."""
+    zone = tz.gettz(tz_name)
+    if zone is None:
+        raise ValueError(f"Unknown timezone: {tz_name}")
+    return zone
+
+
+def _offset_at(zone, utc_seconds: int) -> int:
+    """Offset UTC de `zone` (segundos) en el instante UTC dado."""
+    moment = _UTC_EPOCH + timedelta(seconds=int(utc_seconds))
+    return int(moment.astimezone(zone).utcoffset().total_seconds())
+
+
+def _tzfile_segments(zone):
+    """
+    Tramos completos de una zona `tzfile` de dateutil leídos de sus
+    transiciones, con la misma regla que `tzfile.fromutc` (antes de la primera
+    transición `_ttinfo_before`; desde la última, `_ttinfo_std`).
+    None si la zona no es un tzfile (tzstr, tzlocal...).
+    """
+    try:
+        trans_utc = zone._trans_list_utc
+        trans_idx = zone._trans_idx
+        before, std = zone._ttinfo_before, zone._ttinfo_std
+    except AttributeError:
+        return None
+    if not trans_utc:
+        return [np.iinfo(np.int64).min], [std.offset]
+    starts = [np.iinfo(np.int64).min] + list(trans_utc)
+    offsets = [before.offset] + [tti.offset for tti in trans_idx[:len(trans_utc) - 1]] + [std.offset]
+    return starts, offsets
+
+
+@lru_cache(maxsize=ZONE_CACHE_SIZE)
+def _zone_segments(tz_name: str):
+    segments = _tzfile_segments(get_zone(tz_name))
+    if segments is None:
+        return None
+    starts, offsets = np.array(segments[0], dtype=np.int64), np.array(segments[1], dtype=np.int64)
+    # Transiciones que solo cambian la abreviatura (p. ej. PWT → PPT) no cuentan
+    keep = np.append(True, offsets[1:] != offsets[:-1])
+    return starts[keep], offsets[keep]
+
+
+def _sampled_segments(zone, t0: int, t1: int):
+    """Tramos en [t0, t1] muestreando el offset (zonas que no son tzfile)."""
+    starts = [np.iinfo(np.int64).min]
+    offsets = [_offset_at(zone, t0)]
+    prev_t = t0
+    for t in range(t0 + _SAMPLE_SECONDS, t1 + _SAMPLE_SECONDS, _SAMPLE_SECONDS):
+        offset = _offset_at(zone, t)
+        if offset == offsets[-1]:
+            prev_t = t
+            continue
+        # Primer segundo con el offset nuevo en (prev_t, t]
+        lo, hi = prev_t, t
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if _offset_at(zone, mid) == offsets[-1]:
+                lo = mid
+            else:
+                hi = mid
+        starts.append(hi)
+        offsets.append(offset)
+        prev_t = t
+    return np.array(starts, dtype=np.int64), np.array(offsets, dtype=np.int64)
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def zone_table(tz_name: str, year: int):
+    """
+    Tramos de offset constante que cubren las horas locales de `year`.
+
+    Returns:
+        (starts, offsets): arrays int64; el tramo i empieza en el instante UTC
+        starts[i] (segundos Unix; el primero es -inf en la práctica) y tiene
+        offset offsets[i]. Cubre un día antes y después del año (±14 h de
+        offset como mucho).
+    """
+    t0 = int((datetime(year, 1, 1) - _EPOCH).total_seconds()) - 86400
+    t1 = int((datetime(year + 1, 1, 1) - _EPOCH).total_seconds()) + 86400
+    segments = _zone_segments(tz_name)
+    if segments is None:
+        return _sampled_segments(get_zone(tz_name), t0, t1)
+    starts, offsets = segments
+    # Tramo vigente en t0 y los que empiezan hasta t1
+    first = np.searchsorted(starts, t0, side="right") - 1
+    last = np.searchsorted(starts, t1, side="right")
+    table_starts = starts[first:last].copy()
+    table_starts[0] = np.iinfo(np.int64).min
+    return table_starts, offsets[first:last].copy()
+
+
+def _resolve(local_seconds, starts, offsets, ambiguous, nonexistent):
+    """Offset y estado de cada hora local (segundos Unix "de pared")."""
+    ends = np.append(starts[1:], np.iinfo(np.int64).max)
+    # valid[i, j]: la hora local j existe en el tramo i
+    utc = local_seconds[None, :] - offsets[:, None]
+    valid = (utc >= starts[:, None]) & (utc < ends[:, None])
+    count = valid.sum(axis=0)
+
+    first = np.argmax(valid, axis=0)
+    last = len(offsets) - 1 - np.argmax(valid[::-1], axis=0)
+    chosen = first if ambiguous != "later" else last
+    result = offsets[chosen]
+    status = np.where(count > 1, AMBIGUOUS, OK)
+
+    gap = count == 0
+    if gap.any():
+        # Hueco entre el tramo k y el k+1: con el offset del tramo k la hora
+        # ya ha pasado su fin; con el del k+1 aún no llega a su inicio
+        after = np.argmax(utc < ends[:, None], axis=0)
+        pick = after if nonexistent == "shift_backward" else np.maximum(after - 1, 0)
+        result = np.where(gap, offsets[pick], result)
+        status = np.where(gap, NONEXISTENT, status)
+    return result, status
+
+
+def _naive(dt: datetime) -> datetime:
+    return dt if dt.tzinfo is None else dt.replace(tzinfo=None)
+
+
+def _wall_seconds(local_datetimes) -> np.ndarray:
+    """Horas de pared como segundos Unix "locales" (int64, sin tzinfo)."""
+    return np.fromiter(
+        ((_naive(dt) - _EPOCH) // _ONE_SECOND for dt in local_datetimes),
+        dtype=np.int64, count=len(local_datetimes),
+    )
+
+
+def _check_policies(ambiguous, nonexistent):
+    if ambiguous not in AMBIGUOUS_POLICIES:
+        raise ValueError(f"Invalid ambiguous policy: {ambiguous} (use {', '.join(AMBIGUOUS_POLICIES)})")
+    if nonexistent not in NONEXISTENT_POLICIES:
+        raise ValueError(f"Invalid nonexistent policy: {nonexistent} (use {', '.join(NONEXISTENT_POLICIES)})")
+
+
+def utc_offsets(local_datetimes, tz_names, ambiguous: str = "earlier",
+                nonexistent: str = "shift_forward"):
+    """
+    Offset UTC (segundos) y estado (OK/AMBIGUOUS/NONEXISTENT) de cada hora local.
+
+    Args:
+        local_datetimes: secuencia de datetimes de pared (se ignora su tzinfo)
+        tz_names: nombre de zona común o uno por elemento
+
+    No lanza por las políticas "raise": el llamador decide con el estado
+    (ver `raise_for_status`), lo que permite errores por elemento en lotes.
+    """
+    _check_policies(ambiguous, nonexistent)
+    n = len(local_datetimes)
+    if isinstance(tz_names, str):
+        tz_names = [tz_names] * n
+    offsets = np.zeros(n, dtype=np.int64)
+    status = np.zeros(n, dtype=np.int8)
+    if n == 0:
+        return offsets, status
+
+    local_seconds = _wall_seconds(local_datetimes)
+    groups = {}
+    for i, (dt, name) in enumerate(zip(local_datetimes, tz_names)):
+        groups.setdefault((name, dt.year), []).append(i)
+    for (name, year), idx in groups.items():
+        idx = np.array(idx)
+        starts, zone_offsets = zone_table(name, year)
+        offsets[idx], status[idx] = _resolve(local_seconds[idx], starts, zone_offsets, ambiguous, nonexistent)
+    return offsets, status
+
+
+def raise_for_status(local_dt: datetime, tz_name: str, status: int,
+                     ambiguous: str, nonexistent: str):
+    """Lanza si el estado de la hora local choca con una política "raise"."""
+    if status == AMBIGUOUS and ambiguous == "raise":
+        raise AmbiguousTimeError(f"Ambiguous local time {local_dt.isoformat()} in {tz_name}")
+    if status == NONEXISTENT and nonexistent == "raise":
+        raise NonExistentTimeError(f"Nonexistent local time {local_dt.isoformat()} in {tz_name}")
+
+
+def utc_to_jd_ut(dt_utc: datetime) -> float:
+    """datetime UTC ingenuo → Julian Day UT1 con `swe.utc_to_jd` (segundos intercalares)."""
+    sec = dt_utc.second + dt_utc.microsecond / 1e6
+    jd_et, jd_ut = swe.utc_to_jd(dt_utc.year, dt_utc.month, dt_utc.day,
+                                  dt_utc.hour, dt_utc.minute, sec, swe.GREG_CAL)
+    return jd_ut
+
+
+def local_to_jd_ut_many(local_datetimes, tz_names, ambiguous: str = "earlier",
+                        nonexistent: str = "shift_forward", with_status: bool = False):
+    """
+    Muchas horas locales → array de Julian Day UT.
+
+    Con `with_status=True` devuelve también el array de estados.
+    Lanza AmbiguousTimeError / NonExistentTimeError si una política es "raise".
+    """
+    offsets, status = utc_offsets(local_datetimes, tz_names, ambiguous, nonexistent)
+    if (status != OK).any():
+        names = [tz_names] * len(local_datetimes) if isinstance(tz_names, str) else tz_names
+        for i in np.nonzero(status)[0]:
+            raise_for_status(local_datetimes[i], names[i], status[i], ambiguous, nonexistent)
+    jds = np.fromiter(
+        (utc_to_jd_ut(_naive(dt) - timedelta(seconds=offset))
+         for dt, offset in zip(local_datetimes, offsets.tolist())),
+        dtype=float, count=len(local_datetimes),
+    )
+    return (jds, status) if with_status else jds
+
+
+def _resolve_one(local_seconds: int, starts, offsets, ambiguous, nonexistent):
+    """Versión escalar de `_resolve` (sin el coste fijo de numpy)."""
+    ends = starts[1:] + [np.iinfo(np.int64).max]
+    candidates = [offset for start, end, offset in zip(starts, ends, offsets)
+                  if start <= local_seconds - offset < end]
+    if len(candidates) == 1:
+        return candidates[0], OK
+    if candidates:
+        return (candidates[-1] if ambiguous == "later" else candidates[0]), AMBIGUOUS
+    after = next(i for i, (end, offset) in enumerate(zip(ends, offsets)) if local_seconds - offset < end)
+    pick = after if nonexistent == "shift_backward" else max(after - 1, 0)
+    return offsets[pick], NONEXISTENT
+
+
+def utc_offset(local_dt: datetime, tz_name: str, ambiguous: str = "earlier",
+               nonexistent: str = "shift_forward"):
+    """Versión escalar de `utc_offsets`: (offset en segundos, estado)."""
+    _check_policies(ambiguous, nonexistent)
+    wall = _naive(local_dt)
+    starts, offsets = zone_table(tz_name, wall.year)
+    return _resolve_one((wall - _EPOCH) // _ONE_SECOND, starts.tolist(), offsets.tolist(),
+                        ambiguous, nonexistent)
+
+
+def local_to_jd_ut(local_dt: datetime, tz_name: str, ambiguous: str = "earlier",
+                   nonexistent: str = "shift_forward", with_status: bool = False):
+    """Una hora local → Julian Day UT (ver `local_to_jd_ut_many`)."""
+    offset, status = utc_offset(local_dt, tz_name, ambiguous, nonexistent)
+    raise_for_status(local_dt, tz_name, status, ambiguous, nonexistent)
+    jd = utc_to_jd_ut(_naive(local_dt) - timedelta(seconds=offset))
+    return (jd, status) if with_status else jd
+
+
+def cache_info() -> dict:
+    """Aciertos/fallos de los LRU de zonas y de tablas de transiciones."""
+    return {
+        "zones": get_zone.cache_info()._asdict(),
+        "tables": zone_table.cache_info()._asdict(),
+    }
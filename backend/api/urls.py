@@ -14,13 +14,23 @@
 # along with astroapi.  If not, see <https://www.gnu.org/licenses/>.
 
 from django.urls import path
-from .views import health, compute_chart_view, daily_horoscope_view, transits_view, monthly_transits_view, cache_stats_view
+from .views import health, compute_chart_view, compute_batch_view, daily_horoscope_view, horoscope_batch_view, horoscope_range_view, transits_view, monthly_transits_view, eclipses_view, cache_stats_view, synastry_view, synastry_top_view, register_chart_view, chart_detail_view, formats_view, ephemeris_view
 
 urlpatterns = [
     path("health/", health, name="health"),
+    path("formats/", formats_view, name="formats"),
     path("compute/", compute_chart_view, name="compute_chart"),
+    path("compute/batch/", compute_batch_view, name="compute_batch"),
+    path("charts/", register_chart_view, name="register_chart"),
+    path("charts/<str:chart_id>/", chart_detail_view, name="chart_detail"),
+    path("synastry/", synastry_view, name="synastry"),
+    path("synastry/top/", synastry_top_view, name="synastry_top"),
     path("horoscope/daily/", daily_horoscope_view, name="daily_horoscope"),
+    path("horoscope/batch/", horoscope_batch_view, name="horoscope_batch"),
+    path("horoscope/range/", horoscope_range_view, name="horoscope_range"),
     path("transits/", transits_view, name="transits"),
+    path("ephemeris/", ephemeris_view, name="ephemeris"),
     path("monthly-transits/<int:month>/<int:year>/", monthly_transits_view, name="monthly_transits"),
+    path("eclipses/<int:year>/", eclipses_view, name="eclipses"),
     path("cache/stats/", cache_stats_view, name="cache_stats"),
 ]
\ No newline at end of file
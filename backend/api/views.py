@@ -15,21 +15,197 @@
 
 import os
 import json
+import time
 from datetime import datetime
-from django.http import JsonResponse, HttpResponseBadRequest
+from django.http import (
+    JsonResponse, HttpResponse, HttpResponseBadRequest, HttpResponseNotModified, HttpResponseRedirect,
+    StreamingHttpResponse,
+)
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
 from django.conf import settings
-from .services import compute_chart, get_important_transits
-from .horoscope_service import generate_daily_horoscope_personal, calculate_transits
+from django.utils.cache import add_never_cache_headers, patch_vary_headers
+from .services import (
+    compute_chart, compute_charts_batch, chart_etag, chart_payload_from_query,
+    REQUIRED_CHART_FIELDS, MAX_BATCH_CHARTS,
+)
+from .horoscope_service import generate_daily_horoscope_personal, calculate_transits, cached_transits, horoscope_etag
+from .horoscope_batch import MAX_BATCH_HOROSCOPES, stream_horoscopes
+from .horoscope_range import MAX_RANGE_DAYS, horoscope_range, range_etag
+from .ephemeris_engine import get_engine
+from .cache_manager import TIERS, CacheManager, cache_natal_chart, response_cache
+from .prerendered import prerendered_response, render_json, response_key
+from .formats import CONTENT_TYPES, format_etag, format_response, formats_info, negotiate, render
+from .chart_registry import cached_chart, full_chart_payload, load_chart, load_charts, register_chart
+from .eclipses import eclipses_for_year, indexed_eclipses
+from .ephemeris_stream import STREAM_FORMATS, EphemerisRange, stream_ephemeris, stream_stats
+from .monthly_store import get_monthly_transits, get_store, monthly_etag
+from .offload import get_executor, offload, offload_io, offload_iter
+from .admission import Overloaded, admitted, gates_info
+from .warmer import get_warmer, traffic
+from .synastry import ChartPool, compute_synastry, get_pool, MAX_INLINE_POOL, MAX_TOP_K
 
 REPO_URL = os.environ.get("SOURCE_REPO_URL", "https://github.com/tuusuario/astro-backend")
 
+def etag_matches(request, etag: str) -> bool:
+    """
+    True si el If-None-Match de la petición incluye `etag` (o es *).
+    Comparación débil (RFC 9110): GZipMiddleware marca W/ los ETag que comprime.
+    """
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+@cache_natal_chart()
+def compute_chart_cached(payload: dict, ephe_path: str = None) -> dict:
+    """Carta natal con caché de dos niveles; el cálculo va al motor de efemérides."""
+    return get_engine().run(compute_chart, payload, ephe_path)
+
+
+async def load_chart_async(chart_id: str):
+    """Carta registrada: natal_cache en el bucle y, si falta, la base de datos vía sync_to_async."""
+    chart = cached_chart(chart_id)
+    if chart is None:
+        chart = await sync_to_async(load_chart)(chart_id)
+    return chart
+
+
+async def cached_response(cache_key: str):
+    """Entrada de response_cache: L1 en el bucle y, si falta, L2 (SQLite) en un hilo."""
+    entry = response_cache.get_l1(cache_key)
+    if entry is None:
+        entry = await offload_io(response_cache.get, cache_key)
+    return entry
+
+
+async def daily_horoscope_async(birth_data, target_date, timezone, chart_id=None):
+    """Horóscopo de la caché (leída en un hilo) o calculado en el executor."""
+    result = await offload_io(generate_daily_horoscope_personal.peek, birth_data, target_date, timezone,
+                              chart_id=chart_id)
+    if result is None:
+        result = await admitted("horoscope", generate_daily_horoscope_personal.fill, birth_data, target_date,
+                                timezone, chart_id=chart_id)
+    return result
+
+
 def health(request):
     resp = JsonResponse({"status": "ok"})
     resp["X-Source-Code"] = REPO_URL
     resp["X-License"] = "AGPL-3.0-only"
     return resp
 
-def compute_chart_view(request):
+def bad_format() -> HttpResponseBadRequest:
+    return HttpResponseBadRequest("Invalid format. Use json, compact or packed.")
+
+
+def formats_view(request):
+    """
+    GET /api/formats/
+
+    Formatos de respuesta y tablas de ids del binario empaquetado (ver api/formats.py).
+    """
+    resp = JsonResponse(formats_info())
+    resp["X-Source-Code"] = REPO_URL
+    resp["X-License"] = "AGPL-3.0-only"
+    return resp
+
+
+def not_modified(etag: str) -> HttpResponseNotModified:
+    resp = HttpResponseNotModified()
+    resp["ETag"] = etag
+    return resp
+
+
+def streaming_response(request, chunks, content_type: str) -> StreamingHttpResponse:
+    """
+    StreamingHttpResponse de un generador síncrono de bloques. Con ASGI va
+    como iterador async (offload_iter) para que cada bloque se envíe al
+    generarse; con WSGI el servidor ya lo consume bloque a bloque.
+    """
+    if isinstance(request, ASGIRequest):
+        chunks = offload_iter(chunks)
+    return StreamingHttpResponse(chunks, content_type=content_type)
+
+
+def redirect_to_today(request, param: str) -> HttpResponseRedirect:
+    """
+    302 (no cacheable) a la misma URL con `param` = hoy. Cada día tiene así
+    su propia URL cacheable y una caché pública no puede servir la respuesta
+    de ayer pasada la medianoche.
+    """
+    query = request.GET.copy()
+    query[param] = datetime.now().strftime("%Y-%m-%d")
+    resp = HttpResponseRedirect(f"{request.path}?{query.urlencode()}")
+    add_never_cache_headers(resp)
+    return resp
+
+async def compute_chart_view(request):
+    """
+    POST /api/compute/ con el payload JSON, o bien
+    GET /api/compute/?datetime=…&timezone=…&latitude=…&longitude=…&house_system=…&topocentric_moon_only=…
+    con los mismos campos como parámetros. El GET es cacheable: ETag fuerte
+    de las entradas normalizadas y 304 con If-None-Match sin calcular nada.
+    `?format=compact|packed` (o Accept) elige el formato (ver api/formats.py).
+    Vista async: la caché se consulta en el bucle y el cálculo va al executor.
+    """
+    fmt = negotiate(request)
+    if fmt is None:
+        return bad_format()
+    if request.method == "GET":
+        try:
+            payload = chart_payload_from_query(request.GET)
+        except ValueError as e:
+            return HttpResponseBadRequest(str(e))
+    elif request.method == "POST":
+        try:
+            payload = json.loads(request.body.decode("utf-8"))
+        except Exception:
+            return HttpResponseBadRequest("Invalid JSON.")
+    else:
+        return HttpResponseBadRequest("Use GET with query parameters or POST with JSON payload.")
+
+    # Validate required fields
+    for field in REQUIRED_CHART_FIELDS:
+        if field not in payload:
+            return HttpResponseBadRequest(f"Missing required field: {field}")
+
+    etag = None
+    if request.method == "GET":
+        try:
+            etag = format_etag(chart_etag(payload), fmt)
+        except Exception as e:
+            return HttpResponseBadRequest(f"Calculation error: {str(e)}")
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+    try:
+        result = compute_chart_cached.peek(payload)
+        if result is None:
+            # L2 y, si falta, el cálculo, en el executor
+            result = await offload(compute_chart_cached, payload, settings.SE_EPHE_PATH)
+    except Exception as e:
+        return HttpResponseBadRequest(f"Calculation error: {str(e)}")
+
+    resp = format_response("chart", result, fmt)
+    if etag:
+        resp["ETag"] = etag
+    resp["X-Source-Code"] = REPO_URL
+    resp["X-License"] = "AGPL-3.0-only"
+    return resp
+
+
+async def compute_batch_view(request):
+    """
+    POST /api/compute/batch/
+
+    Payload: lista de payloads de /api/compute/ (o {"charts": [...]}).
+    Devuelve las cartas en el mismo orden; los elementos inválidos llevan
+    "error" en lugar de "chart" sin invalidar el resto del lote.
+    Vista async: el lote se calcula en el executor.
+    """
     if request.method != "POST":
         return HttpResponseBadRequest("Use POST with JSON payload.")
     try:
@@ -37,38 +213,203 @@ def compute_chart_view(request):
     except Exception:
         return HttpResponseBadRequest("Invalid JSON.")
 
-    # Validate required fields
-    required_fields = ["datetime", "timezone", "latitude", "longitude", "house_system", "topocentric_moon_only"]
-    for field in required_fields:
+    charts = payload.get("charts") if isinstance(payload, dict) else payload
+    if not isinstance(charts, list):
+        return HttpResponseBadRequest("Expected a list of chart payloads.")
+    if len(charts) > MAX_BATCH_CHARTS:
+        return HttpResponseBadRequest(f"Too many charts (max {MAX_BATCH_CHARTS}).")
+
+    start = time.perf_counter()
+    results = await offload(get_engine().run, compute_charts_batch, charts, settings.SE_EPHE_PATH)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "count": len(results),
+        "errors": sum(1 for r in results if "error" in r),
+        "results": results,
+        "meta": {
+            "elapsed_ms": round(elapsed * 1000, 2),
+            "charts_per_second": round(len(results) / elapsed, 1) if elapsed > 0 else None,
+        }
+    }
+
+    resp = JsonResponse(result, json_dumps_params={"ensure_ascii": False})
+    resp["X-Source-Code"] = REPO_URL
+    resp["X-License"] = "AGPL-3.0-only"
+    return resp
+
+
+def _chart_planets(chart):
+    """Acepta la salida de /api/compute/ ({"planets": {...}}) o directamente los planetas."""
+    if isinstance(chart, dict) and isinstance(chart.get("planets"), dict):
+        return chart["planets"]
+    return chart
+
+
+async def synastry_view(request):
+    """
+    POST /api/synastry/
+
+    Payload: {"chart_a": carta, "chart_b": carta} (salida de /api/compute/ o sus "planets").
+    Retorna los aspectos cruzados entre ambas cartas con su puntuación.
+    Vista async: el cálculo va al executor.
+    """
+    if request.method != "POST":
+        return HttpResponseBadRequest("Use POST with JSON payload.")
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except Exception:
+        return HttpResponseBadRequest("Invalid JSON.")
+    if not isinstance(payload, dict):
+        return HttpResponseBadRequest("Expected a JSON object.")
+
+    for field in ("chart_a", "chart_b"):
+        if not isinstance(_chart_planets(payload.get(field)), dict):
+            return HttpResponseBadRequest(f"Missing or invalid field: {field}")
+
+    try:
+        result = await offload(compute_synastry, _chart_planets(payload["chart_a"]), _chart_planets(payload["chart_b"]))
+    except (KeyError, TypeError, ValueError) as e:
+        return HttpResponseBadRequest(f"Invalid chart: {str(e)}")
+
+    resp = JsonResponse(result, json_dumps_params={"ensure_ascii": False})
+    resp["X-Source-Code"] = REPO_URL
+    resp["X-License"] = "AGPL-3.0-only"
+    return resp
+
+
+def rank_pool(pool_charts, chart, k: int) -> tuple:
+    """
+    (población, k mejores) con la población del payload o, si `pool_charts`
+    es None, la guardada; (None, None) si no hay población guardada.
+    """
+    pool = get_pool() if pool_charts is None else ChartPool.from_charts(pool_charts)
+    if pool is None:
+        return None, None
+    return pool, pool.top_k(chart, k)
+
+
+async def synastry_top_view(request):
+    """
+    POST /api/synastry/top/
+
+    Payload: {"chart": carta, "k": 10, "pool": [{"id", "planets" | "longitudes"}, ...]}
+    Sin "pool" se usa la población guardada (SYNASTRY_POOL_PATH).
+    Retorna las k cartas más compatibles, de mayor a menor puntuación.
+    Vista async: cargar la población y puntuarla va al executor.
+    """
+    if request.method != "POST":
+        return HttpResponseBadRequest("Use POST with JSON payload.")
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except Exception:
+        return HttpResponseBadRequest("Invalid JSON.")
+    if not isinstance(payload, dict) or "chart" not in payload:
+        return HttpResponseBadRequest("Missing required field: chart")
+
+    try:
+        k = int(payload.get("k", 10))
+    except (TypeError, ValueError):
+        return HttpResponseBadRequest("k must be an integer.")
+    if not (1 <= k <= MAX_TOP_K):
+        return HttpResponseBadRequest(f"k must be between 1 and {MAX_TOP_K}.")
+
+    start = time.perf_counter()
+    try:
+        if "pool" in payload:
+            if not isinstance(payload["pool"], list):
+                return HttpResponseBadRequest("pool must be a list.")
+            if len(payload["pool"]) > MAX_INLINE_POOL:
+                return HttpResponseBadRequest(f"Too many charts in pool (max {MAX_INLINE_POOL}).")
+        pool, results = await offload(rank_pool, payload.get("pool"), _chart_planets(payload["chart"]), k)
+        if pool is None:
+            return HttpResponseBadRequest("No stored pool; send 'pool' in the payload.")
+    except (KeyError, TypeError, ValueError) as e:
+        return HttpResponseBadRequest(f"Invalid chart: {str(e)}")
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "count": len(results),
+        "pool_size": len(pool),
+        "results": results,
+        "meta": {"elapsed_ms": round(elapsed * 1000, 2)},
+    }
+    resp = JsonResponse(result, json_dumps_params={"ensure_ascii": False})
+    resp["X-Source-Code"] = REPO_URL
+    resp["X-License"] = "AGPL-3.0-only"
+    return resp
+
+
+def register_chart_view(request):
+    """
+    POST /api/charts/
+
+    Mismo payload que /api/compute/ (se ignoran `bodies`/`fields`: se guarda
+    la carta completa). Devuelve {"chart_id", "chart"}; el chart_id sustituye
+    a la carta completa en /api/horoscope/daily/.
+    """
+    if request.method != "POST":
+        return HttpResponseBadRequest("Use POST with JSON payload.")
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except Exception:
+        return HttpResponseBadRequest("Invalid JSON.")
+
+    for field in REQUIRED_CHART_FIELDS:
         if field not in payload:
             return HttpResponseBadRequest(f"Missing required field: {field}")
 
     try:
-        result = compute_chart(payload, settings.SE_EPHE_PATH)
+        payload = full_chart_payload(payload)
+        chart = compute_chart_cached(payload, settings.SE_EPHE_PATH)
     except Exception as e:
         return HttpResponseBadRequest(f"Calculation error: {str(e)}")
+    chart_id = register_chart(payload, chart)
 
-    resp = JsonResponse(result, json_dumps_params={"ensure_ascii": False})
+    resp = JsonResponse({"chart_id": chart_id, "chart": chart}, status=201,
+                        json_dumps_params={"ensure_ascii": False})
     resp["X-Source-Code"] = REPO_URL
     resp["X-License"] = "AGPL-3.0-only"
     return resp
 
 
-def daily_horoscope_view(request):
+def chart_detail_view(request, chart_id):
+    """GET /api/charts/<chart_id>/: carta registrada."""
+    if request.method != "GET":
+        return HttpResponseBadRequest("Use GET.")
+    chart = load_chart(chart_id)
+    if chart is None:
+        return JsonResponse({"error": "Unknown chart_id."}, status=404)
+
+    resp = JsonResponse({"chart_id": chart_id, "chart": chart}, json_dumps_params={"ensure_ascii": False})
+    resp["X-Source-Code"] = REPO_URL
+    resp["X-License"] = "AGPL-3.0-only"
+    return resp
+
+
+async def daily_horoscope_view(request):
     """
     POST /api/horoscope/daily/
     
     Payload:
     {
-        "birth_data": {
-            // Carta natal completa (output de /api/compute/)
-            "planets": {...},
-            "houses": {...}
-        },
+        "chart_id": "3f1c…",  // carta registrada en /api/charts/
+        // o bien la carta natal completa (output de /api/compute/):
+        "birth_data": {"planets": {...}, "houses": {...}},
         "target_date": "2025-10-09",  // opcional, default: hoy
         "timezone": "America/Tegucigalpa"  // opcional, default: UTC
     }
+
+    GET /api/horoscope/daily/?chart_id=…&target_date=YYYY-MM-DD&timezone=…
+    (solo cartas registradas) es cacheable: ETag fuerte y 304 con If-None-Match.
+    `?format=compact|packed` (o Accept) elige el formato (ver api/formats.py).
+    Vista async: la caché se consulta en el bucle y el cálculo va al executor.
     """
+    fmt = negotiate(request)
+    if fmt is None:
+        return bad_format()
+    if request.method == "GET":
+        return await _daily_horoscope_get(request, fmt)
     if request.method != "POST":
         return HttpResponseBadRequest("Use POST with JSON payload.")
     
@@ -78,12 +419,17 @@ def daily_horoscope_view(request):
         return HttpResponseBadRequest("Invalid JSON.")
     
     # Validar carta natal
-    if "birth_data" not in payload:
-        return HttpResponseBadRequest("Missing 'birth_data' field.")
-    
-    birth_data = payload["birth_data"]
-    if "planets" not in birth_data or "houses" not in birth_data:
-        return HttpResponseBadRequest("birth_data must contain 'planets' and 'houses'.")
+    chart_id = payload.get("chart_id")
+    if chart_id is not None:
+        birth_data = await load_chart_async(chart_id)
+        if birth_data is None:
+            return JsonResponse({"error": "Unknown chart_id."}, status=404)
+    elif "birth_data" not in payload:
+        return HttpResponseBadRequest("Missing 'chart_id' or 'birth_data' field.")
+    else:
+        birth_data = payload["birth_data"]
+        if "planets" not in birth_data or "houses" not in birth_data:
+            return HttpResponseBadRequest("birth_data must contain 'planets' and 'houses'.")
     
     # Fecha objetivo (default: hoy)
     target_date_str = payload.get("target_date")
@@ -96,27 +442,269 @@ def daily_horoscope_view(request):
         target_date = datetime.now()
     
     timezone = payload.get("timezone", "UTC")
+    traffic.record(timezone=timezone, date=target_date_str)
+    
+    # Un acierto sirve los bytes ya serializados (y comprimidos) de la respuesta
+    cache_key = response_key("post" if fmt == "json" else f"post-{fmt}", CacheManager.get_horoscope_key(
+        birth_data, target_date.strftime("%Y-%m-%d"), timezone, chart_id))
+    entry = await cached_response(cache_key)
+    if entry is None:
+        try:
+            result = await daily_horoscope_async(birth_data, target_date, timezone, chart_id=chart_id)
+        except Overloaded:
+            raise
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+        # La copia cacheada lleva `_from_cache` true: solo un cálculo propio se renderiza dos veces
+        entry = render("horoscope", result, fmt)
+        hit = entry if result.get("_from_cache") else render("horoscope", dict(result, _from_cache=True), fmt)
+        await offload_io(response_cache.set, cache_key, hit, CacheManager.TTL_DAILY_HOROSCOPE)
     
+    resp = prerendered_response(request, entry, content_type=CONTENT_TYPES[fmt])
+    patch_vary_headers(resp, ("Accept",))
+    resp["X-Source-Code"] = REPO_URL
+    resp["X-License"] = "AGPL-3.0-only"
+    return resp
+
+
+async def _daily_horoscope_get(request, fmt: str):
+    """
+    Variante GET: sin target_date redirige a la URL con la fecha de hoy, así
+    que la respuesta (cacheable 6 horas) solo depende de su URL.
+    `_from_cache` pasa del cuerpo a la cabecera X-Cache-Status para que el
+    cuerpo de un mismo ETag sea siempre idéntico.
+    """
+    chart_id = request.GET.get("chart_id")
+    if not chart_id:
+        return HttpResponseBadRequest("Missing 'chart_id' parameter.")
+    target_date_str = request.GET.get("target_date")
+    if not target_date_str:
+        return redirect_to_today(request, "target_date")
+    try:
+        target_date = datetime.strptime(target_date_str, "%Y-%m-%d")
+    except ValueError:
+        return HttpResponseBadRequest("Invalid target_date format. Use YYYY-MM-DD.")
+    timezone = request.GET.get("timezone", "UTC")
+
+    etag = format_etag(horoscope_etag(chart_id, target_date_str, timezone), fmt)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    # Solo hay respuesta cacheada de cartas que existen: un acierto no carga la carta
+    variant = "get" if fmt == "json" else f"get-{fmt}"
+    cache_key = response_key(variant, CacheManager.get_horoscope_key(None, target_date_str, timezone, chart_id))
+    entry = await cached_response(cache_key)
+    if entry is None:
+        birth_data = await load_chart_async(chart_id)
+        if birth_data is None:
+            return JsonResponse({"error": "Unknown chart_id."}, status=404)
+    traffic.record(timezone=timezone, date=target_date_str)
+
+    cache_status = "HIT"
+    if entry is None:
+        try:
+            result = await daily_horoscope_async(birth_data, target_date, timezone, chart_id=chart_id)
+        except Overloaded:
+            raise
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+        entry = render("horoscope", {key: value for key, value in result.items() if key != "_from_cache"}, fmt)
+        await offload_io(response_cache.set, cache_key, entry, CacheManager.TTL_DAILY_HOROSCOPE)
+        cache_status = "HIT" if result.get("_from_cache") else "MISS"
+
+    resp = prerendered_response(request, entry, etag=etag, content_type=CONTENT_TYPES[fmt])
+    patch_vary_headers(resp, ("Accept",))
+    resp["X-Cache-Status"] = cache_status
+    resp["X-Source-Code"] = REPO_URL
+    resp["X-License"] = "AGPL-3.0-only"
+    return resp
+
+
+def range_params(query) -> tuple:
+    """(start, start_str, days, timezone) de una petición de rango; ValueError si no valen."""
+    start_str = query.get("start") or datetime.now().strftime("%Y-%m-%d")
+    try:
+        start = datetime.strptime(start_str, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        raise ValueError("Invalid start format. Use YYYY-MM-DD.")
+    try:
+        days = int(query.get("days", 7))
+    except (TypeError, ValueError):
+        raise ValueError("days must be an integer.")
+    if not 1 <= days <= MAX_RANGE_DAYS:
+        raise ValueError(f"days must be between 1 and {MAX_RANGE_DAYS}.")
+    return start, start_str, days, query.get("timezone", "UTC")
+
+
+async def horoscope_range_view(request):
+    """
+    GET /api/horoscope/range/?chart_id=…&start=YYYY-MM-DD&days=7&timezone=…
+    POST /api/horoscope/range/ con {"chart_id" o "birth_data", "start", "days", "timezone"}
+
+    Un horóscopo diario por día (como /api/horoscope/daily/, hasta
+    MAX_RANGE_DAYS) y en `changes` lo que cambia de un día al siguiente.
+    Sin `start` se empieza hoy (el GET redirige a la URL con esa fecha); sin
+    `days`, 7. La carta se compila una vez y los tránsitos de todos los días
+    salen de una sola consulta de efemérides (ver horoscope_range.py). El GET
+    es cacheable: ETag fuerte y 304.
+    """
+    if request.method == "GET":
+        query = request.GET
+    elif request.method == "POST":
+        try:
+            query = json.loads(request.body.decode("utf-8"))
+        except Exception:
+            return HttpResponseBadRequest("Invalid JSON.")
+        if not isinstance(query, dict):
+            return HttpResponseBadRequest("Expected a JSON object.")
+    else:
+        return HttpResponseBadRequest("Use GET or POST.")
+
+    try:
+        start, start_str, days, timezone = range_params(query)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    chart_id = query.get("chart_id")
+    if request.method == "GET" and not chart_id:
+        return HttpResponseBadRequest("Missing 'chart_id' parameter.")
+    if request.method == "GET" and not query.get("start"):
+        return redirect_to_today(request, "start")
+
+    etag = cache_key = entry = None
+    if request.method == "GET":
+        etag = range_etag(chart_id, start_str, days, timezone)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        cache_key = response_key("range", f"horoscope-range:{chart_id}:{start_str}:{days}:{timezone}")
+        entry = await cached_response(cache_key)
+
+    if entry is None:
+        if chart_id is not None:
+            birth_data = await load_chart_async(chart_id)
+            if birth_data is None:
+                return JsonResponse({"error": "Unknown chart_id."}, status=404)
+        elif isinstance(query.get("birth_data"), dict):
+            birth_data = query["birth_data"]
+        else:
+            return HttpResponseBadRequest("Missing 'chart_id' or 'birth_data' field.")
+        traffic.record(timezone=timezone, date=start_str)
+        try:
+            result = await admitted("horoscope", horoscope_range, birth_data, start, days, timezone)
+        except Overloaded:
+            raise
+        except ValueError as e:
+            return HttpResponseBadRequest(str(e))
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+        if chart_id is not None:
+            result = {"chart_id": chart_id, **result}
+        entry = render_json(result)
+        if cache_key is not None:
+            await offload_io(response_cache.set, cache_key, entry, CacheManager.TTL_DAILY_HOROSCOPE)
+
+    resp = prerendered_response(request, entry, etag=etag)
+    resp["X-Source-Code"] = REPO_URL
+    resp["X-License"] = "AGPL-3.0-only"
+    return resp
+
+
+async def horoscope_batch_view(request):
+    """
+    POST /api/horoscope/batch/
+
+    Payload:
+    {
+        "target_date": "2025-10-09",  // opcional, default: hoy
+        "timezone": "UTC",            // opcional
+        "charts": [
+            {"id": "user_001", "chart_id": "3f1c…"},
+            {"id": "user_002", "birth_data": {"planets": {...}, "houses": {...}}}
+        ]
+        // o "chart_ids": ["3f1c…", …]
+    }
+
+    Horóscopos de todas las cartas para una misma fecha, en NDJSON y en el
+    orden del lote: {"index", "id"?, "chart_id"?, "horoscope"} por carta, o
+    "error" en lugar de "horoscope" sin cortar el resto. Los tránsitos se
+    calculan una vez y los aspectos y casas de todas las cartas se buscan en
+    bloque (ver horoscope_batch.py).
+    Vista async: la base de datos va por sync_to_async, los tránsitos al
+    executor con admisión y cada bloque de líneas se genera en el executor.
+    """
+    if request.method != "POST":
+        return HttpResponseBadRequest("Use POST with JSON payload.")
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except Exception:
+        return HttpResponseBadRequest("Invalid JSON.")
+    if not isinstance(payload, dict):
+        return HttpResponseBadRequest("Expected a JSON object.")
+
+    charts = payload.get("charts")
+    if charts is None and isinstance(payload.get("chart_ids"), list):
+        charts = [{"chart_id": chart_id} for chart_id in payload["chart_ids"]]
+    if not isinstance(charts, list):
+        return HttpResponseBadRequest("Missing 'charts' (or 'chart_ids') list.")
+    if len(charts) > MAX_BATCH_HOROSCOPES:
+        return HttpResponseBadRequest(f"Too many charts (max {MAX_BATCH_HOROSCOPES}).")
+
+    target_date_str = payload.get("target_date")
+    if target_date_str:
+        try:
+            target_date = datetime.strptime(target_date_str, "%Y-%m-%d")
+        except ValueError:
+            return HttpResponseBadRequest("Invalid target_date format. Use YYYY-MM-DD.")
+    else:
+        target_date = datetime.now()
+    timezone = payload.get("timezone", "UTC")
+    if not isinstance(timezone, str):
+        return HttpResponseBadRequest("timezone must be a string.")
+    traffic.record(timezone=timezone, date=target_date_str)
+
+    registered = await sync_to_async(load_charts)([c.get("chart_id") for c in charts if isinstance(c, dict)])
+    items = []
+    for index, entry in enumerate(charts):
+        head = {"index": index}
+        if not isinstance(entry, dict):
+            items.append((head, "Each chart must be an object with 'chart_id' or 'birth_data'."))
+            continue
+        head.update((key, entry[key]) for key in ("id", "chart_id") if key in entry)
+        if "chart_id" in entry:
+            chart = registered.get(entry["chart_id"]) if isinstance(entry["chart_id"], str) else None
+            items.append((head, chart if chart is not None else "Unknown chart_id."))
+        elif "birth_data" in entry:
+            items.append((head, entry["birth_data"]))
+        else:
+            items.append((head, "Missing 'chart_id' or 'birth_data' field."))
+
     try:
-        result = generate_daily_horoscope_personal(birth_data, target_date, timezone)
+        transits = await admitted("horoscope", calculate_transits, target_date, timezone)
+    except Overloaded:
+        raise
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
-    
-    resp = JsonResponse(result, json_dumps_params={"ensure_ascii": False})
+
+    resp = streaming_response(request, stream_horoscopes(items, target_date, timezone, transits=transits),
+                              "application/x-ndjson")
+    resp["X-Total-Charts"] = str(len(items))
     resp["X-Source-Code"] = REPO_URL
     resp["X-License"] = "AGPL-3.0-only"
     return resp
 
 
-def transits_view(request):
+async def transits_view(request):
     """
     GET /api/transits/?date=YYYY-MM-DD&timezone=America/Tegucigalpa
     
     Retorna la posición de la Luna (tránsito lunar) para una fecha/hora.
     Si no se especifica fecha, usa el momento actual.
+    `?format=compact|packed` (o Accept) elige el formato (ver api/formats.py).
     """
     if request.method != "GET":
         return HttpResponseBadRequest("Use GET request.")
+    fmt = negotiate(request)
+    if fmt is None:
+        return bad_format()
     
     date_str = request.GET.get("date")
     timezone = request.GET.get("timezone", "UTC")
@@ -128,9 +716,12 @@ def transits_view(request):
             return HttpResponseBadRequest("Invalid date format. Use YYYY-MM-DD.")
     else:
         target_date = datetime.now()
+    traffic.record(timezone=timezone, date=date_str)
     
     try:
-        transits = calculate_transits(target_date, timezone)
+        transits, fill = cached_transits(target_date, timezone)
+        if transits is None:
+            transits = await offload(fill)
         result = {
             "date": target_date.strftime("%Y-%m-%d"),
             "timezone": timezone,
@@ -139,33 +730,92 @@ def transits_view(request):
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
     
-    resp = JsonResponse(result, json_dumps_params={"ensure_ascii": False})
+    resp = format_response("transits", result, fmt)
     resp["X-Source-Code"] = REPO_URL
     resp["X-License"] = "AGPL-3.0-only"
     return resp
 
 
-def monthly_transits_view(request, month, year):
+def ephemeris_view(request):
+    """
+    GET /api/ephemeris/?start=2000-01-01&end=2030-12-31T23:00&step=1h&bodies=sun,moon&format=ndjson
+
+    Posiciones (longitud, velocidad) de un rango de instantes UTC en streaming,
+    una fila por instante en NDJSON (por defecto) o CSV. `step` admite m, h y
+    d; sin `bodies` se devuelven los diez planetas. La memoria no depende del
+    rango: se calcula y se envía por bloques (ver ephemeris_stream.py).
+    """
+    if request.method != "GET":
+        return HttpResponseBadRequest("Use GET request.")
+    try:
+        selection = EphemerisRange.from_query(request.GET)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    resp = streaming_response(request, stream_ephemeris(selection), STREAM_FORMATS[selection.fmt])
+    resp["X-Total-Rows"] = str(selection.rows)
+    resp["X-Source-Code"] = REPO_URL
+    resp["X-License"] = "AGPL-3.0-only"
+    return resp
+
+
+async def monthly_transits_view(request, month, year):
     """
     GET /api/monthly-transits/<int:month>/<int:year>/
     
     Retorna tránsitos importantes del mes: conjunciones, oposiciones, cuadraturas.
+    El resultado es determinista: se sirve del almacén persistente con ETag fuerte.
+    """
+    month = int(month)
+    year = int(year)
+    if not (1 <= month <= 12) or not (1900 <= year <= 2100):
+        return HttpResponseBadRequest("Invalid month or year.")
+    traffic.record(month=(year, month))
+
+    etag = monthly_etag(month, year)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    try:
+        body = await offload_io(get_store().get, month, year)
+        if body is None:
+            body = await admitted("monthly", get_monthly_transits, month, year)
+    except Overloaded:
+        raise
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
+    
+    resp = HttpResponse(body, content_type="application/json")
+    resp["ETag"] = etag
+    resp["X-Source-Code"] = REPO_URL
+    resp["X-License"] = "AGPL-3.0-only"
+    return resp
+
+
+async def eclipses_view(request, year):
+    """
+    GET /api/eclipses/<int:year>/
+
+    Retorna los eclipses solares y lunares del año (tipo, máximo UTC y magnitud).
     """
     try:
-        month = int(month)
         year = int(year)
-        if not (1 <= month <= 12) or not (1900 <= year <= 2100):
-            return HttpResponseBadRequest("Invalid month or year.")
-        
-        transits = get_important_transits(month, year)
+        if not (1900 <= year <= 2100):
+            return HttpResponseBadRequest("Invalid year.")
+
+        # Un año ya indexado se lee sin compuerta: solo el cálculo ocupa plaza
+        eclipses = await offload_io(indexed_eclipses, year)
+        if eclipses is None:
+            eclipses = await admitted("eclipses", get_engine().run, eclipses_for_year, year)
         result = {
-            "month": month,
             "year": year,
-            "important_transits": transits
+            "eclipses": [{k: v for k, v in e.items() if k != "jd_ut"} for e in eclipses]
         }
+    except Overloaded:
+        raise
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
-    
+
     resp = JsonResponse(result, json_dumps_params={"ensure_ascii": False})
     resp["X-Source-Code"] = REPO_URL
     resp["X-License"] = "AGPL-3.0-only"
@@ -178,13 +828,22 @@ def cache_stats_view(request):
     
     Retorna estadísticas de caché y performance.
     """
-    from .cache_manager import performance_monitor, SmartCache
+    from django.core.cache import cache
+    from .cache_manager import performance_monitor, SmartCache, SINGLE_FLIGHTS
+    from .timezones import cache_info
     
     stats = {
         "performance": performance_monitor.get_report(),
         "cache": SmartCache.get_cache_stats(),
+        "tiers": {tier.name: tier.stats() for tier in TIERS},
+        "single_flight": {flight.name: flight.stats() for flight in SINGLE_FLIGHTS},
+        "timezones": cache_info(),
+        "ephemeris_stream": stream_stats.info(),
+        "compute_executor": get_executor().info(),
+        "admission": gates_info(),
+        "warmer": get_warmer().info() if get_warmer() else None,
         "info": {
-            "cache_backend": "LocMemCache",
+            "cache_backend": type(cache).__name__,
             "compression": "gzip enabled",
             "ttl_transits": "1 hour",
             "ttl_horoscope": "6 hours",
@@ -0,0 +1,234 @@
+# This file is part of astroapi.
+#
+# astroapi is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+"""
+Precalentado de caché en segundo plano guiado por el tráfico real.
+
+Las vistas anotan en `traffic` qué zonas horarias, fechas y meses se piden.
+Un hilo por worker (`CacheWarmer`, arrancado en ApiConfig.ready) revisa cada
+CACHE_WARMER_INTERVAL segundos:
+
+- tránsitos de la hora actual y, en los últimos CACHE_WARMER_LEAD segundos
+  antes del cambio de hora, de la siguiente, para las zonas más pedidas;
+- tránsitos a las 00:00 de las fechas más pedidas y, antes del cambio de día,
+  de mañana (los horóscopos diarios con fecha usan esa hora);
+- tránsitos mensuales del mes actual, del siguiente y de los más pedidos
+  (almacén persistente, ver monthly_store);
+- y expulsa las entradas caducadas (SmartCache.invalidate_old_transits).
+
+Se calienta lo mismo que piden las vistas: sin fecha la hora local del
+servidor (`datetime.now()`), con fecha las 00:00 de ese día. En caché quedan
+las instantáneas de las horas UTC que rodean cada instante (ver
+horoscope_service.transit_snapshot), compartidas entre zonas.
+
+Presupuesto de CPU: tras cada tarea el hilo duerme lo necesario para que su
+tiempo ocupado no pase de CACHE_WARMER_CPU_BUDGET (fracción de un núcleo),
+así nunca deja sin CPU a los hilos de las peticiones. Se mide tiempo de
+reloj y no de CPU del hilo: con EPHEMERIS_WORKERS > 0 el cálculo corre en
+otro proceso, y el tiempo de reloj nunca es menor que el de CPU.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TrafficStats:
+    """
+    Contadores de lo que pide el tráfico real, con decaimiento: en cada ciclo
+    del warmer se reducen a la mitad, así que pesa más lo reciente.
+    """
+
+    def __init__(self, max_keys: int = 1000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self.timezones = Counter()
+        self.dates = Counter()  # "YYYY-MM-DD" pedidos explícitamente
+        self.months = Counter()  # (year, month)
+
+    def _add(self, counter: Counter, key):
+        # Acotado: una clave nueva no entra si ya hay max_keys distintas
+        if key in counter or len(counter) < self.max_keys:
+            counter[key] += 1
+
+    def record(self, timezone: str = None, date: str = None, month: tuple = None):
+        with self._lock:
+            if timezone:
+                self._add(self.timezones, timezone)
+            if date:
+                self._add(self.dates, date)
+            if month:
+                self._add(self.months, month)
+
+    def top(self, n: int) -> dict:
+        with self._lock:
+            return {
+                "timezones": [k for k, _ in self.timezones.most_common(n)],
+                "dates": [k for k, _ in self.dates.most_common(n)],
+                "months": [k for k, _ in self.months.most_common(n)],
+            }
+
+    def decay(self):
+        with self._lock:
+            for counter in (self.timezones, self.dates, self.months):
+                for key in list(counter):
+                    counter[key] //= 2
+                    if counter[key] == 0:
+                        del counter[key]
+
+
+traffic = TrafficStats()
+
+
+def _warm_transits(dt: datetime, timezone: str):
+    from .horoscope_service import calculate_transits
+    calculate_transits(dt, timezone)
+
+
+def _warm_month(month: int, year: int):
+    from .monthly_store import get_monthly_transits
+    get_monthly_transits(month, year)
+
+
+def _evict_expired():
+    from .cache_manager import SmartCache
+    SmartCache.invalidate_old_transits()
+
+
+class CacheWarmer(threading.Thread):
+    """Hilo daemon que precalienta la caché según `traffic`."""
+
+    def __init__(self, stats: TrafficStats = None, interval: float = None, lead: float = None,
+                 cpu_budget: float = None, top_n: int = None):
+        super().__init__(name="cache-warmer", daemon=True)
+        self.stats = stats or traffic
+        self.interval = interval if interval is not None else settings.CACHE_WARMER_INTERVAL
+        self.lead = lead if lead is not None else settings.CACHE_WARMER_LEAD
+        self.cpu_budget = cpu_budget if cpu_budget is not None else settings.CACHE_WARMER_CPU_BUDGET
+        self.top_n = top_n if top_n is not None else settings.CACHE_WARMER_TOP_N
+        self._stop_event = threading.Event()
+        self._months_warmed = set()  # el almacén mensual es persistente: basta una vez
+        self.cycles = 0
+        self.tasks_run = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.throttled_seconds = 0.0
+
+    def plan(self, now: datetime) -> list:
+        """Tareas (etiqueta, función, args) del ciclo para la hora local `now`."""
+        top = self.stats.top(self.top_n)
+        timezones = top["timezones"] or ["UTC"]
+        tasks = []
+
+        # Hora actual y, cerca del cambio, la siguiente
+        hour = now.replace(minute=0, second=0, microsecond=0)
+        hours = [hour]
+        if (hour + timedelta(hours=1) - now).total_seconds() <= self.lead:
+            hours.append(hour + timedelta(hours=1))
+        for tz in timezones:
+            for h in hours:
+                tasks.append((f"transits {h:%Y-%m-%d %H}h {tz}", _warm_transits, (h, tz)))
+
+        # 00:00 de las fechas pedidas y, cerca del cambio de día, de mañana
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        days = []
+        for date_str in top["dates"]:
+            try:
+                day = datetime.strptime(date_str, "%Y-%m-%d")
+            except ValueError:
+                continue
+            if day >= today:
+                days.append(day)
+        tomorrow = today + timedelta(days=1)
+        if (tomorrow - now).total_seconds() <= self.lead and tomorrow not in days:
+            days.append(tomorrow)
+        for day in days:
+            for tz in timezones:
+                tasks.append((f"transits {day:%Y-%m-%d} {tz}", _warm_transits, (day, tz)))
+
+        # Mes actual, siguiente y los más pedidos
+        next_month = (today.replace(day=28) + timedelta(days=4)).replace(day=1)
+        months = [(today.year, today.month), (next_month.year, next_month.month)] + top["months"]
+        for year, month in dict.fromkeys(months):
+            if (year, month) not in self._months_warmed and 1900 <= year <= 2100:
+                tasks.append((f"monthly {month:02d}/{year}", self._warm_month, (month, year)))
+
+        tasks.append(("evict expired", _evict_expired, ()))
+        return tasks
+
+    def _warm_month(self, month: int, year: int):
+        _warm_month(month, year)
+        self._months_warmed.add((year, month))
+
+    def run_once(self, now: datetime = None):
+        """Un ciclo: ejecuta el plan respetando el presupuesto de CPU."""
+        for label, fn, args in self.plan(now or datetime.now()):
+            if self._stop_event.is_set():
+                break
+            start = time.perf_counter()
+            try:
+                fn(*args)
+                self.tasks_run += 1
+            except Exception:
+                self.errors += 1
+                logger.exception("cache warmer: %s", label)
+            spent = time.perf_counter() - start
+            self.busy_seconds += spent
+            self._throttle(spent)
+        self.stats.decay()
+        self.cycles += 1
+
+    def _throttle(self, spent: float):
+        """Duerme para que ocupado / (ocupado + espera) no supere cpu_budget."""
+        if self.cpu_budget >= 1 or spent <= 0:
+            return
+        pause = spent * (1 - self.cpu_budget) / self.cpu_budget
+        self.throttled_seconds += pause
+        self._stop_event.wait(pause)
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.run_once()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def info(self) -> dict:
+        return {
+            "running": self.is_alive(),
+            "cycles": self.cycles,
+            "tasks_run": self.tasks_run,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "throttled_seconds": round(self.throttled_seconds, 3),
+            "cpu_budget": self.cpu_budget,
+            "top": self.stats.top(self.top_n),
+        }
+
+
+_warmer = None
+_warmer_lock = threading.Lock()
+
+
+def start_warmer() -> CacheWarmer:
+    """Arranca el warmer del proceso (una vez)."""
+    global _warmer
+    with _warmer_lock:
+        if _warmer is None or not _warmer.is_alive():
+            _warmer = CacheWarmer()
+            _warmer.start()
+    return _warmer
+
+
+def get_warmer():
+    return _warmer
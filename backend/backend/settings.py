@@ -13,11 +13,27 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with astroapi.  If not, see <https://www.gnu.org/licenses/>.
 
+import atexit
 import os
+import shutil
+import sys
+import tempfile
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# `manage.py test` no usa los ficheros compartidos del nodo (caché SQLite, sus
+# estadísticas, el almacén mensual y el índice de eclipses): cada ejecución de
+# los tests trabaja en un directorio temporal propio. Van por el entorno para
+# que también los vean los procesos del pool de efemérides
+TESTING = sys.argv[1:2] == ["test"]
+if TESTING:
+    TEST_DATA_DIR = tempfile.mkdtemp(prefix="astroapi-test-")
+    atexit.register(shutil.rmtree, TEST_DATA_DIR, ignore_errors=True)
+    os.environ["CACHE_STATS_PATH"] = os.path.join(TEST_DATA_DIR, "cache_stats.sqlite3")  # api.cache_stats
+    os.environ["MONTHLY_STORE_PATH"] = os.path.join(TEST_DATA_DIR, "monthly_transits.sqlite3")  # api.monthly_store
+    os.environ["ECLIPSE_INDEX_DIR"] = os.path.join(TEST_DATA_DIR, "eclipses")  # api.eclipses
+
 SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", "insecure-dev-key")
 DEBUG = os.environ.get("DJANGO_DEBUG", "True") == "True"
 ALLOWED_HOSTS = os.environ.get("DJANGO_ALLOWED_HOSTS", "*").split(",")
@@ -33,8 +49,9 @@ MIDDLEWARE = [
     "django.middleware.gzip.GZipMiddleware",  # Compresión GZIP (primero)
     "api.middleware.CORSMiddleware",  # CORS optimizado
     "api.middleware.PerformanceMiddleware",  # Headers de performance
+    "api.middleware.AdmissionMiddleware",  # 503 + Retry-After si un endpoint está saturado
     "django.middleware.common.CommonMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "api.middleware.AsyncWhiteNoiseMiddleware",  # WhiteNoise apto para ASGI
 ]
 
 STATIC_URL = "static/"
@@ -44,8 +61,32 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 # Ruta a efemérides Swiss (montaremos un volumen en Koyeb)
 SE_EPHE_PATH = os.environ.get("SE_EPHE_PATH", str(BASE_DIR.parent / "se_data"))
 
+# Procesos dedicados a Swiss Ephemeris por worker de gunicorn.
+# 0 = cálculo en el hilo de la petición (seguro con --threads gracias al lock
+# de set_topo); >0 = pool de procesos con estado Swiss propio (paralelismo real).
+EPHEMERIS_WORKERS = int(os.environ.get("EPHEMERIS_WORKERS", "0"))
+
+# Hilos del executor de cálculo de las vistas async (modo ASGI): máximo de
+# cálculos Swiss simultáneos por worker; el resto espera sin bloquear el bucle.
+COMPUTE_THREADS = int(os.environ.get("COMPUTE_THREADS", "8"))
+
+# Control de admisión (api/admission.py): por endpoint de cálculo, cálculos
+# simultáneos y peticiones en cola por worker. Con la cola llena, o tras
+# ADMISSION_QUEUE_TIMEOUT segundos en ella, 503 con Retry-After.
+ADMISSION_LIMITS = {
+    "horoscope": (int(os.environ.get("ADMISSION_HOROSCOPE_LIMIT", "6")),
+                  int(os.environ.get("ADMISSION_HOROSCOPE_QUEUE", "200"))),
+    "monthly": (int(os.environ.get("ADMISSION_MONTHLY_LIMIT", "2")),
+                int(os.environ.get("ADMISSION_MONTHLY_QUEUE", "20"))),
+    "eclipses": (int(os.environ.get("ADMISSION_ECLIPSES_LIMIT", "2")),
+                 int(os.environ.get("ADMISSION_ECLIPSES_QUEUE", "20"))),
+}
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", "10"))
+ADMISSION_RETRY_AFTER = int(os.environ.get("ADMISSION_RETRY_AFTER", "5"))  # segundos
+
 ROOT_URLCONF = "backend.urls"
 WSGI_APPLICATION = "backend.wsgi.application"
+ASGI_APPLICATION = "backend.asgi.application"
 
 DATABASES = {
     'default': {
@@ -55,16 +96,43 @@ DATABASES = {
 }
 
 # Configuración de Caché para optimización
-# Usa Redis en producción si está disponible, sino caché en memoria
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'astroapi-cache',
-        'OPTIONS': {
-            'MAX_ENTRIES': 1000,  # Máximo 1000 entradas en caché
+# Por defecto, SQLite (WAL) en disco local: todos los workers de gunicorn del
+# nodo comparten la misma caché. ASTROAPI_CACHE=locmem vuelve a una caché
+# en memoria por proceso.
+if os.environ.get("ASTROAPI_CACHE", "sqlite") == "locmem":
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'astroapi-cache',
+            'OPTIONS': {
+                'MAX_ENTRIES': 1000,  # Máximo 1000 entradas en caché
+            }
         }
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'api.sqlite_cache.SQLiteCache',
+            'LOCATION': os.path.join(TEST_DATA_DIR, "cache.sqlite3") if TESTING else os.environ.get(
+                "CACHE_PATH", str(Path(os.environ.get("ASTROAPI_DATA_DIR", BASE_DIR / "data")) / "cache.sqlite3")
+            ),
+            'OPTIONS': {
+                'MAX_BYTES': int(os.environ.get("CACHE_MAX_BYTES", 64 * 1024 * 1024)),  # 64 MB
+            }
+        }
+    }
+
+# Single-flight entre workers: ante un fallo de caché, un worker calcula y los
+# demás esperan el valor en la caché compartida (lock con cache.add)
+SINGLE_FLIGHT_CROSS_WORKER = os.environ.get("SINGLE_FLIGHT_CROSS_WORKER", "True") == "True"
+
+# Precalentado de caché en segundo plano (api.warmer): un hilo por worker que
+# calcula de antemano los tránsitos de las zonas y fechas más pedidas
+CACHE_WARMER_ENABLED = os.environ.get("CACHE_WARMER_ENABLED", "True") == "True"
+CACHE_WARMER_INTERVAL = float(os.environ.get("CACHE_WARMER_INTERVAL", "60"))  # segundos entre ciclos
+CACHE_WARMER_LEAD = float(os.environ.get("CACHE_WARMER_LEAD", "300"))  # antelación al cambio de hora/día
+CACHE_WARMER_CPU_BUDGET = float(os.environ.get("CACHE_WARMER_CPU_BUDGET", "0.05"))  # fracción de un núcleo
+CACHE_WARMER_TOP_N = int(os.environ.get("CACHE_WARMER_TOP_N", "5"))  # zonas/fechas/meses a precalentar
 
 # Si Redis está disponible (producción), descomentar:
 # CACHES = {
@@ -0,0 +1,89 @@
+"""
+Benchmark del modo ASGI: latencia de las peticiones cacheadas con carga mixta.
+
+Lanza a la vez, en el mismo bucle de eventos y a través del handler ASGI de
+Django (AsyncClient, sin red), peticiones lentas que fallan en caché
+(eclipses de años distintos, tránsitos mensuales) y muchas peticiones de
+tránsitos ya cacheadas (CLIENTS clientes, cada uno con peticiones seguidas).
+Mide la latencia p50/p99 de las cacheadas con y sin la carga lenta, y el pico
+de cálculos simultáneos del executor.
+
+    python benchmark_asgi.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+from statistics import median, quantiles
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+os.environ.setdefault("ASTROAPI_CACHE", "locmem")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.test import AsyncClient  # noqa: E402
+
+from api.offload import get_executor  # noqa: E402
+
+CLIENTS = 20
+REQUESTS_PER_CLIENT = 100
+SLOW_YEARS = range(2040, 2052)
+
+
+async def timed(client, url, params=None):
+    start = time.perf_counter()
+    r = await client.get(url, params or {})
+    assert r.status_code == 200, (url, r.status_code)
+    return (time.perf_counter() - start) * 1000
+
+
+async def cached_client(client):
+    query = {"date": "2031-01-02", "timezone": "UTC"}
+    return [await timed(client, "/api/transits/", query) for _ in range(REQUESTS_PER_CLIENT)]
+
+
+async def cached_load(client):
+    """CLIENTS clientes, cada uno con REQUESTS_PER_CLIENT peticiones seguidas."""
+    per_client = await asyncio.gather(*(cached_client(client) for _ in range(CLIENTS)))
+    return [latency for latencies in per_client for latency in latencies]
+
+
+async def slow_load(client):
+    urls = [f"/api/eclipses/{year}/" for year in SLOW_YEARS]
+    urls += [f"/api/monthly-transits/{month}/2045/" for month in range(1, 13)]
+    return await asyncio.gather(*(timed(client, url) for url in urls))
+
+
+def report(label, latencies):
+    p99 = quantiles(latencies, n=100)[98]
+    print(f"{label:<32}{len(latencies):>8}{median(latencies):>10.2f}ms{p99:>10.2f}ms")
+
+
+async def main():
+    client = AsyncClient()
+    await timed(client, "/api/transits/", {"date": "2031-01-02", "timezone": "UTC"})
+
+    print("=" * 80)
+    print("🚀 BENCHMARK DEL MODO ASGI")
+    print("=" * 80)
+    print(f"\nCOMPUTE_THREADS={settings.COMPUTE_THREADS}, EPHEMERIS_WORKERS={settings.EPHEMERIS_WORKERS}")
+    print(f"\n{'Carga':<32}{'peticiones':>8}{'p50':>12}{'p99':>12}")
+    report("tránsitos cacheados (solos)", await cached_load(client))
+
+    start = time.perf_counter()
+    cached, slow = await asyncio.gather(cached_load(client), slow_load(client))
+    seconds = time.perf_counter() - start
+    report("tránsitos cacheados (mixta)", cached)
+    report("eclipses/mensuales sin caché", slow)
+    info = get_executor().info()
+    print(f"\nCarga mixta: {seconds:.2f}s; executor: {info['submitted']} cálculos, "
+          f"pico de {info['peak_running']} simultáneos (máximo {info['max_workers']})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
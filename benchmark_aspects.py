@@ -0,0 +1,111 @@
+"""
+Benchmark del motor de aspectos vectorizado frente a los bucles anidados
+anteriores (`compute_aspects` y `find_aspects_to_natal`) con 13, 50 y 200 cuerpos.
+No necesita el servidor: importa el código de backend/ directamente.
+
+    python benchmark_aspects.py
+"""
+
+import os
+import random
+import sys
+import time
+from statistics import median
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from api.horoscope_service import (  # noqa: E402
+    ASPECTS_CONFIG, FAST_PLANETS, angular_distance, find_aspects_to_natal,
+)
+from api.services import ASPECTS, angular_sep, compute_aspects  # noqa: E402
+
+SIZES = [13, 50, 200]
+
+
+def loop_compute_aspects(planets):
+    """Versión anterior: pares × ASPECTS en Python."""
+    names = list(planets.keys())
+    out = []
+    for i in range(len(names)):
+        for j in range(i + 1, len(names)):
+            a, b = names[i], names[j]
+            sep = angular_sep(planets[a]["value"], planets[b]["value"])
+            for asp in ASPECTS:
+                diff = abs(sep - asp["angle"])
+                if diff <= asp["orb"]:
+                    out.append({"planet_a": a, "planet_b": b, "aspect": asp["name"],
+                                "angle": round(sep, 4), "orb": round(diff, 4)})
+    return out
+
+
+def loop_find_aspects_to_natal(transits, natal_planets):
+    """Versión anterior: tránsitos × natales × ASPECTS_CONFIG en Python."""
+    aspects = []
+    for transit_name, transit_data in transits.items():
+        is_fast = transit_name in FAST_PLANETS
+        for natal_name, natal_data in natal_planets.items():
+            distance = angular_distance(transit_data["longitude"], natal_data["longitude"])
+            for asp_config in ASPECTS_CONFIG:
+                orb = asp_config["orb_fast"] if is_fast else asp_config["orb_slow"]
+                diff = abs(distance - asp_config["angle"])
+                if diff <= orb:
+                    is_applying = transit_data["speed"] > 0
+                    weight = (10 if is_fast else 5) + (3 if is_applying else 0)
+                    if asp_config["name"] in ["Trígono", "Sextil"]:
+                        weight += 2
+                    aspects.append({"transit_planet": transit_name, "natal_planet": natal_name,
+                                    "aspect": asp_config["name"], "angle": distance, "orb": diff,
+                                    "applying": is_applying, "weight": weight})
+    return sorted(aspects, key=lambda x: x["weight"], reverse=True)
+
+
+def timeit(fn, *args, repeat=7):
+    """Mediana en ms de `repeat` series (cada serie, al menos ~50 ms)."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(*args)
+        if time.perf_counter() - start > 0.05:
+            break
+        number *= 2
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(*args)
+        times.append((time.perf_counter() - start) / number * 1000)
+    return median(times)
+
+
+def main():
+    rng = random.Random(1)
+    print("=" * 80)
+    print("🚀 BENCHMARK DEL MOTOR DE ASPECTOS")
+    print("=" * 80)
+    print(f"\n{'Función':<24}{'Cuerpos':>8}{'Aspectos':>10}{'Bucles':>12}{'Vectorizado':>14}{'Mejora':>9}")
+
+    for n in SIZES:
+        names = FAST_PLANETS + [f"body{i}" for i in range(n)]
+        planets = {name: {"value": rng.uniform(0, 360)} for name in names[:n]}
+        transits = {name: {"longitude": rng.uniform(0, 360), "speed": rng.uniform(-1, 1)} for name in names[:n]}
+        natal = {f"natal{i}": {"longitude": rng.uniform(0, 360)} for i in range(n)}
+
+        cases = [
+            ("compute_aspects", loop_compute_aspects, compute_aspects, (planets,)),
+            ("find_aspects_to_natal", loop_find_aspects_to_natal, find_aspects_to_natal, (transits, natal)),
+        ]
+        for label, old, new, args in cases:
+            result = new(*args)
+            assert result == old(*args), f"{label}: resultados distintos con {n} cuerpos"
+            t_old, t_new = timeit(old, *args), timeit(new, *args)
+            print(f"{label:<24}{n:>8}{len(result):>10}{t_old:>10.3f}ms{t_new:>12.3f}ms{t_old / t_new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
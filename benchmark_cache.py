@@ -0,0 +1,97 @@
+"""
+Benchmark de backends de caché de Django: LocMemCache, FileBasedCache y
+SQLiteCache (api.sqlite_cache) con un valor del tamaño de un horóscopo (~4 KB).
+
+Mide la latencia de get (acierto y fallo) y set en un proceso, y el ratio de
+aciertos cuando dos workers piden las mismas claves: con LocMemCache cada
+proceso tiene su propia copia y el segundo worker falla siempre.
+
+    python benchmark_cache.py
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from statistics import median
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache.backends.filebased import FileBasedCache  # noqa: E402
+from django.core.cache.backends.locmem import LocMemCache  # noqa: E402
+
+from api.sqlite_cache import SQLiteCache  # noqa: E402
+
+KEYS = 1000
+VALUE = {
+    "date": "2025-10-09",
+    "transits": {f"planet{i}": {"longitude": i * 27.5, "speed": 0.98, "sign": "Libra"} for i in range(13)},
+    "top_aspects": [{"transit_planet": "moon", "natal_planet": "sun", "aspect": "Trígono",
+                     "orb": 1.23, "weight": 15}] * 5,
+    "interpretation": {"summary": "x" * 2000},
+}
+
+
+def make_backends(tmpdir):
+    return {
+        "LocMemCache": lambda: LocMemCache("bench", {"OPTIONS": {"MAX_ENTRIES": 10 * KEYS}}),
+        "FileBasedCache": lambda: FileBasedCache(os.path.join(tmpdir, "files"), {"OPTIONS": {"MAX_ENTRIES": 10 * KEYS}}),
+        "SQLiteCache": lambda: SQLiteCache(os.path.join(tmpdir, "cache.sqlite3"), {}),
+    }
+
+
+def per_op_us(fn, keys, repeat=5):
+    """Mediana en µs por operación de `repeat` pasadas sobre `keys`."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for key in keys:
+            fn(key)
+        times.append((time.perf_counter() - start) / len(keys) * 1e6)
+    return median(times)
+
+
+def second_worker(factory, ready, queue):
+    """
+    Otro worker del mismo nodo, creado (como con gunicorn) antes de que el
+    primero llene la caché: pide las claves que guardó el primero.
+    """
+    cache = factory()
+    ready.wait()
+    hits = sum(cache.get(f"horoscope:{i}") is not None for i in range(KEYS))
+    queue.put(hits / KEYS)
+
+
+def main():
+    keys = [f"horoscope:{i}" for i in range(KEYS)]
+    print("=" * 80)
+    print("🚀 BENCHMARK DE BACKENDS DE CACHÉ")
+    print("=" * 80)
+    print(f"\n{'Backend':<16}{'set':>10}{'get (hit)':>12}{'get (miss)':>13}{'aciertos 2º worker':>21}")
+
+    ctx = multiprocessing.get_context("fork")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, factory in make_backends(tmpdir).items():
+            ready, queue = ctx.Event(), ctx.Queue()
+            process = ctx.Process(target=second_worker, args=(factory, ready, queue))
+            process.start()
+
+            cache = factory()
+            t_set = per_op_us(lambda key: cache.set(key, VALUE, 3600), keys)
+            t_hit = per_op_us(cache.get, keys)
+            t_miss = per_op_us(lambda key: cache.get(key + ":missing"), keys)
+
+            ready.set()
+            shared = queue.get()
+            process.join()
+            print(f"{name:<16}{t_set:>8.1f}µs{t_hit:>10.1f}µs{t_miss:>11.1f}µs{shared:>20.0%}")
+
+
+if __name__ == "__main__":
+    main()
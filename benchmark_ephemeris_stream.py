@@ -0,0 +1,60 @@
+"""
+Benchmark del streaming de efemérides (GET /api/ephemeris/).
+
+Recorre el generador de la respuesta para rangos de 1, 10 y 40 años a paso
+horario y mide filas por segundo, bytes generados y el pico de memoria del
+proceso mientras dura el stream: debe ser el mismo para todos los rangos.
+
+    python benchmark_ephemeris_stream.py
+
+Sin la tabla precalculada (manage.py build_ephemeris_table) las posiciones
+salen de Swiss y el throughput cae mucho; conviene construirla antes.
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from api.ephemeris_stream import EphemerisRange, stream_ephemeris  # noqa: E402
+from api.ephemeris_table import get_table  # noqa: E402
+
+RANGES = [("1 año", "1990-12-31T23:00"), ("10 años", "1999-12-31T23:00"), ("40 años", "2029-12-31T23:00")]
+
+
+def run(end: str, fmt: str, trace: bool):
+    selection = EphemerisRange.from_query({"start": "1990-01-01", "end": end, "step": "1h", "format": fmt})
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    size = sum(len(chunk) for chunk in stream_ephemeris(selection))
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if trace else 0
+    if trace:
+        tracemalloc.stop()
+    return selection.rows, size, seconds, peak
+
+
+def main():
+    print("=" * 80)
+    print("🚀 BENCHMARK DE STREAMING DE EFEMÉRIDES")
+    print("=" * 80)
+    print(f"\nPosiciones desde: {'tabla precalculada' if get_table() else 'Swiss Ephemeris'}")
+    print(f"\n{'Rango':<10}{'formato':<9}{'filas':>10}{'MB':>8}{'filas/s':>11}{'pico memoria':>15}")
+    for label, end in RANGES:
+        for fmt in ("ndjson", "csv"):
+            rows, size, seconds, _ = run(end, fmt, trace=False)
+            # El pico se mide en otra pasada: tracemalloc ralentiza el stream
+            _, _, _, peak = run(end, fmt, trace=True)
+            print(f"{label:<10}{fmt:<9}{rows:>10}{size / 1e6:>8.1f}{rows / seconds:>11.0f}{peak / 1e6:>13.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark de formatos de respuesta (api.formats): json, compact y packed
+para una carta natal, el tránsito lunar y un horóscopo diario.
+
+Mide el tamaño en bytes (sin comprimir y con gzip), el coste de codificar en
+el servidor y el de decodificar en el cliente (json.loads o formats.unpack).
+
+    python benchmark_formats.py
+"""
+
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from statistics import median
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+os.environ.setdefault("ASTROAPI_CACHE", "locmem")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+
+from api.formats import FORMATS, encode, unpack  # noqa: E402
+from api.horoscope_service import calculate_transits, generate_daily_horoscope_personal  # noqa: E402
+from api.services import compute_chart  # noqa: E402
+
+BIRTH = {
+    "datetime": "1992-02-14T20:30:00",
+    "timezone": "Europe/Madrid",
+    "latitude": 41.5421,
+    "longitude": 2.1094,
+    "house_system": "placidus",
+    "topocentric_moon_only": False,
+}
+
+
+def per_call_us(fn, repeat=2000):
+    """Mediana en µs por llamada de 5 pasadas de `repeat` llamadas."""
+    times = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        times.append((time.perf_counter() - start) / repeat * 1e6)
+    return median(times)
+
+
+def decoder(fmt):
+    return unpack if fmt == "packed" else json.loads
+
+
+def main():
+    chart = compute_chart(BIRTH, settings.SE_EPHE_PATH)
+    day = datetime(2031, 1, 2)
+    moon = calculate_transits(day, "UTC")["moon"]
+    payloads = {
+        "chart": chart,
+        "transits": {"date": "2031-01-02", "timezone": "UTC", "transits": {"moon": moon}},
+        "horoscope": generate_daily_horoscope_personal(chart, day, "UTC"),
+    }
+
+    print("=" * 80)
+    print("🚀 BENCHMARK DE FORMATOS DE RESPUESTA")
+    print("=" * 80)
+    print(f"\n{'Respuesta':<11}{'formato':<9}{'bytes':>8}{'gzip':>8}{'vs json':>9}{'codificar':>12}{'decodificar':>14}")
+    for kind, result in payloads.items():
+        baseline = len(encode(kind, result, "json"))
+        for fmt in FORMATS:
+            body = encode(kind, result, fmt)
+            t_encode = per_call_us(lambda: encode(kind, result, fmt))
+            decode = decoder(fmt)
+            t_decode = per_call_us(lambda: decode(body))
+            print(f"{kind:<11}{fmt:<9}{len(body):>8}{len(gzip.compress(body)):>8}"
+                  f"{baseline / len(body):>8.1f}x{t_encode:>10.1f}µs{t_decode:>12.1f}µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark del horóscopo diario en lote (POST /api/horoscope/batch/).
+
+Genera el horóscopo de N cartas para la misma fecha de dos formas:
+
+- una a una, como el trabajo de notificaciones de hoy: una llamada a
+  generate_daily_horoscope_personal (sin su caché) y un json.dumps por carta
+- en lote: horoscope_batch.stream_horoscopes, con los tránsitos calculados
+  una vez y aspectos y casas de todas las cartas en bloque
+
+y mide cartas por segundo. Las cartas son aleatorias y no cuentan en el tiempo.
+
+    python benchmark_horoscope_batch.py
+"""
+
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+os.environ.setdefault("ASTROAPI_CACHE", "locmem")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.serializers.json import DjangoJSONEncoder  # noqa: E402
+
+from api.horoscope_batch import stream_horoscopes  # noqa: E402
+from api.horoscope_service import generate_daily_horoscope_personal  # noqa: E402
+from api.services import compute_chart  # noqa: E402
+
+SIZES = [100, 1000, 5000]
+DAY = datetime(2031, 1, 2)
+
+
+def random_chart(rng):
+    birth = datetime(1950, 1, 1) + (datetime(2010, 1, 1) - datetime(1950, 1, 1)) * rng.random()
+    return compute_chart({
+        "datetime": birth.strftime("%Y-%m-%dT%H:%M:%S"),
+        "timezone": "UTC",
+        "latitude": rng.uniform(-60, 60),
+        "longitude": rng.uniform(-180, 180),
+        "house_system": "placidus",
+        "topocentric_moon_only": False,
+    }, settings.SE_EPHE_PATH)
+
+
+def one_by_one(charts):
+    generate = generate_daily_horoscope_personal.__wrapped__  # sin la caché de horóscopos
+    for chart in charts:
+        json.dumps(generate(chart, DAY, "UTC"), cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def batch(charts):
+    items = [({"index": k}, chart) for k, chart in enumerate(charts)]
+    return sum(len(chunk) for chunk in stream_horoscopes(items, DAY, "UTC"))
+
+
+def timed(fn, charts):
+    start = time.perf_counter()
+    fn(charts)
+    return time.perf_counter() - start
+
+
+def main():
+    rng = random.Random(42)
+    charts = [random_chart(rng) for _ in range(max(SIZES))]
+    one_by_one(charts[:10])  # calienta las instantáneas de tránsitos
+
+    print("=" * 80)
+    print("🚀 BENCHMARK DE HORÓSCOPOS EN LOTE")
+    print("=" * 80)
+    print(f"\n{'Cartas':>8}{'una a una':>14}{'en lote':>14}{'cartas/s lote':>16}{'mejora':>9}")
+    for size in SIZES:
+        single = timed(one_by_one, charts[:size])
+        grouped = timed(batch, charts[:size])
+        print(f"{size:>8}{single * 1000:>12.0f}ms{grouped * 1000:>12.0f}ms{size / grouped:>16.0f}"
+              f"{single / grouped:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -161,8 +161,35 @@ def main():
         improvement = ((results_horoscope_cold['mean'] - results_horoscope_warm['mean']) / results_horoscope_cold['mean']) * 100
         print(f"   📈 Mejora: {improvement:.1f}% más rápido")
     
-    # 5. Estadísticas de caché
-    print("\n5️⃣  Estadísticas de Caché")
+    # 5. Cartas en lote vs individuales
+    print("\n5️⃣  Cartas Natales en Lote")
+    batch_size = 100
+    results_single = benchmark_endpoint(
+        f"{API_URL}/compute/",
+        method="POST",
+        payload=BIRTH_DATA,
+        iterations=5
+    )
+    batch_payload = [
+        dict(BIRTH_DATA, datetime=f"1992-12-{(i % 28) + 1:02d}T{i % 24:02d}:30:00")
+        for i in range(batch_size)
+    ]
+    results_batch = benchmark_endpoint(
+        f"{API_URL}/compute/batch/",
+        method="POST",
+        payload=batch_payload,
+        iterations=3
+    )
+
+    if results_single and results_batch:
+        single_rate = 1000 / results_single['mean']
+        batch_rate = batch_size * 1000 / results_batch['mean']
+        print(f"\n   ⚡ Individual: {single_rate:.1f} cartas/s")
+        print(f"   ⚡ Lote ({batch_size}): {batch_rate:.1f} cartas/s")
+        print(f"   📈 Mejora: x{batch_rate / single_rate:.1f}")
+
+    # 6. Estadísticas de caché
+    print("\n6️⃣  Estadísticas de Caché")
     try:
         stats_response = requests.get(f"{API_URL}/cache/stats/")
         stats = stats_response.json()